@@ -0,0 +1,1669 @@
+# Banc de test commun à mongodb.py et mysql.py
+# Ce module regroupe l'enregistrement des mesures, la progression, la sauvegarde des résultats,
+# les scénarios de test et leur enchaînement. Chaque SGBD implémente l'interface Backend.
+
+from os import makedirs, path, getenv, remove
+import json
+
+# For measuring operation time
+from collections import defaultdict
+from time import perf_counter_ns as time_ns
+
+#  For statistics
+from numpy import arange, median as np_median, mean as np_mean, std as np_std, percentile, geomspace, unique, log10
+from numpy.random import default_rng
+
+# For generating data and handling data
+from generate_data import extract_books_from_file, extract_updated_books_from_file ,generated_file, updated_file
+from generate_data import generate_book, modify_book, GeneratedBooks
+from generate_data import num_records, num_records_per_many, nb_measurements
+
+# For choosing the keys of the reads and updates
+from key_chooser import choose_keys
+
+# For system information
+from platform import system, release, machine, architecture, python_version
+from psutil import cpu_count, virtual_memory, Process
+from cpuinfo import get_cpu_info
+
+# For animation
+from alive_progress import alive_bar
+from threading import Thread, Event, get_ident
+
+# For logging without blocking the measures
+from logging import Handler, WARNING, makeLogRecord
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, Full
+from atexit import register as at_exit
+
+# For profiling the client
+from cProfile import Profile
+from pstats import Stats
+from sys import _current_frames
+from io import StringIO
+
+# For memory tracking
+import tracemalloc
+
+
+# Temps côté serveur de chaque opération (µs) : "insert", "find", "update", "delete"
+operation_times			= defaultdict(list)
+# Temps observés côté client (construction de la requête, aller-retour et
+# récupération des résultats en Python compris), alignés sur operation_times
+client_operation_times	= defaultdict(list)
+# Instant de début (perf_counter_ns) de chaque opération, pour aligner les mesures
+# avec les métriques serveur échantillonnées par ServerMetricsSampler
+operation_timestamps	= defaultdict(list)
+# Plans d'exécution capturés une fois par forme d'opération
+query_plans				= {}
+
+# Pendant la mise en route, les opérations ne sont ni mesurées ni comptées
+recording_paused	= False
+
+# Mise en route : cycles insertion / lecture / suppression non mesurés avant chaque scénario.
+# La stabilité est atteinte quand le coefficient de variation des steady_state_window derniers cycles
+# passe sous le seuil demandé, dans la limite de max_warmup_operations cycles
+steady_state_window		= 20
+max_warmup_operations	= 2000
+warmup_book				= {	"id": -1, "title": "warm-up", "author": "warm-up", "published_date": "2000-01-01",
+							"genre": "Fiction", "price": 10.0, "copies_sold": 0, "ran": 0 }
+
+# Nombre d'opérations par palier des tests "various_data", chacune sur une cible tirée au hasard,
+# et percentiles enregistrés pour chaque palier (bandes des graphiques)
+step_repetitions		= int(getenv("STEP_REPETITIONS", 5))
+step_band_percentiles	= [5, 25, 50, 75, 95]
+# Graine du tirage des cibles, identique d'une exécution à l'autre
+target_seed				= 0
+
+# Balayage logarithmique : paliers par décade et taille des lots du chargement entre deux paliers
+steps_per_decade		= 4
+bulk_load_size			= 10000
+
+# Valeurs critiques de Student (intervalle de confiance à 95 %) selon le nombre de degrés de liberté
+student_t_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+				10: 2.228, 15: 2.131, 20: 2.086, 30: 2.042, 60: 2.000, 120: 1.980}
+
+# Taille de la file des journaux écrits en arrière-plan : une fois pleine, les messages sont abandonnés
+# plutôt que de bloquer les opérations mesurées
+log_queue_size			= 10000
+# Dossier des journaux, un par topologie quand start-test.sh les teste en parallèle
+logs_dir				= getenv("LOGS_DIR", "logs")
+
+# Profilage du client par scénario : profileurs disponibles, intervalle (s) entre deux échantillons
+# du profileur par échantillonnage et dossier des profils
+profilers				= ["cprofile", "sampling"]
+sampling_interval		= 0.005
+profiles_dir			= "profiles"
+# Fichiers où le thread des tests attend la réponse du SGBD (heuristique du profileur par échantillonnage)
+wait_files				= ["socket.py", "ssl.py", "selectors.py", "network_layer.py", "network.py"]
+
+# Suivi de la mémoire par scénario : modes disponibles, intervalle (s) entre deux relevés,
+# profondeur des piles tracées par tracemalloc et nombre de sites d'allocation rapportés
+memory_modes			= ["rss", "tracemalloc"]
+memory_interval			= 0.1
+memory_frames			= 1
+memory_top				= 10
+# Nouvelle photographie des allocations quand la mémoire tracée dépasse la précédente de 10 %
+memory_snapshot_growth	= 1.1
+
+# Points de reprise des exécutions interrompues : checkpoints/<SGBD>/<mode>/<test>.jsonl
+checkpoints_dir			= "checkpoints"
+
+system_info			= ""
+# Compteur des opérations, incrémenté par le seul thread des tests et lu par le thread de progression
+operations_done		= 0
+# Intervalle (s) entre deux rafraîchissements de la barre de progression
+progress_interval	= 0.5
+progress_stop		= Event()
+
+
+######### Enregistrement des mesures #########
+
+def add_operation_time(operation, time):
+	"""
+	Add the server-side time of an operation
+	:param time: duration in ns
+	"""
+	if recording_paused:
+		return
+	# Convert nanoseconds time to microseconds
+	time = time/1000
+	operation_times[operation].append(time)
+
+def extend_last_operation_time(operation, time):
+	"""
+	Add time to the last server-side time of an operation (e.g. getMore of a find)
+	:param time: duration in ns
+	"""
+	if recording_paused or len(operation_times.get(operation, [])) == 0:
+		return
+	operation_times[operation][-1] += time/1000
+
+def move_last_operation_time(operation, new_operation):
+	"""
+	Record the last server-side time of an operation under another name (e.g. a find run by a scan)
+	"""
+	if recording_paused or len(operation_times.get(operation, [])) == 0:
+		return
+	operation_times[new_operation].append(operation_times[operation].pop())
+
+def add_client_operation_time(operation, time):
+	"""
+	Add the client-side time of an operation
+	:param time: duration in ns
+	"""
+	if recording_paused:
+		return
+	# L'opération vient de se terminer : elle a commencé il y a time ns
+	operation_timestamps[operation].append(time_ns() - time)
+	# Convert nanoseconds time to microseconds
+	time = time/1000
+	client_operation_times[operation].append(time)
+
+def clear_operation_times():
+	"""
+	Clear the server and client times of the operations
+	"""
+	operation_times.clear()
+	client_operation_times.clear()
+	operation_timestamps.clear()
+
+def pause_recording():
+	"""
+	Stop measuring and counting the operations
+	"""
+	global recording_paused
+	recording_paused = True
+
+def resume_recording():
+	"""
+	Measure and count the operations again
+	"""
+	global recording_paused
+	recording_paused = False
+
+def summarize_operation_times(times: dict) -> dict:
+	"""
+	Median time (µs) of each operation
+	"""
+	return {operation: float(np_median(times[operation])) for operation in times if len(times[operation]) > 0}
+
+def save_results(backend: str, test_type: str, test_name: str, results: dict):
+	"""
+	Save results in results/<backend>/<test_type>/<test_name>.json
+	The sections already saved in the file are kept, those in results are replaced
+	"""
+	makedirs(f"results/{backend}/{test_type}", exist_ok=True)
+	save_path = f"results/{backend}/{test_type}/{test_name}.json"
+
+	saved = {}
+	if path.exists(save_path):
+		with open(save_path, "r") as f:
+			saved = json.load(f)
+	saved.update(results)
+
+	with open(save_path, "w") as f:
+		json.dump(saved, f, indent=4, default=str)
+
+def step_bands(step_times: list[dict]) -> dict:
+	"""
+	Percentiles of the times of each step
+	:param step_times: one {operation: times (µs)} dict per step
+	:return: {operation: {"p<q>": one value per step}}
+	"""
+	bands = {}
+	for operation in {operation for times in step_times for operation in times}:
+		values = [percentile(times[operation], step_band_percentiles) if len(times.get(operation, [])) > 0 else [None]*len(step_band_percentiles)
+				  for times in step_times]
+		bands[operation] = {f"p{q}": [None if value[i] is None else float(value[i]) for value in values] for i, q in enumerate(step_band_percentiles)}
+	return bands
+
+def save_query_plans(backend: str, test_type: str, test_name: str):
+	"""
+	Save the captured query plans with the results of the test, then forget them
+	"""
+	if len(query_plans) == 0:
+		return
+	save_results(backend, test_type, test_name, {"query_plans": dict(query_plans)})
+	query_plans.clear()
+
+
+######### Journalisation #########
+
+class BoundedQueueHandler(QueueHandler):
+	"""
+	Queue handler that never blocks the caller : the records are dropped when the queue is full
+	The records are formatted by the writing thread, not by the measured operation
+	"""
+
+	def __init__(self, queue: Queue):
+		super().__init__(queue)
+		self.dropped = 0
+
+	def prepare(self, record):
+		return record
+
+	def enqueue(self, record):
+		try:
+			self.queue.put_nowait(record)
+		except Full:
+			self.dropped += 1
+
+def queued_handler(*handlers: Handler) -> BoundedQueueHandler:
+	"""
+	Handler passing the records to handlers (files) through a bounded queue, written by a background thread
+	The thread writes the remaining records when the program exits
+	"""
+	queue		= Queue(log_queue_size)
+	handler		= BoundedQueueHandler(queue)
+	listener	= QueueListener(queue, *handlers, respect_handler_level=True)
+	listener.start()
+
+	def stop():
+		listener.stop()
+		# Les messages abandonnés sont signalés directement dans les fichiers
+		if handler.dropped > 0:
+			record = makeLogRecord({"levelno": WARNING, "levelname": "WARNING", "msg": "%d log records dropped, the log queue was full",
+									"args": (handler.dropped,)})
+			for target in handlers:
+				target.handle(record)
+	at_exit(stop)
+	return handler
+
+
+######### Profilage #########
+
+class SamplingProfiler(Thread):
+	"""
+	Background thread sampling the Python stack of a thread every interval
+	The stacks are counted in the collapsed format of flame graphs ("frame;frame;frame count")
+	"""
+
+	def __init__(self, thread_id: int, interval: float = sampling_interval):
+		super().__init__(daemon=True)
+		self.thread_id	= thread_id
+		self.interval	= interval
+		self.stacks		= defaultdict(int)
+		self.__stop		= Event()
+
+	def run(self):
+		while not self.__stop.is_set():
+			frame = _current_frames().get(self.thread_id)
+			stack = []
+			while frame is not None:
+				stack.append(f"{path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+				frame = frame.f_back
+			if stack:
+				self.stacks[";".join(reversed(stack))] += 1
+			self.__stop.wait(self.interval)
+
+	def stop(self):
+		self.__stop.set()
+		self.join(timeout=max(3, 2*self.interval))
+
+	def summary(self) -> str:
+		"""
+		Share of the samples waiting for the database (leaf frame in wait_files) and most sampled leaf frames
+		"""
+		total	= sum(self.stacks.values())
+		leaves	= defaultdict(int)
+		for stack, count in self.stacks.items():
+			leaves[stack.rsplit(";", 1)[-1]] += count
+		waiting = sum(count for leaf, count in leaves.items() if leaf.split(":")[0] in wait_files)
+		lines	= [	f"samples : {total} (every {self.interval*1000:g} ms)",
+					f"waiting for the database : {waiting} ({100*waiting/max(total, 1):.1f} %)",
+					f"client : {total - waiting} ({100*(total - waiting)/max(total, 1):.1f} %)",
+					"", "most sampled frames :"]
+		lines	+= [f"{count:8d} {100*count/max(total, 1):5.1f} %  {leaf}" for leaf, count in sorted(leaves.items(), key=lambda item: -item[1])[:30]]
+		return "\n".join(lines) + "\n"
+
+def pstats_stacks(stats: Stats, min_time: float = 1e-6) -> dict:
+	"""
+	Collapsed stacks rebuilt from the call graph of a deterministic profile, weighted by self time (µs)
+	cProfile only keeps caller -> callee edges : the time of a function is split between its callers
+	in proportion to the time of each edge, which approximates the real stacks
+	:param min_time: branches shorter than min_time (s) are dropped
+	"""
+	def frame(function) -> str:
+		file, _, name = function
+		return f"{path.basename(file)}:{name}".replace(";", ",")
+
+	children = defaultdict(dict)
+	for function, (_, _, _, _, callers) in stats.stats.items():
+		for caller, (_, _, _, edge_time) in callers.items():
+			children[caller][function] = edge_time
+
+	stacks	= defaultdict(int)
+	# (fonction, pile jusqu'à elle, temps cumulé de la fonction sur cette pile)
+	pending	= [(function, (function,), cumulative) for function, (_, _, _, cumulative, callers) in stats.stats.items() if not callers]
+	while pending:
+		function, stack, time = pending.pop()
+		_, _, own, cumulative, _ = stats.stats[function]
+		if cumulative <= 0:
+			continue
+		scale = time / cumulative
+		if own * scale >= min_time:
+			stacks[";".join(frame(caller) for caller in stack)] += round(own * scale * 1e6)
+		for child, edge_time in children[function].items():
+			# Les appels récursifs sont rattachés à la première occurrence de la fonction dans la pile
+			if child not in stack and edge_time * scale >= min_time:
+				pending.append((child, stack + (child,), edge_time * scale))
+	return stacks
+
+def profiled_call(profiler: str | None, save_path: str, function, *args, **kwargs):
+	"""
+	Call function, under the profiler if any, and save its profile next to save_path, <save_path>.folded holding
+	the collapsed stacks for flame graphs :
+	"cprofile" writes <save_path>.prof (pstats), <save_path>.txt (functions sorted by cumulated time) and
+	<save_path>.folded rebuilt from the call graph (cf pstats_stacks), weighted in µs,
+	"sampling" writes <save_path>.folded, weighted in samples, and <save_path>.txt (client / database split)
+	"""
+	if profiler is None:
+		return function(*args, **kwargs)
+	makedirs(path.dirname(save_path), exist_ok=True)
+
+	if profiler == "cprofile":
+		profile = Profile()
+		try:
+			return profile.runcall(function, *args, **kwargs)
+		finally:
+			profile.dump_stats(save_path + ".prof")
+			text	= StringIO()
+			stats	= Stats(profile, stream=text)
+			stats.sort_stats("cumulative").print_stats(50)
+			with open(save_path + ".txt", "w") as f:
+				f.write(text.getvalue())
+			with open(save_path + ".folded", "w") as f:
+				f.writelines(f"{stack} {count}\n" for stack, count in pstats_stacks(stats).items() if count > 0)
+
+	sampler = SamplingProfiler(get_ident())
+	sampler.start()
+	try:
+		return function(*args, **kwargs)
+	finally:
+		sampler.stop()
+		with open(save_path + ".folded", "w") as f:
+			f.writelines(f"{stack} {count}\n" for stack, count in sampler.stacks.items())
+		with open(save_path + ".txt", "w") as f:
+			f.write(sampler.summary())
+
+
+######### Suivi de la mémoire #########
+
+class MemorySampler(Thread):
+	"""
+	Background thread sampling the resident set size of the process every interval,
+	and the Python allocations if tracemalloc is tracing : the snapshot closest to the traced peak is kept
+	"""
+
+	def __init__(self, interval: float = memory_interval):
+		super().__init__(daemon=True)
+		self.interval	= interval
+		self.process	= Process()
+		self.rss_start	= self.process.memory_info().rss
+		self.rss_peak	= self.rss_start
+		self.snapshot	= None
+		self.snapshot_size = 0
+		self.__stop		= Event()
+
+	def sample(self):
+		self.rss_peak = max(self.rss_peak, self.process.memory_info().rss)
+		if tracemalloc.is_tracing():
+			current, _ = tracemalloc.get_traced_memory()
+			if current > self.snapshot_size * memory_snapshot_growth:
+				self.snapshot		= tracemalloc.take_snapshot()
+				self.snapshot_size	= current
+
+	def run(self):
+		while not self.__stop.is_set():
+			self.sample()
+			self.__stop.wait(self.interval)
+
+	def stop(self):
+		self.__stop.set()
+		self.join(timeout=max(3, 2*self.interval))
+		self.sample()
+
+	def report(self) -> dict:
+		"""
+		Resident set size at the start, peak and end (bytes), and the largest allocation sites of the kept snapshot
+		"""
+		report = {"rss_start": self.rss_start, "rss_peak": self.rss_peak, "rss_end": self.process.memory_info().rss}
+		if self.snapshot is not None:
+			snapshot = self.snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+													tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+													tracemalloc.Filter(False, "<unknown>")])
+			report["top_allocations"] = [{"site": str(stat.traceback), "size": stat.size, "count": stat.count}
+										 for stat in snapshot.statistics("lineno")[:memory_top]]
+		return report
+
+def memory_tracked_call(memory: str | None, report: dict, function, *args, **kwargs):
+	"""
+	Call function and fill report with the memory used during the call :
+	"rss" samples the resident set size of the process,
+	"tracemalloc" also traces the Python allocations and reports their peak and largest sites
+	:param memory: mode among memory_modes, None to disable
+	"""
+	if memory is None:
+		return function(*args, **kwargs)
+
+	started = memory == "tracemalloc" and not tracemalloc.is_tracing()
+	if started:
+		tracemalloc.start(memory_frames)
+	elif tracemalloc.is_tracing():
+		tracemalloc.reset_peak()
+	sampler = MemorySampler()
+	sampler.start()
+	try:
+		return function(*args, **kwargs)
+	finally:
+		sampler.stop()
+		report.update(sampler.report())
+		if tracemalloc.is_tracing():
+			report["traced_peak"] = tracemalloc.get_traced_memory()[1]
+		if started:
+			tracemalloc.stop()
+
+
+######### Interface des SGBD #########
+
+class Backend:
+	"""
+	Database tested by the harness
+	Each operation records its server time with add_operation_time (or a monitoring listener),
+	its client time with add_client_operation_time and calls count_operation unless silent
+	"""
+
+	# Nom du dossier des résultats : results/<name>/
+	name = "Backend"
+
+	# Capture des plans d'exécution (--explain), une fois par forme d'opération
+	capture_plans	= False
+
+	# Écritures groupées par transaction, 0 ou 1 : chaque écriture est validée seule (autocommit)
+	commit_interval	= 0
+	pending_writes	= 0
+	in_transaction	= False
+
+	def create_one(self, data: dict, silent: bool = False):
+		raise NotImplementedError
+
+	def create_many(self, data: list[dict], silent: bool = False):
+		raise NotImplementedError
+
+	def read_one(self, query: dict, print_result: bool = False):
+		raise NotImplementedError
+
+	def read_many(self, query: dict, print_result: bool = False):
+		raise NotImplementedError
+
+	def scan(self, start_id: int, count: int, print_result: bool = False):
+		"""
+		Read count records in id order, from start_id, recorded as a "scan" operation
+		"""
+		raise NotImplementedError
+
+	def update_one(self, query: dict, new_values: dict):
+		"""
+		:param new_values: the new values of the modified fields
+		"""
+		raise NotImplementedError
+
+	def update_many(self, query: dict, new_values: dict):
+		"""
+		:param new_values: the new values of the modified fields
+		"""
+		raise NotImplementedError
+
+	def bulk_load(self, data: list[dict]):
+		"""
+		Insert data as fast as possible, without counting it, to fill the database between two steps
+		"""
+		self.create_many(data, silent=True)
+
+	def delete_one(self, query: dict):
+		raise NotImplementedError
+
+	def delete_many(self, query: dict):
+		raise NotImplementedError
+
+	def drop_all(self):
+		"""
+		Delete all the data, without measuring it
+		"""
+		raise NotImplementedError
+
+	def begin_transaction(self):
+		raise NotImplementedError
+
+	def commit_transaction(self):
+		"""
+		Commit the open transaction, recording its server time as a "commit" operation
+		"""
+		raise NotImplementedError
+
+	def set_commit_interval(self, commit_interval: int):
+		"""
+		Group the next writes in transactions of commit_interval writes, 0 or 1 to commit each write
+		"""
+		self.flush_writes()
+		self.commit_interval = commit_interval
+
+	def before_write(self):
+		"""
+		Open the transaction of the next writes when the writes are grouped
+		"""
+		if self.commit_interval > 1 and not self.in_transaction:
+			self.begin_transaction()
+			self.in_transaction = True
+
+	def after_write(self):
+		"""
+		Count a write of the open transaction, committed every commit_interval writes
+		"""
+		if not self.in_transaction:
+			return
+		self.pending_writes += 1
+		if self.pending_writes >= self.commit_interval:
+			self.flush_writes()
+
+	def flush_writes(self):
+		"""
+		Commit the open transaction, its client time is recorded as a "commit" operation
+		"""
+		if not self.in_transaction:
+			return
+		self.in_transaction, self.pending_writes = False, 0
+		start_time = time_ns()
+		self.commit_transaction()
+		add_client_operation_time("commit", time_ns() - start_time)
+
+	def drop_indexes(self):
+		raise NotImplementedError
+
+	def apply_index_profile(self, profile: str):
+		"""
+		Drop all indexes and create the ones of the profile
+		"""
+		raise NotImplementedError
+
+	def index_size(self) -> dict:
+		"""
+		:return: {"total": total size in bytes, "indexes": {index name: size in bytes}}
+		"""
+		return {"total": 0, "indexes": {}}
+
+	def storage_size(self) -> dict:
+		"""
+		:return: {"data": size of the data in bytes, "indexes": size of the indexes in bytes, "total": ...}, {} if unknown
+		"""
+		return {}
+
+	def count(self) -> int | None:
+		"""
+		Number of records in the database, without measuring it, None if unknown
+		"""
+		return None
+
+	def metrics_connection(self):
+		"""
+		Connection used by ServerMetricsSampler, None if the backend client is thread safe
+		"""
+		return None
+
+	def server_metrics(self, connection=None) -> dict:
+		"""
+		Sample the server counters
+		"""
+		return {}
+
+	def clear_operation_data(self):
+		"""
+		Clear the times of the operations
+		"""
+		clear_operation_times()
+
+	def close(self):
+		pass
+
+class ServerMetricsSampler(Thread):
+	"""
+	Background thread polling Backend.server_metrics at a fixed interval
+	Samples are timestamped with perf_counter_ns, like operation_timestamps
+	"""
+
+	def __init__(self, backend: Backend, interval: float = 1.0):
+		super().__init__(daemon=True)
+		self.backend	= backend
+		self.interval	= interval
+		self.samples	= []
+		self.marks		= []
+		self.__stop		= Event()
+
+	def run(self):
+		try:
+			connection = self.backend.metrics_connection()
+		except Exception as e:
+			self.backend.logger.error(f"ServerMetricsSampler : connection error {e}")
+			return
+
+		while not self.__stop.is_set():
+			try:
+				sample = self.backend.server_metrics(connection)
+				sample["timestamp_ns"] = time_ns()
+				self.samples.append(sample)
+			except Exception as e:
+				self.backend.logger.error(f"ServerMetricsSampler : {e}")
+			self.__stop.wait(self.interval)
+
+		if connection is not None:
+			connection.close()
+
+	def mark(self, label: str):
+		"""
+		Mark the beginning of a test in the time series
+		"""
+		self.marks.append({"timestamp_ns": time_ns(), "label": label})
+
+	def stop(self):
+		self.__stop.set()
+		self.join(timeout=max(3, 2*self.interval))
+
+
+######### Reprise des exécutions #########
+
+def checkpoint_path(backend: str, test_type: str, test_name: str) -> str:
+	return path.join(checkpoints_dir, backend, test_type, test_name + ".jsonl")
+
+def append_checkpoint(backend: str, test_type: str, test_name: str, record: dict):
+	"""
+	Append a record to the checkpoint of the test, one JSON line written at once
+	"""
+	save_path = checkpoint_path(backend, test_type, test_name)
+	makedirs(path.dirname(save_path), exist_ok=True)
+	with open(save_path, "a") as f:
+		f.write(json.dumps(record, default=str) + "\n")
+
+def load_checkpoint(backend: str, test_type: str, test_name: str) -> list[dict]:
+	"""
+	Records of the checkpoint of the test
+	A line cut by an interruption ends the checkpoint : it is removed from the file
+	"""
+	save_path	= checkpoint_path(backend, test_type, test_name)
+	records		= []
+	if not path.exists(save_path):
+		return records
+	with open(save_path, "r") as f:
+		lines = f.readlines()
+	for line in lines:
+		try:
+			records.append(json.loads(line))
+		except json.JSONDecodeError:
+			break
+	if len(records) < len(lines):
+		with open(save_path, "w") as f:
+			f.writelines(json.dumps(record, default=str) + "\n" for record in records)
+	return records
+
+def clear_checkpoint(backend: str, test_type: str, test_name: str):
+	save_path = checkpoint_path(backend, test_type, test_name)
+	if path.exists(save_path):
+		remove(save_path)
+
+def resume_steps(backend: Backend, plot_name: str, test_name: str, parameters: dict, resume: bool) -> list[dict]:
+	"""
+	Steps already measured by an interrupted run of the sweep with the same parameters if resume,
+	otherwise (or if the parameters differ) the checkpoint of the sweep is started again
+	"""
+	records = load_checkpoint(backend.name, plot_name, test_name) if resume else []
+	if len(records) > 0 and records[0].get("parameters") == parameters:
+		backend.logger.info(f"Resuming {test_name} {plot_name} after step {records[-1].get('step', 'none')}")
+		return records[1:]
+	if len(records) > 0:
+		backend.logger.warning(f"Checkpoint of {test_name} {plot_name} made with other parameters, starting again")
+	clear_checkpoint(backend.name, plot_name, test_name)
+	append_checkpoint(backend.name, plot_name, test_name, {"parameters": parameters})
+	return []
+
+def resume_rows(backend: Backend, expected: int) -> int:
+	"""
+	Check that the database still holds the expected records of the last measured step
+	:return: number of records to start loading from, 0 after emptying the database if they differ
+	"""
+	count = backend.count()
+	if count == expected:
+		return expected
+	backend.logger.warning(f"{count} records in the database instead of {expected}, reloading them")
+	backend.drop_all()
+	return 0
+
+
+def measured(summary) -> bool:
+	"""
+	Whether a step record or a scenario summary holds timings : empty ones are not checkpointed,
+	they come from failed operations (closed client, lost server) and must be run again on resume
+	"""
+	if isinstance(summary, dict):
+		return any(summary.get(timing) for timing in ("server", "client"))
+	return bool(summary)
+
+def step_record(step: int, operations: int) -> dict:
+	"""
+	Times of the operations of a measured step, as saved in the checkpoint of the sweep
+	:param operations: number of counted operations of the step
+	"""
+	return {"step"		: step,
+			"operations": operations,
+			"server"	: {operation: list(times) for operation, times in operation_times.items()},
+			"client"	: {operation: list(times) for operation, times in client_operation_times.items()},
+			"timestamps": {operation: list(operation_timestamps[operation]) for operation in client_operation_times}}
+
+def add_step_record(record: dict, tests_data: dict, tests_client_data: dict, tests_timestamps: dict, step_server_times: list, step_client_times: list, done_steps: list):
+	"""
+	Add the times of a measured or resumed step to the results of the sweep
+	"""
+	for operation, times in record["server"].items():
+		tests_data[operation].extend(times)
+	for operation, times in record["client"].items():
+		tests_client_data[operation].extend(times)
+		tests_timestamps[operation].extend(record["timestamps"].get(operation, []))
+	step_server_times.append(record["server"])
+	step_client_times.append(record["client"])
+	done_steps.append(record["step"])
+
+
+######### Tests de performance #########
+
+def global_test_one(backend: Backend, plot_name: str, nb_data: int = num_records, key_distribution: str = "sequential"):
+	"""
+		Insertion, lecture, mise à jour puis suppression des données une par une
+		:param key_distribution: distribution des identifiants lus et mis à jour (cf key_chooser.py),
+								 "sequential" lit chaque donnée et applique les modifications du fichier des mises à jour
+	"""
+
+	backend.logger.info("Test global one by one " + plot_name)
+
+	if nb_data < 0:
+		raise ValueError("nb_data must be > 0 and <= " + str(num_records))
+
+	# On récupère les données
+	dataset = extract_books_from_file(generated_file,nb_data)
+
+	if len(dataset) < nb_data:
+		backend.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
+
+	nb_data = len(dataset)
+
+	### Tests avec données une par une  ###
+
+	## Test d'insertion de données
+	backend.logger.debug("Test insert one by one : ")
+	for book in dataset:
+		backend.create_one(book)
+
+	# Libérer la mémoire
+	dataset.clear()
+
+	# Les identifiants lus et mis à jour sont tirés avant les mesures
+	read_keys	= choose_keys(key_distribution, nb_data, nb_data)
+	update_keys	= choose_keys(key_distribution, nb_data, nb_data)
+
+	## Test de lecture de données sur la collection "Books", en choississant l'id
+	backend.logger.debug("Test read one by one : ")
+	for key in read_keys:
+		backend.read_one({"id":key},print_result=False)
+
+	## Test de mise à jour de données
+
+	# Chargement des données à modifier
+	updated_dataset = extract_updated_books_from_file(updated_file,nb_data)
+	# note : update_dataset contains the original and modified data
+
+	if key_distribution == "sequential":
+		for original, modified in updated_dataset:
+			if original == modified:
+				backend.logger.error(f"Data are the same : \n\t{original} -> \n\t{modified}")
+				continue
+
+			# On identifie le champ modifié
+			new_values = {}
+			for key in original:
+				if original[key] != modified[key]:
+					new_values = {key: modified[key]}
+					break
+			backend.update_one(original, new_values)
+	else:
+		# Une même donnée peut être modifiée plusieurs fois : on la désigne par son id
+		# et on change à chaque fois le nombre d'exemplaires vendus pour forcer l'écriture
+		for i, key in enumerate(update_keys):
+			backend.update_one({"id":key}, {"copies_sold": i})
+
+	## Test de suppression de données
+	# Hors mode séquentiel, les livres ont été modifiés par id : le document du fichier des mises à jour
+	# ne correspond plus, on supprime donc chaque livre par son id
+	backend.logger.debug("Test delete one by one : ")
+	for _,book in updated_dataset:
+		backend.delete_one(book if key_distribution == "sequential" else {"id": book["id"]})
+
+	summary = {"server": summarize_operation_times(operation_times), "client": summarize_operation_times(client_operation_times)}
+
+	# On enregistre les plans d'exécution capturés et les mesures,
+	# les graphiques sont dessinés ensuite par report.py
+	save_query_plans(backend.name, plot_name, "global_test_one")
+	save_results(backend.name, plot_name, "global_test_one", {	"kind"		: "distribution",
+																"server"	: operation_times,
+																"client"	: client_operation_times,
+																"timestamps": operation_timestamps})
+
+	# On supprime toutes les données de la collection
+	backend.drop_all()
+
+	# On réinitialise les données des opérations
+	backend.clear_operation_data()
+
+	return summary
+
+def global_test_many(backend: Backend, plot_name: str, nb_data: int = num_records, key_distribution: str = "sequential"):
+	"""
+		Insertion, mise à jour, lecture puis suppression des données par lots
+		:param key_distribution: distribution des valeurs de "ran" visées par les mises à jour et les lectures (cf key_chooser.py)
+	"""
+
+	backend.logger.info("Test global many " + plot_name)
+
+	### Tests avec plusieurs données à la fois  ###
+
+	if nb_data  < 0:
+		raise ValueError("nb_data must be > 0 and <= " + str(num_records_per_many))
+
+	# On récupère les données
+	dataset = extract_books_from_file(generated_file,nb_data)
+
+	if len(dataset) < nb_data:
+		backend.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
+
+	nb_data = len(dataset)
+
+	# On envoie à chaque fois num_records_per_many données
+
+	## Test d'insertion de données
+	backend.logger.debug("Test insert many : ")
+	for i in range(0,nb_data,num_records_per_many):
+		backend.create_many(dataset[i:i+num_records_per_many])
+
+	# vide dataset pour libérer la mémoire
+	dataset.clear()
+
+	# Les valeurs de "ran" visées sont tirées avant les mesures
+	update_keys	= choose_keys(key_distribution, num_records_per_many, num_records_per_many)
+	read_keys	= choose_keys(key_distribution, num_records_per_many, num_records_per_many)
+
+	## Test de mise à jour de données
+	backend.logger.debug("Test update many : ")
+	for i, key in enumerate(update_keys):
+		# On met à jour les données avec le champ "ran" qui est entre 0 et num_records_per_many-1
+		backend.update_many({"ran" : key}, {"price" : 5.00, "copies_sold": 100 + i})
+
+	## Test de lecture de données
+	backend.logger.debug("Test read many : ")
+	for key in read_keys:
+		backend.read_many({"ran" : key},print_result=False)
+
+	## Test de suppression de données
+	backend.logger.debug("Test delete many : ")
+	for i in range(0,num_records_per_many):
+		backend.delete_many({"ran" : i})
+
+	summary = {"server": summarize_operation_times(operation_times), "client": summarize_operation_times(client_operation_times)}
+
+	# On enregistre les plans d'exécution capturés et les mesures,
+	# les graphiques sont dessinés ensuite par report.py
+	save_query_plans(backend.name, plot_name, "global_test_many")
+	save_results(backend.name, plot_name, "global_test_many", {	"kind"		: "distribution",
+																"server"	: operation_times,
+																"client"	: client_operation_times,
+																"timestamps": operation_timestamps})
+
+	# On supprime toutes les données de la collection
+	backend.drop_all()
+
+	# On réinitialise les données des opérations
+	backend.clear_operation_data()
+
+	return summary
+
+def geometric_steps(first: int, last: int, per_decade: int = steps_per_decade):
+	"""
+	Steps of a logarithmic sweep from first to last records, per_decade steps per power of ten
+	"""
+	nb_steps = int(round(log10(last/first) * per_decade)) + 1
+	return unique(geomspace(first, last, max(nb_steps, 2)).round().astype(int))
+
+def load_books(backend: Backend, dataset, start: int, stop: int):
+	"""
+	Bulk load the books start to stop of the dataset, by batches of bulk_load_size, without measuring them
+	"""
+	if stop - start > bulk_load_size:
+		backend.logger.info(f"Loading books {start} to {stop}...")
+	pause_recording()
+	try:
+		for i in range(start, stop, bulk_load_size):
+			backend.bulk_load(dataset[i:min(i + bulk_load_size, stop)])
+	finally:
+		resume_recording()
+
+def test_one_various_data(backend: Backend, plot_name: str, steps=arange(0,num_records,num_records/nb_measurements), repetitions: int = step_repetitions, generated: bool = False,
+						  key_distribution: str = "uniform", resume: bool = False):
+	"""
+		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
+		:param repetitions: nombre d'insertions, lectures, mises à jour et suppressions par palier, chacune sur une cible tirée au hasard
+		:param key_distribution: distribution des cibles parmi les données présentes (cf key_chooser.py)
+		:param generated: livres générés à la volée (GeneratedBooks) au lieu de ceux du fichier, pour dépasser sa taille
+		:param resume: reprend après les paliers enregistrés dans le point de reprise d'une exécution interrompue
+	"""
+	global operations_done
+
+	backend.logger.info("Test one by one with various data "+ plot_name)
+
+	# Paliers déjà mesurés par une exécution interrompue
+	parameters	= {"steps": [int(step) for step in steps], "repetitions": repetitions, "generated": generated, "key_distribution": key_distribution}
+	resumed		= resume_steps(backend, plot_name, "test_one_various_data", parameters, resume)
+
+	# On supprime toutes les données de la collection s'il y en a
+	if len(resumed) == 0:
+		backend.drop_all()
+
+	# On extrait toutes les données dont on aura besoin, ou on les génère au fur et à mesure
+	dataset = GeneratedBooks(int(steps[-1])) if generated else extract_books_from_file(generated_file,steps[-1])
+	if len(dataset) < steps[-1]:
+		backend.logger.warning(f"Gathered {len(dataset)} records instead of {steps[-1]}")
+
+	rng					= default_rng(target_seed)
+	tests_data			= defaultdict(list)
+	tests_client_data	= defaultdict(list)
+	tests_timestamps	= defaultdict(list)
+	step_server_times	= []
+	step_client_times	= []
+	done_steps			= []
+
+	# Les paliers repris comptent comme faits, les données de leur dernier palier doivent être dans la base
+	for record in resumed:
+		add_step_record(record, tests_data, tests_client_data, tests_timestamps, step_server_times, step_client_times, done_steps)
+		operations_done += record["operations"]
+	try:
+		a = resume_rows(backend, done_steps[-1]) if len(done_steps) > 0 else 0
+		for step in steps:
+			step = int(step)
+
+			# On arrête si on dépasse le nombre de données disponibles
+			if step > len(dataset):
+				backend.logger.warning(f"Step {step} > {len(dataset)}")
+				break
+
+			if step in done_steps:
+				# Les cibles du palier sont tirées à nouveau pour retrouver celles des paliers suivants
+				choose_keys(key_distribution, 3*repetitions, step + 1, rng)
+				continue
+
+			# On va insérer les données  manquantes pour avoir step données initiales dans la base
+			try:
+				if a < step:
+					load_books(backend, dataset, a, step)
+			except Exception as e:
+				backend.logger.error(f"test_one_various_data : init error {e}")
+			finally:
+				a = step
+
+			# On nettoie les temps des opérations, pour recommencer les mesures
+			backend.clear_operation_data()
+			step_operations = operations_done
+
+			# Cibles de la lecture, de la mise à jour et de la suppression de chaque répétition,
+			# tirées avant les mesures parmi les step + 1 données présentes
+			targets = choose_keys(key_distribution, 3*repetitions, step + 1, rng)
+
+			# On procède au test de performance
+			for repetition in range(repetitions):
+				max_id 			 = step + 1
+				generate_book.id = max_id
+				book = generate_book(max_id)
+
+				# On teste l'insertion
+				backend.create_one(book)
+
+				# Les autres opérations visent chacune un livre tiré parmi les step + 1 présents :
+				# un indice inférieur à step désigne une donnée initiale, step le livre inséré
+				# On teste la lecture
+				index	= targets[3*repetition]
+				target	= dataset[index] if index < step else book
+				backend.read_one({"id":target["id"]})
+
+				# On teste la mise à jour
+				index		= targets[3*repetition + 1]
+				target		= dataset[index] if index < step else book
+				new_book	= modify_book(target)
+				backend.update_one({"id":target["id"]}, {key: value for key, value in new_book.items() if target.get(key) != value})
+				if index < step:
+					dataset[index] = new_book
+				else:
+					book = new_book
+
+				# On teste la suppression
+				index	= targets[3*repetition + 2]
+				target	= dataset[index] if index < step else book
+				backend.delete_one({"id":target["id"]})
+
+				# On revient aux step données initiales, hors mesures
+				if target["id"] != book["id"]:
+					pause_recording()
+					try:
+						backend.create_one(target, silent=True)
+						backend.delete_one({"id":book["id"]})
+					finally:
+						resume_recording()
+
+			# On récupère les temps des opérations, on les enregistre dans le point de reprise
+			# et on ajoute les données dans le tableau
+			record = step_record(step, operations_done - step_operations)
+			if measured(record):
+				append_checkpoint(backend.name, plot_name, "test_one_various_data", record)
+			else:
+				backend.logger.warning(f"test_one_various_data : no timings for step {step}, not checkpointed")
+			add_step_record(record, tests_data, tests_client_data, tests_timestamps, step_server_times, step_client_times, done_steps)
+
+	except Exception as e:
+		backend.logger.error(f"test_one_various_data : operation error -> {e}")
+
+	# On enregistre les plans d'exécution capturés et les mesures,
+	# les graphiques sont dessinés ensuite par report.py
+	save_query_plans(backend.name, plot_name, "test_one_various_data")
+	save_results(backend.name, plot_name, "test_one_various_data", {	"kind"			: "steps",
+																		"steps"			: done_steps,
+																		"repetitions"	: repetitions,
+																		"server"		: tests_data,
+																		"client"		: tests_client_data,
+																		"bands"			: {"server": step_bands(step_server_times), "client": step_bands(step_client_times)},
+																		"timestamps"	: tests_timestamps})
+
+	# On supprime toutes les données de la collection
+	backend.drop_all()
+
+	return {"server": summarize_operation_times(tests_data), "client": summarize_operation_times(tests_client_data)}
+
+def test_many_various_data(backend: Backend, plot_name: str, steps=arange(0,num_records,num_records/nb_measurements), repetitions: int = step_repetitions, generated: bool = False,
+						   resume: bool = False):
+	"""
+		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
+		:param repetitions: nombre de séries insertion, lecture, mise à jour et suppression de num_records_per_many données par palier
+		:param generated: livres générés à la volée (GeneratedBooks) au lieu de ceux du fichier, pour dépasser sa taille
+		:param resume: reprend après les paliers enregistrés dans le point de reprise d'une exécution interrompue
+	"""
+	global operations_done
+
+	backend.logger.info("Test many with various data " + plot_name)
+
+	# Paliers déjà mesurés par une exécution interrompue
+	parameters	= {"steps": [int(step) for step in steps], "repetitions": repetitions, "generated": generated, "records_per_many": num_records_per_many}
+	resumed		= resume_steps(backend, plot_name, "test_many_various_data", parameters, resume)
+
+	# On supprime toutes les données de la collection s'il y en a
+	if len(resumed) == 0:
+		backend.drop_all()
+
+	# On extrait toutes les données dont on aura besoin, ou on les génère au fur et à mesure
+	dataset = GeneratedBooks(int(steps[-1])) if generated else extract_books_from_file(generated_file,steps[-1])
+	if len(dataset) < steps[-1]:
+		backend.logger.warning(f"Gathered {len(dataset)} records instead of {steps[-1]}")
+
+	tests_data			= defaultdict(list)
+	tests_client_data	= defaultdict(list)
+	tests_timestamps	= defaultdict(list)
+	step_server_times	= []
+	step_client_times	= []
+	done_steps			= []
+
+	# Les paliers repris comptent comme faits, les données de leur dernier palier doivent être dans la base
+	for record in resumed:
+		add_step_record(record, tests_data, tests_client_data, tests_timestamps, step_server_times, step_client_times, done_steps)
+		operations_done += record["operations"]
+	try:
+		a = resume_rows(backend, done_steps[-1]) if len(done_steps) > 0 else 0
+		for step in steps:
+			step = int(step)
+
+			# On arrête si on dépasse le nombre de données disponibles
+			if step > len(dataset):
+				backend.logger.warning(f"Step {step} > {len(dataset)}")
+				break
+
+			if step in done_steps:
+				continue
+
+			# On va insérer les données  manquantes pour avoir step données initiales dans la base
+			try:
+				if a < step:
+					load_books(backend, dataset, a, step)
+			except Exception as e:
+				backend.logger.error(f"test_many_various_data : init error {e}")
+			finally:
+				a = step
+
+			# On nettoie les temps des opérations, pour prendre les mesures
+			backend.clear_operation_data()
+			step_operations = operations_done
+
+			## On procède au test de performance
+			# Chaque répétition porte sur un nouveau lot de livres générés aléatoirement :
+			# les filtres doivent désigner exactement les num_records_per_many données du lot
+			for _ in range(repetitions):
+				# Génère les données à insérer
+				max_id			 = step + 1
+				generate_book.id = max_id
+				books = [generate_book(max_id + i) for i in range(0,num_records_per_many)]
+
+				# Modifie le prix à 0 pour la suppression/lecture exacte de num_records_per_many données
+				# en effet un prix à 0 est impossible pour un livre, ce seront donc les données à supprimer
+				for book in books:
+					book["price"] = 0.0
+
+				# On teste l'insertion
+				backend.create_many(books)
+
+				# On teste la lecture
+				backend.read_many({"price":0.0})
+
+				# On teste la mise à jour
+				backend.update_many({"price":0.0}, {"genre": "updated"})
+
+				# On teste la suppression
+				backend.delete_many({"price":0.0})
+
+				# Après ces opérations, on est revenu à l'état initial
+				# On a juste les données ajoutées initialement dans la base avant les tests
+
+			# On récupère les temps des opérations, on les enregistre dans le point de reprise
+			# et on ajoute les données dans le tableau
+			record = step_record(step, operations_done - step_operations)
+			if measured(record):
+				append_checkpoint(backend.name, plot_name, "test_many_various_data", record)
+			else:
+				backend.logger.warning(f"test_many_various_data : no timings for step {step}, not checkpointed")
+			add_step_record(record, tests_data, tests_client_data, tests_timestamps, step_server_times, step_client_times, done_steps)
+
+	except Exception as e:
+		backend.logger.error(f"test_many_various_data : operation error -> {e}")
+
+	# On enregistre les plans d'exécution capturés et les mesures,
+	# les graphiques sont dessinés ensuite par report.py
+	save_query_plans(backend.name, plot_name, "test_many_various_data")
+	save_results(backend.name, plot_name, "test_many_various_data", {	"kind"			: "steps",
+																		"steps"			: done_steps,
+																		"repetitions"	: repetitions,
+																		"server"		: tests_data,
+																		"client"		: tests_client_data,
+																		"bands"			: {"server": step_bands(step_server_times), "client": step_bands(step_client_times)},
+																		"timestamps"	: tests_timestamps})
+
+	# On supprime toutes les données de la collection
+	backend.drop_all()
+
+	return {"server": summarize_operation_times(tests_data), "client": summarize_operation_times(tests_client_data)}
+
+
+######### Mise en route et répétitions #########
+
+def coefficient_of_variation(times) -> float:
+	"""
+	Standard deviation / mean of the times
+	"""
+	mean = np_mean(times)
+	return float(np_std(times)/mean) if mean > 0 else 0.
+
+def warm_up(backend: Backend, operations: int = 0, max_cv: float = 0., window: int = steady_state_window, max_operations: int = max_warmup_operations) -> dict:
+	"""
+	Run unmeasured insert / read / delete cycles on the warm-up book before a scenario
+	:param operations: minimal number of cycles
+	:param max_cv: if > 0, continue until the coefficient of variation of the last window cycles is below max_cv
+	:return: {"operations": cycles run, "cv": last coefficient of variation, "steady": steady state reached}
+	"""
+	if operations <= 0 and max_cv <= 0:
+		return {"operations": 0, "cv": None, "steady": False}
+
+	limit	= max(operations, max_operations) if max_cv > 0 else operations
+	times	= []
+	cv		= None
+	steady	= False
+
+	# Pas de capture des plans sur le livre de mise en route : chaque forme n'est capturée qu'une fois,
+	# celle des scénarios doit l'être sur leurs données
+	capture_plans, backend.capture_plans = backend.capture_plans, False
+	pause_recording()
+	try:
+		for i in range(limit):
+			# Identifiants négatifs : ils ne rencontrent jamais les données des scénarios
+			book = dict(warmup_book, id=-1-i)
+			start_time = time_ns()
+			backend.create_one(book, silent=True)
+			backend.read_one({"id": book["id"]}, print_result=False)
+			backend.delete_one({"id": book["id"]})
+			times.append(time_ns() - start_time)
+
+			if len(times) >= window:
+				cv		= coefficient_of_variation(times[-window:])
+				steady	= max_cv > 0 and cv <= max_cv
+			if len(times) >= operations and (max_cv <= 0 or steady):
+				break
+	except Exception as e:
+		backend.logger.error(f"warm_up : {e}")
+	finally:
+		# La transaction ouverte par la mise en route ne doit pas être validée pendant les mesures
+		try:
+			backend.flush_writes()
+		except Exception as e:
+			backend.logger.error(f"warm_up : commit error {e}")
+		backend.capture_plans = capture_plans
+		resume_recording()
+		backend.clear_operation_data()
+
+	if max_cv > 0 and not steady:
+		backend.logger.warning(f"warm_up : no steady state after {len(times)} cycles (cv {cv})")
+	backend.logger.info(f"warm_up : {len(times)} cycles, cv {cv}")
+	return {"operations": len(times), "cv": cv, "steady": steady}
+
+def confidence_interval(values: list[float]) -> tuple[float, float, float]:
+	"""
+	Mean of values and its 95 % Student confidence interval
+	:return: (mean, low, high)
+	"""
+	mean = float(np_mean(values))
+	if len(values) < 2:
+		return mean, mean, mean
+	degrees		= len(values) - 1
+	t			= student_t_95[max(df for df in student_t_95 if df <= degrees)]
+	half_width	= t * float(np_std(values, ddof=1)) / len(values)**0.5
+	return mean, mean - half_width, mean + half_width
+
+def aggregate_trials(summaries: list):
+	"""
+	Summary of repeated trials of a scenario, with the mean of the medians of each trial,
+	and the medians, mean and confidence interval of each operation
+	:return: (summary, details)
+	"""
+	summaries = [summary for summary in summaries if summary is not None]
+	if len(summaries) == 0:
+		return None, {}
+
+	# test_read_tuning de mongodb.py renvoie une mesure par configuration de lecture
+	if isinstance(summaries[0], list):
+		summary, details = [], {}
+		for result in summaries[0]:
+			trials	= [next((r for r in trial if r["label"] == result["label"]), None) for trial in summaries]
+			trials	= [trial for trial in trials if trial is not None]
+			result	= dict(result)
+			details[result["label"]] = {}
+			for timing in ("server", "client"):
+				medians = [trial[f"{timing}_median"] for trial in trials]
+				mean, low, high = confidence_interval(medians)
+				result[f"{timing}_median"] = mean
+				details[result["label"]][timing] = {"medians": medians, "mean": mean, "ci": [low, high]}
+			summary.append(result)
+		return summary, details
+
+	summary, details = {}, {}
+	for timing in ("server", "client"):
+		summary[timing], details[timing] = {}, {}
+		for operation in summaries[0].get(timing, {}):
+			medians = [trial[timing][operation] for trial in summaries if operation in trial.get(timing, {})]
+			mean, low, high = confidence_interval(medians)
+			summary[timing][operation] = mean
+			details[timing][operation] = {"medians": medians, "mean": mean, "ci": [low, high]}
+	return summary, details
+
+
+######### Profils d'index #########
+
+def index_profile_suffix(profile: str) -> str:
+	"""
+	Suffix added to the test name for an index profile
+	"""
+	if profile == "none":
+		return ""
+	# On garde le nom historique pour les index simples
+	if profile == "single":
+		return "_indexed"
+	return f"_{profile}"
+
+def measure_index_size(backend: Backend, nb_data: int = num_records) -> dict:
+	"""
+	Size of the indexes of the current profile once the dataset is loaded
+	"""
+
+	backend.drop_all()
+	dataset = extract_books_from_file(generated_file,nb_data)
+	for i in range(0,len(dataset),1000):
+		backend.create_many(dataset[i:i+1000],silent=True)
+	dataset.clear()
+
+	sizes	= backend.index_size()
+	storage	= backend.storage_size()
+	if storage:
+		sizes["storage"] = storage
+
+	backend.drop_all()
+	backend.clear_operation_data()
+	return sizes
+
+def trial_suffix(trial: int) -> str:
+	"""
+	Suffix of the results directory of a repeated trial, the first trial has none
+	"""
+	return f"_trial{trial}" if trial > 1 else ""
+
+def commit_suffix(backend: Backend) -> str:
+	"""
+	Suffix of the results directory when the writes are grouped in transactions
+	"""
+	return f"_commit{backend.commit_interval}" if backend.commit_interval > 1 else ""
+
+def test_indexed(backend: Backend, plot_name: str, test_function, profile: str = "single", warmup: dict | None = None, trial: int = 1, **kwargs):
+	# On crée les index du profil
+	backend.apply_index_profile(profile)
+
+	# Mise en route non mesurée, une fois les index créés
+	if warmup:
+		warm_up(backend, **warmup)
+
+	# on va faire les mêmes tests que précédemment
+	return test_function(backend,plot_name+index_profile_suffix(profile)+trial_suffix(trial),**kwargs)
+
+def variants_report(runs: dict) -> dict:
+	"""
+	Sizes and median times of the same scenarios run on several variants of a backend (schemas, engines, ...)
+	:param runs: {variant: what run_tests returned}
+	:return: {variant: {index profile: {"sizes": ..., "scenarios": {scenario: summary}}}}
+	"""
+	report = {}
+	for variant, run in runs.items():
+		if run is None:
+			continue
+		report[variant] = {	profile: {"sizes": run["sizes"].get(profile, {}), "scenarios": scenarios}
+							for profile, scenarios in run["summaries"].items() }
+	return report
+
+def index_profiles_report(summaries: dict, sizes: dict) -> dict:
+	"""
+	Write amplification (write time / write time without index) and
+	read speedup (read time without index / read time) of each profile, per scenario
+	"""
+	if len(summaries) == 0:
+		return {}
+
+	# Les ratios sont calculés par rapport au profil sans index, ou à défaut au premier profil testé
+	baseline = "none" if "none" in summaries else next(iter(summaries))
+
+	report = {"baseline": baseline, "profiles": {}}
+	for profile, scenarios in summaries.items():
+		profile_report = {"index_size": sizes.get(profile, {}), "scenarios": {}}
+		for scenario, summary in scenarios.items():
+			reference = summaries[baseline].get(scenario)
+			if summary is None or reference is None:
+				continue
+
+			# Les scénarios de réglage renvoient une mesure par configuration (cf test_read_tuning de mongodb.py)
+			if isinstance(summary, list):
+				references = {result["label"]: result for result in reference}
+				profile_report["scenarios"][scenario] = {	result["label"]: {	timing: {"read_speedup": references[result["label"]][f"{timing}_median"]/result[f"{timing}_median"]}
+																				for timing in ("server", "client") if result[f"{timing}_median"] > 0 }
+															for result in summary if result["label"] in references }
+				continue
+
+			scenario_report = {}
+			for timing in ("server", "client"):
+				medians		= summary.get(timing, {})
+				references	= reference.get(timing, {})
+				write_amplification = {	operation: medians[operation]/references[operation]
+										for operation in ("insert", "update", "delete")
+										if operation in medians and references.get(operation) }
+				read_speedup = references["find"]/medians["find"] if medians.get("find") and "find" in references else None
+				scenario_report[timing] = {"write_amplification": write_amplification, "read_speedup": read_speedup}
+			profile_report["scenarios"][scenario] = scenario_report
+		report["profiles"][profile] = profile_report
+
+	return report
+
+def run_tests(backend: Backend, type_test: str, steps=arange(0,num_records,num_records/nb_measurements), profiles: list[str] = ["none", "single"],
+			  metrics_interval: float = 0, extra_scenarios: list[tuple] = [], warmup_operations: int = 0, steady_cv: float = 0., trials: int = 1,
+			  repetitions: int = step_repetitions, generated: bool = False, key_distribution: str | None = None, profiler: str | None = None,
+			  memory: str | None = None, resume: bool = False):
+	"""
+	Run every scenario for each index profile
+	:return: {"summaries": {profile: {scenario: summary}}, "sizes": {profile: sizes}}
+	:param extra_scenarios: (name, test function, kwargs) scenarios specific to the backend
+	:param warmup_operations: unmeasured cycles run before each scenario
+	:param steady_cv: if > 0, the warm-up continues until the coefficient of variation of the cycles is below steady_cv
+	:param trials: number of passes of each scenario, the summaries are the mean over the trials
+	:param repetitions: operations per step of the various data scenarios, each on a random target
+	:param generated: the various data scenarios generate their books on the fly instead of reading the dataset file
+	:param key_distribution: distribution of the keys read and updated by the scenarios (cf key_chooser.py), None for their default
+	:param profiler: profiler of each scenario among profilers, saved in profiles/<backend>/<mode>/<scenario>.*, None to disable
+	:param memory: memory tracking of each scenario among memory_modes, saved in results/<backend>/<mode>/memory.json, None to disable
+	:param resume: skip the scenarios and the steps already done by an interrupted run, recorded in checkpoints/<backend>/<mode>/
+	"""
+	global operations_done
+
+	if backend is None:
+		raise ValueError("Backend instance is None")
+
+	# Échantillonnage des métriques serveur pendant les tests
+	sampler = None
+	if metrics_interval > 0:
+		sampler = ServerMetricsSampler(backend, metrics_interval)
+		sampler.start()
+
+	# Supprimer les index si existants
+	backend.drop_indexes()
+
+	backend.logger.info(f"Running tests for {type_test}...")
+
+	keys		= {} if key_distribution is None else {"key_distribution": key_distribution}
+	scenarios	= [	("global_one",		global_test_one,		keys),
+					("global_many",		global_test_many,		keys),
+					("various_one",		test_one_various_data,	{"steps": steps, "repetitions": repetitions, "generated": generated, "resume": resume, **keys}),
+					("various_many",	test_many_various_data,	{"steps": steps, "repetitions": repetitions, "generated": generated, "resume": resume})
+				  ] + extra_scenarios
+
+	warmup	= {"operations": warmup_operations, "max_cv": steady_cv}
+	trials	= max(1, trials)
+
+	# Tailles des index et scénarios déjà faits par une exécution interrompue
+	if not resume:
+		clear_checkpoint(backend.name, type_test, "scenarios")
+	done_sizes	= {}
+	done		= {}
+	for record in load_checkpoint(backend.name, type_test, "scenarios"):
+		if "sizes" in record:
+			done_sizes[record["profile"]] = record["sizes"]
+		else:
+			done[(record["profile"], record["scenario"], record["trial"])] = record
+
+	summaries		= {}
+	trials_report	= {}
+	memory_report	= {}
+	sizes			= {}
+	for profile in profiles:
+		suffix					= index_profile_suffix(profile)
+		summaries[profile]		= {}
+		trials_report[profile]	= {}
+		memory_report[profile]	= {}
+
+		try:
+			if profile in done_sizes:
+				sizes[profile] = done_sizes[profile]
+			else:
+				change_progression_text("Measuring index size for "+type_test + suffix + "...")
+				backend.apply_index_profile(profile)
+				sizes[profile] = measure_index_size(backend)
+				append_checkpoint(backend.name, type_test, "scenarios", {"profile": profile, "sizes": sizes[profile]})
+		except Exception as e:
+			backend.logger.error(f"Error measuring index size of profile {profile} : {e}")
+
+		for name, test_function, kwargs in scenarios:
+			trial_summaries = []
+			memory_report[profile][name] = []
+			for trial in range(1, trials+1):
+				# Scénario déjà fait : on reprend son résumé, ses résultats sont déjà enregistrés
+				record = done.get((profile, name, trial))
+				if record is not None:
+					backend.logger.info(f"Resuming : {name}{suffix}{trial_suffix(trial)} already done")
+					trial_summaries.append(record["summary"])
+					if record.get("memory"):
+						memory_report[profile][name].append(record["memory"])
+					operations_done += record["operations"]
+					continue
+
+				trial_memory = {}
+				try:
+					change_progression_text("Running "+type_test + "_" + name + suffix + trial_suffix(trial) + "...")
+					if sampler is not None:
+						sampler.mark(type_test + suffix + trial_suffix(trial) + "/" + test_function.__name__)
+					# Un scénario interrompu sans point de reprise recommence sur une base vide
+					plot_name = type_test + suffix + trial_suffix(trial)
+					if resume and not path.exists(checkpoint_path(backend.name, plot_name, test_function.__name__)):
+						backend.drop_all()
+					scenario_operations	= operations_done
+					profile_path		= path.join(profiles_dir, backend.name, plot_name, name)
+					trial_summaries.append(memory_tracked_call(memory, trial_memory, profiled_call, profiler, profile_path, test_indexed, backend, type_test, test_function,
+															   profile=profile, warmup=warmup, trial=trial, **kwargs))
+					if measured(trial_summaries[-1]):
+						append_checkpoint(backend.name, type_test, "scenarios", {"profile": profile, "scenario": name, "trial": trial, "summary": trial_summaries[-1],
+																				 "memory": trial_memory, "operations": operations_done - scenario_operations})
+					else:
+						backend.logger.warning(f"{name}{suffix}{trial_suffix(trial)} : no timings, not checkpointed")
+				except Exception as e:
+					backend.logger.error(f"Error with {test_function.__name__}{suffix}{trial_suffix(trial)} : {e}")
+				if trial_memory:
+					memory_report[profile][name].append(trial_memory)
+					backend.logger.info(f"Memory of {name}{suffix}{trial_suffix(trial)} : peak RSS {trial_memory['rss_peak']/2**20:.1f} MiB"\
+										+ (f", traced peak {trial_memory['traced_peak']/2**20:.1f} MiB" if "traced_peak" in trial_memory else ""))
+
+			# Moyenne des médianes des essais et intervalle de confiance
+			summaries[profile][name], trials_report[profile][name] = aggregate_trials(trial_summaries)
+
+	if sampler is not None:
+		sampler.stop()
+		save_results(backend.name, type_test, "server_metrics", {"interval": metrics_interval, "samples": sampler.samples, "marks": sampler.marks})
+
+	if memory is not None:
+		peaks = [trial["rss_peak"] for scenarios in memory_report.values() for trials_memory in scenarios.values() for trial in trials_memory]
+		save_results(backend.name, type_test, "memory", {"mode": memory, "interval": memory_interval, "rss_peak": max(peaks, default=0), "profiles": memory_report})
+
+	if trials > 1:
+		save_results(backend.name, type_test, "trials", {"trials": trials, "confidence": 0.95, "profiles": trials_report})
+		for profile, scenarios in trials_report.items():
+			for scenario, details in scenarios.items():
+				for timing, operations in details.items():
+					for operation, trial in operations.items():
+						backend.logger.info(f"{profile} {scenario} {timing} {operation} : {trial['mean']:.1f} µs [{trial['ci'][0]:.1f}, {trial['ci'][1]:.1f}]")
+
+	# Rapport amplification d'écriture / accélération des lectures par profil d'index
+	try:
+		report = index_profiles_report(summaries, sizes)
+		save_results(backend.name, type_test, "index_profiles", report)
+		for profile, profile_report in report.get("profiles", {}).items():
+			backend.logger.info(f"Index profile {profile} : index size {profile_report['index_size'].get('total', 0)} bytes")
+			for scenario, scenario_report in profile_report["scenarios"].items():
+				backend.logger.info(f"\t {scenario} : {scenario_report.get('client', scenario_report)}")
+	except Exception as e:
+		backend.logger.error(f"Error with index profiles report : {e}")
+
+	backend.logger.info(f"Tests for {type_test} done !")
+	return {"summaries": summaries, "sizes": sizes}
+
+def total_operations(nb_profiles: int, nb_steps: int, trials: int = 1, repetitions: int = step_repetitions) -> int:
+	"""
+	Number of counted operations of run_tests for one configuration, for the progression bar
+	The warm-up operations are not counted
+	"""
+	# un passage par profil d'index, 4 opérations par répétition d'un palier ou par donnée
+	total_test_various_one	= nb_profiles * 4 * nb_steps * repetitions
+	total_test_various_many	= nb_profiles * 4 * nb_steps * repetitions
+	total_test_one			= nb_profiles * 4 * num_records
+	#	num_records/num_records_per_many insertion de num_records_per_many données
+	#	num_records_per_many CRUD operations
+	total_test_many			= nb_profiles * ( num_records/num_records_per_many + 3 * num_records_per_many)
+	return int(total_test_various_one + total_test_various_many + total_test_one + total_test_many) * max(1, trials)
+
+
+######### Progression et informations système #########
+
+def print_system_info():
+	"""
+	Display system information
+	"""
+	global system_info
+	if system_info == "":
+		system_info = f"Python : {python_version()}\nSystem : {system()} {release()}\nMachine : {machine()} {architecture()[0]}\nCPU : {get_cpu_info()['brand_raw']} - {cpu_count(logical=False)} cores - {cpu_count(logical=True)} threads\nRAM : {int(virtual_memory().total/1024**3)} Go"
+	print(system_info)
+
+def count_operation():
+	"""
+	Count a done operation for the progression bar
+	Only the thread running the tests counts, the progression thread reads the counter on a timer :
+	no lock nor event in the measured operations
+	"""
+	global operations_done
+	if recording_paused:
+		return
+	operations_done += 1
+
+def change_progression_text(text:str):
+	"""
+	Change the text of the progression bar, displayed at the next refresh
+	"""
+	print_progress.text = text
+
+def print_progress(total,text="Running tests..."):
+	"""
+	Display the progression, sampling the operation counter every progress_interval seconds
+	"""
+	print_progress.run = True
+	progress_stop.clear()
+
+	with alive_bar(total=total,manual=True) as bar:
+		bar.text(text)
+
+		while operations_done < total and print_progress.run:
+			bar(min(operations_done/total, 1.))
+			bar.text(print_progress.text)
+			progress_stop.wait(progress_interval)
+
+		bar(1.)
+		bar.text("Operations done !")
+print_progress.run		= True
+print_progress.text		="Running tests..."
+
+def stop_progress(progress_T: Thread | None):
+	"""
+	Stop the progression thread and wait for it, nothing to do without progression (--quiet)
+	"""
+	if progress_T is None:
+		return
+	print_progress.run = False
+	progress_stop.set()
+	progress_T.join(timeout=3)
+
+def clean_exit(progress_T: Thread, clients: list[Backend | None] | None = None):
+	"""
+		Ferme les clients, arrête le thread de progression et termine le processus (SIGINT / SIGTERM)
+		Les scénarios en cours ne doivent pas continuer sur des clients fermés : leurs paliers
+		seraient enregistrés sans mesures dans les points de reprise
+	"""
+	if clients is not None:
+		for client in clients:
+			if client is not None:
+				client.close()
+
+	# On arrête le thread
+	stop_progress(progress_T)
+	print("Tests interrupted")
+	exit(1)
@@ -1,4 +1,5 @@
 rm -r -f plots/*
+rm -r -f results/*
 echo "" > logs/mongodb.log
 echo "" > logs/mongodb-tests.log
 echo "" > logs/mysql.log
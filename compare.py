@@ -0,0 +1,187 @@
+# Rapport de comparaison entre SGBD et topologies
+# On charge les résultats de results/<SGBD>/<mode>/ pour tous les SGBD et tous les modes
+# (standalone, replica_set, sharding et leurs variantes indexées), puis on superpose
+# les courbes de latence, on compare les débits et on regroupe les percentiles dans une page HTML
+
+from os import makedirs, path, listdir
+from html import escape
+
+# for arg parsing
+from argparse import ArgumentParser
+
+#  For statistics
+from numpy import array, percentile
+
+from report import load_results, save_figure, plot_step_bands, set_steps_scale
+import matplotlib.pyplot as plt
+
+
+# Topologies connues, le reste du nom du mode est la variante d'index (ex : "_indexed")
+topologies		= ["standalone", "replica_set", "sharding"]
+operations		= ["insert", "find", "update", "delete"]
+percentiles		= [50, 90, 99, 99.9]
+
+
+def split_mode(mode: str) -> tuple[str, str]:
+	"""
+	Split a results directory name into its topology and its index variant
+	"""
+	for topology in topologies:
+		if mode.startswith(topology):
+			return topology, mode[len(topology):]
+	return mode, ""
+
+def load_all_results(results_dir: str = "results") -> dict:
+	"""
+	Load the results of every backend and topology
+	:return: {(test name, index variant): {"<backend> <topology>": results}}
+	"""
+	tests = {}
+	if not path.isdir(results_dir):
+		return tests
+
+	for backend in sorted(listdir(results_dir)):
+		if not path.isdir(path.join(results_dir, backend)):
+			continue
+		for mode in sorted(listdir(path.join(results_dir, backend))):
+			mode_dir = path.join(results_dir, backend, mode)
+			if not path.isdir(mode_dir):
+				continue
+			topology, variant = split_mode(mode)
+			for file in sorted(listdir(mode_dir)):
+				if not file.endswith(".json"):
+					continue
+				results = load_results(path.join(mode_dir, file))
+				# On ne compare que les scénarios qui enregistrent des temps par opération
+				if results.get("kind") not in ("distribution", "steps"):
+					continue
+				tests.setdefault((file[:-len(".json")], variant), {})[f"{backend} {topology}"] = results
+	return tests
+
+def plot_latency_curves(series: dict, timing: str, title: str, save_path: str) -> bool:
+	"""
+	Overlay the latency-vs-size curves of every backend and topology, one subplot per operation
+	:param series: {label: results of a "steps" test}
+	"""
+	fig, axes	= plt.subplots(2, 2, figsize=(14, 9))
+	axes		= axes.flatten()
+	drawn		= False
+	for ax, operation in zip(axes, operations):
+		for label, results in series.items():
+			# Médiane de chaque palier quand plusieurs opérations sont mesurées par palier
+			bands = results.get("bands", {}).get(timing, {}).get(operation)
+			if bands:
+				plot_step_bands(ax, results.get("steps", []), bands, label)
+				drawn = True
+				continue
+			times = results.get(timing, {}).get(operation, [])
+			steps = results.get("steps", [])[:len(times)]
+			if len(steps) == 0:
+				continue
+			ax.plot(steps, times[:len(steps)], label=label)
+			drawn = True
+		set_steps_scale(ax, next((results["steps"] for results in series.values() if results.get("steps")), []))
+		ax.set_title(f"{operation} : temps {timing} par quantité de données initiales")
+		ax.set_xlabel("Données dans la base de données")
+		ax.set_ylabel("Temps (µs)")
+		ax.legend(loc='best', fontsize='small')
+
+	fig.suptitle(title)
+	plt.tight_layout()
+	if not drawn:
+		plt.close()
+		return False
+	save_figure(save_path)
+	return True
+
+def throughput(times: list) -> float:
+	"""
+	Operations per second of a sequential client, from the operation times (µs)
+	"""
+	return len(times) * 1e6 / sum(times) if len(times) > 0 and sum(times) > 0 else 0.
+
+def plot_throughput(series: dict, timing: str, title: str, save_path: str) -> bool:
+	"""
+	Throughput bars of each operation, one bar per backend and topology
+	"""
+	labels	= list(series)
+	width	= 0.8 / max(len(labels), 1)
+	fig, ax	= plt.subplots(figsize=(max(10, len(labels)*1.5), 6))
+	drawn	= False
+	for i, label in enumerate(labels):
+		values = [throughput(series[label].get(timing, {}).get(operation, [])) for operation in operations]
+		if any(values):
+			drawn = True
+		ax.bar(array(range(len(operations))) + i*width - 0.4 + width/2, values, width, label=label)
+
+	ax.set_xticks(range(len(operations)), operations)
+	ax.set_ylabel("Opérations par seconde")
+	ax.set_title(title)
+	ax.legend(loc='best', fontsize='small')
+	plt.tight_layout()
+	if not drawn:
+		plt.close()
+		return False
+	save_figure(save_path)
+	return True
+
+def percentile_table(series: dict, timing: str) -> str:
+	"""
+	HTML table of the percentiles (µs) and throughput of each operation, per backend and topology
+	"""
+	header = "".join(f"<th>p{p:g}</th>" for p in percentiles)
+	rows = []
+	for operation in operations:
+		for label, results in series.items():
+			times = results.get(timing, {}).get(operation, [])
+			if len(times) == 0:
+				continue
+			cells = "".join(f"<td>{value:.1f}</td>" for value in percentile(times, percentiles))
+			rows.append(f"<tr><td>{escape(operation)}</td><td>{escape(label)}</td><td>{len(times)}</td>{cells}<td>{throughput(times):.0f}</td></tr>")
+	if len(rows) == 0:
+		return ""
+	return	f"<table><tr><th>Opération</th><th>SGBD / topologie</th><th>Mesures</th>{header}<th>Opérations/s</th></tr>\n" +\
+			"\n".join(rows) + "\n</table>"
+
+def build_report(results_dir: str = "results", output_dir: str = "plots/comparison", timing: str = "client") -> str:
+	"""
+	Write the comparison figures and the HTML page gathering them
+	:param timing: "client" or "server" times
+	:return: the path of the HTML page
+	"""
+	tests = load_all_results(results_dir)
+	makedirs(output_dir, exist_ok=True)
+
+	sections = []
+	for (test_name, variant), series in sorted(tests.items()):
+		name	= test_name + variant
+		title	= f"{test_name} {variant.strip('_') or 'sans index'} ({timing})"
+		content	= [f"<h2>{escape(title)}</h2>", f"<p>{escape(', '.join(series))}</p>"]
+
+		if any(results["kind"] == "steps" for results in series.values()):
+			if plot_latency_curves(series, timing, title, path.join(output_dir, f"{name}_latency.png")):
+				content.append(f'<img src="{escape(name)}_latency.png">')
+		if plot_throughput(series, timing, title, path.join(output_dir, f"{name}_throughput.png")):
+			content.append(f'<img src="{escape(name)}_throughput.png">')
+		content.append(percentile_table(series, timing))
+		sections.append("\n".join(content))
+
+	save_path = path.join(output_dir, "index.html")
+	with open(save_path, "w", encoding="utf8") as f:
+		f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Comparaison MongoDB / MySQL</title>\n"\
+				"<style>body{font-family:sans-serif} table{border-collapse:collapse} td,th{border:1px solid #999;padding:2px 6px;text-align:right} img{max-width:100%}</style>\n"\
+				"</head><body>\n<h1>Comparaison des SGBD et des topologies</h1>\n")
+		f.write("\n".join(sections) if sections else "<p>Aucun résultat</p>")
+		f.write("\n</body></html>\n")
+	return save_path
+
+
+if __name__ == "__main__":
+
+	parser = ArgumentParser(description="Compare the saved results of every backend and topology")
+	parser.add_argument("--results",	help="Directory of the results",				default="results")
+	parser.add_argument("--output",		help="Directory of the comparison report",	default="plots/comparison")
+	parser.add_argument("--timing",		help="Times to compare",						choices=["client", "server"], default="client")
+	args = parser.parse_args()
+
+	print(f"Comparison report : {build_report(args.results, args.output, args.timing)}")
@@ -6,6 +6,7 @@ from os import getenv
 from dotenv import load_dotenv
 from dataclasses import dataclass
 from alive_progress import alive_bar
+from numpy import arange, asarray, uint64, datetime64, errstate
 
 """
 Collection/Table "Books" :
@@ -220,6 +221,97 @@ def modify_book(book:dict) -> dict:
 
 	return new_book
 
+# Vocabulaire des livres générés à la volée (GeneratedBooks)
+title_words		= [	"nuit", "mer", "jardin", "secret", "voyage", "ombre", "lumière", "maison", "hiver", "rivière",
+					"silence", "mémoire", "étoile", "chemin", "feu", "vent", "promesse", "histoire", "temps", "ville",
+					"dernier", "grand", "petit", "rouge", "oublié", "perdu", "noir", "blanc", "lointain", "sauvage" ]
+first_names		= [	"Alice", "Louis", "Camille", "Hugo", "Léa", "Jules", "Manon", "Gabriel", "Chloé", "Arthur",
+					"Inès", "Paul", "Zoé", "Lucas", "Emma", "Nathan", "Jeanne", "Victor", "Sarah", "Adam" ]
+last_names		= [	"Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+					"Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier" ]
+first_date		= datetime64("1775-01-01")
+date_range_days	= 250 * 365
+
+def mix_ids(values, salt: int):
+	"""
+		SplitMix64 hash of each value, vectorized
+		__param values: uint64 array
+		__param salt: distinguishes the fields drawn from the same id
+		__return: uint64 array
+	"""
+	with errstate(over="ignore"):
+		z = values * uint64(64) + uint64(salt) + uint64(0x9E3779B97F4A7C15)
+		z = (z ^ (z >> uint64(30))) * uint64(0xBF58476D1CE4E5B9)
+		z = (z ^ (z >> uint64(27))) * uint64(0x94D049BB133111EB)
+		return z ^ (z >> uint64(31))
+
+class GeneratedBooks:
+	"""
+		Books generated on the fly from their id, without dataset file
+		The book of an id is always the same: the books can be regenerated instead of kept in memory.
+		Indexes work like those of the list read by extract_books_from_file (book i has id i),
+		assigned books replace the generated ones
+	"""
+
+	def __init__(self, size: int, seed: int = seed_generation):
+		self.size		= size
+		self.seed		= seed
+		self.modified	= {}
+
+	def __len__(self) -> int:
+		return self.size
+
+	def __setitem__(self, index: int, book: dict):
+		self.modified[index] = book
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return self.books(*index.indices(self.size))
+		if index < 0:
+			index += self.size
+		if not 0 <= index < self.size:
+			raise IndexError(index)
+		return self.books(index, index + 1)[0]
+
+	def books(self, start: int, stop: int, step: int = 1) -> list[dict]:
+		"""
+			Generate the books of ids start to stop
+			__return: list of books
+		"""
+		ids = arange(start, stop, step, dtype=uint64)
+		if len(ids) == 0:
+			return []
+
+		def field(salt, modulo):
+			return (mix_ids(ids ^ uint64(self.seed), salt) % uint64(modulo)).tolist()
+
+		nb_words	= field(0, 6)
+		words		= [field(1 + k, len(title_words)) for k in range(6)]
+		firsts		= field(7, len(first_names))
+		lasts		= field(8, len(last_names))
+		dates		= (first_date + asarray(field(9, date_range_days), dtype="timedelta64[D]")).astype(str).tolist()
+		genre		= field(10, len(genres))
+		euros		= field(11, 95)
+		cents		= field(12, 101)
+		copies		= field(13, 1000001)
+		ran			= field(14, num_records_per_many)
+
+		books = []
+		for i, id in enumerate(ids.tolist()):
+			if id in self.modified:
+				books.append(self.modified[id])
+				continue
+			title = " ".join(title_words[words[k][i]] for k in range(nb_words[i] + 1))
+			books.append({	"id"			: id,
+							"title"			: title.capitalize() + ".",
+							"author"		: first_names[firsts[i]] + " " + last_names[lasts[i]],
+							"published_date": dates[i],
+							"genre"			: genres[genre[i]],
+							"price"			: 5 + euros[i] + cents[i]/100,
+							"copies_sold"	: copies[i],
+							"ran"			: ran[i] })
+		return books
+
 def update_dataset(dataset):
 	"""
 		update dataset in place
@@ -0,0 +1,105 @@
+# Choix des clés visées par les lectures et les mises à jour des scénarios
+# Toutes les clés d'une série d'opérations sont tirées d'un coup, sous forme vectorisée, avant la boucle chronométrée :
+# la boucle ne fait que parcourir une liste. Les distributions reprennent celles de YCSB :
+#  - sequential : 0, 1, 2, ... (parcours dans l'ordre des identifiants)
+#  - uniform : toutes les clés ont la même probabilité
+#  - zipfian : popularité zipfienne, les plus petites clés sont les plus demandées
+#  - scrambled_zipfian : popularité zipfienne, clés populaires dispersées par hachage
+#  - hotspot : une fraction des clés reçoit la majorité des opérations
+#  - latest : popularité zipfienne depuis la dernière clé insérée
+
+#  For statistics
+from numpy import arange, asarray, uint64, errstate, where
+from numpy.random import default_rng
+
+
+key_distributions			= ["sequential", "uniform", "zipfian", "scrambled_zipfian", "hotspot", "latest"]
+
+# Paramètres par défaut de YCSB
+zipfian_constant			= 0.99
+# scrambled_zipfian tire ses rangs parmi 10 milliards d'éléments, zeta(10^10, 0.99) étant précalculé
+scrambled_item_count		= 10_000_000_000
+scrambled_zetan				= 26.46902820178302
+# hotspot : 80 % des opérations sur 20 % des clés
+hotspot_data_fraction		= 0.2
+hotspot_operation_fraction	= 0.8
+
+# Graine des tirages, les mêmes clés sont rejouées à chaque exécution
+key_seed					= 0
+# Taille des tranches pour le calcul de zeta sur un grand nombre de clés
+zeta_chunk					= 10_000_000
+
+
+def zeta(n: int, theta: float) -> float:
+	"""
+	Sum of 1/i^theta for i in 1..n
+	"""
+	total = 0.
+	for start in range(1, n + 1, zeta_chunk):
+		total += float((arange(start, min(start + zeta_chunk, n + 1), dtype=float) ** -theta).sum())
+	return total
+
+def zipfian_ranks(count: int, n: int, rng, theta: float = zipfian_constant, zetan: float | None = None):
+	"""
+	Draw count ranks in [0, n) with a zipfian popularity, rank 0 being the most popular
+	Vectorized version of the generator of Gray et al. used by YCSB
+	:param zetan: zeta(n, theta) if already known
+	"""
+	if n <= 1:
+		return asarray([0]*count, dtype=uint64)
+	zetan	= zeta(n, theta) if zetan is None else zetan
+	zeta2	= 1 + 0.5**theta
+	alpha	= 1 / (1 - theta)
+	eta		= (1 - (2/n)**(1 - theta)) / (1 - zeta2/zetan)
+
+	u		= rng.random(count)
+	uz		= u * zetan
+	ranks	= (n * (eta*u - eta + 1)**alpha).clip(0, n - 1).astype(uint64)
+	ranks[uz < zeta2]	= 1
+	ranks[uz < 1]		= 0
+	return ranks
+
+def fnv_hash(values):
+	"""
+	64 bits FNV-1a hash of each value, vectorized
+	:param values: uint64 array
+	"""
+	values	= asarray(values, dtype=uint64)
+	hashes	= asarray([0xCBF29CE484222325]*len(values), dtype=uint64)
+	with errstate(over="ignore"):
+		for byte in range(8):
+			hashes ^= (values >> uint64(8*byte)) & uint64(0xFF)
+			hashes *= uint64(0x100000001B3)
+	return hashes
+
+def choose_keys(distribution: str, count: int, key_count: int, rng=None) -> list[int]:
+	"""
+	Draw the keys of count operations among key_count keys (0 to key_count-1)
+	For "latest", the keys are relative to the last key, key_count-1 :
+	add the number of keys inserted since to follow the inserts
+	:param rng: numpy generator, seeded with key_seed if None
+	"""
+	rng = default_rng(key_seed) if rng is None else rng
+	if key_count <= 0:
+		return []
+
+	match distribution:
+		case "sequential":
+			keys = arange(count) % key_count
+		case "uniform":
+			keys = rng.integers(key_count, size=count)
+		case "zipfian":
+			keys = zipfian_ranks(count, key_count, rng)
+		case "scrambled_zipfian":
+			ranks	= zipfian_ranks(count, scrambled_item_count, rng, zetan=scrambled_zetan)
+			keys	= fnv_hash(ranks) % uint64(key_count)
+		case "hotspot":
+			hot_count	= max(1, int(key_count * hotspot_data_fraction))
+			hot			= rng.random(count) < hotspot_operation_fraction
+			cold_count	= max(1, key_count - hot_count)
+			keys		= where(hot, rng.integers(hot_count, size=count), (hot_count + rng.integers(cold_count, size=count)) % key_count)
+		case "latest":
+			keys = key_count - 1 - zipfian_ranks(count, key_count, rng).astype(int)
+		case _:
+			raise ValueError(f"Unknown key distribution {distribution}, available : {', '.join(key_distributions)}")
+	return keys.tolist()
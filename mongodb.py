@@ -1,5 +1,5 @@
 # For loading environment variables
-from os 		import getenv , makedirs,path, remove
+from os 		import getenv , makedirs
 from dotenv 	import load_dotenv
 
 # for handling signals
@@ -9,53 +9,41 @@ from signal import signal, SIGINT, SIGTERM
 from argparse import ArgumentParser
 
 # For Mongo DB operations
-from pymongo	import MongoClient, IndexModel
-from pymongo	import ASCENDING, DESCENDING
+from pymongo	import MongoClient, IndexModel, ReadPreference
+from pymongo	import ASCENDING
+from bson.codec_options	import CodecOptions
+from bson.raw_bson		import RawBSONDocument
 # For measuring operation time
 from collections import defaultdict
 from pymongo	import monitoring
-#from time		import perf_counter_ns
+from time		import perf_counter_ns as time_ns
 #from time		import sleep
 
 #  For statistics
-from numpy import arange, median as np_median, mean as np_mean, std as np_std,  percentile
-from numpy.random import normal
+from numpy import arange, median as np_median, mean as np_mean
 
 # For generating data and handling data
-from generate_data import extract_books_from_file, extract_updated_books_from_file ,generated_file, updated_file
-from generate_data import generate_book, modify_book #, Book 
+from generate_data import extract_books_from_file, generated_file
 from generate_data import num_records, num_records_per_many, nb_measurements
 from generate_data import  get_configuration
 
-# for graphing
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
-from matplotlib.lines import Line2D
-
-# For system information
-from platform import system, release, machine, architecture, python_version
-from psutil import cpu_count, virtual_memory
-from cpuinfo import get_cpu_info
+# Banc de test commun : enregistrement des mesures, scénarios et progression
+from benchmark import Backend, operation_times, client_operation_times, query_plans
+from benchmark import add_operation_time, extend_last_operation_time, move_last_operation_time, add_client_operation_time, clear_operation_times, save_results, save_query_plans
+from workload import workloads, workload_scenarios, total_workload_operations
+from key_chooser import key_distributions
+from benchmark import queued_handler, logs_dir
+from benchmark import run_tests, commit_suffix, total_operations, step_repetitions, steps_per_decade, geometric_steps, count_operation, change_progression_text, print_progress, stop_progress, clean_exit, profilers, memory_modes
 
 # For logging
 from logging import getLogger, Formatter, INFO, DEBUG, ERROR, FileHandler
 
-# For animation
-from alive_progress import alive_bar
-from threading import Thread, Lock, Event
+from threading import Thread
 
 # L'idée c'est de monitorer le temps des opérations de lecture, écriture, mise à jour et suppression
-# Avec la classe MongoDB, grâce au monitoring, on peut mesurer le temps des opérations
-operation_times = defaultdict(list)
-operation_times["insert"]	= []
-operation_times["delete"]	= []
-operation_times["find"]		= []
-operation_times["update"]	= []
-
-system_info			= ""
-operations_done		= 0
-operation_lock		= Lock()
-operation_Event		= Event()
+# Avec la classe MongoDB, grâce au monitoring, on peut mesurer le temps des opérations côté serveur
+# Nombre d'aller-retours (find + getMore) pour chaque lecture
+find_round_trips = []
 
 """
 Collection/Table "test" :
@@ -69,26 +57,72 @@ Collection/Table "test" :
 	ran: Champ aléatoire pour les tests entre 0 et num_records_per_many-1 (Integer)
 """
 
+def plan_stages(plan) -> list[str]:
+	"""
+	Stages of an explain plan, from the root to the leaves
+	"""
+	stages = []
+	if isinstance(plan, list):
+		for sub_plan in plan:
+			stages.extend(plan_stages(sub_plan))
+	elif isinstance(plan, dict):
+		if "stage" in plan:
+			stages.append(plan["stage"])
+		for key in ("queryPlan", "winningPlan", "inputStage", "inputStages", "shards"):
+			if key in plan:
+				stages.extend(plan_stages(plan[key]))
+	return stages
+
+def summarize_plan(explain: dict) -> dict:
+	"""
+	Keep the useful information of an explain("executionStats") result
+	"""
+	stats		= explain.get("executionStats", {})
+	winning		= explain.get("queryPlanner", {}).get("winningPlan", {})
+	return {	"stages"			: plan_stages(winning),
+				"keys_examined"		: stats.get("totalKeysExamined"),
+				"docs_examined"		: stats.get("totalDocsExamined"),
+				"returned"			: stats.get("nReturned"),
+				"execution_time_ms"	: stats.get("executionTimeMillis"),
+				"winning_plan"		: winning
+		   }
+
+def update_document(new_values: dict) -> dict:
+	"""
+	Update document from the new values of the fields, update documents are kept as is
+	"""
+	if any(key.startswith("$") for key in new_values):
+		return new_values
+	return {"$set": new_values}
+
 class CommandLogger(monitoring.CommandListener):
 	def started(self, event):
 		pass
 
 	def succeeded(self, event):
-		global operation_times
+		# Les getMore prolongent le find qui a ouvert le curseur :
+		# on cumule leur durée pour garder un seul temps serveur par lecture
+		if event.command_name == "getMore":
+			extend_last_operation_time("find", event.duration_micros*1000)
+			if find_round_trips:
+				find_round_trips[-1] += 1
+			return
+
+		if event.command_name == "find":
+			find_round_trips.append(1)
 
 		# On ne prend pas en comptes toutes les informations
-		if event.command_name not in ["insert","delete","find","update"]:
+		if event.command_name not in ["insert","delete","find","update","commitTransaction"]:
 			return
 
 		# On récupère le temps de l'opération
 		operation_time = event.duration_micros
-		# On récupère le nom de l'opération
-		operation_name = event.command_name
+		# On récupère le nom de l'opération, la validation d'une transaction groupée est enregistrée sous "commit"
+		operation_name = "commit" if event.command_name == "commitTransaction" else event.command_name
 		#print(f"Operation : {operation_name} - Time : {operation_time} µs")
-		# On ajoute le temps de l'opération dans le tableau
+		# On ajoute le temps de l'opération dans le tableau (en ns), sauf pendant la mise en route
 		# Si l'opération n'existe pas, on la crée
-
-		operation_times[operation_name].append(operation_time)
+		add_operation_time(operation_name, operation_time*1000)
 
 	def failed(self, event):
 		#On compte le nombre d'opérations qui ont échoué et on stocke le nom de l'opération, la requête et le message d'erreur
@@ -98,9 +132,16 @@ class CommandLogger(monitoring.CommandListener):
 		message = event.failure
 		getLogger('pymongo').error(f"Operation failed : {operation_name} - Query : {query} - Message : {message}")
 
-class MongoDB:
+class MongoDB(Backend):
+
+	name = "MongoDB"
+
+	def __init__(self,using_replica_set: bool=False,using_sharded_cluster:bool = False,debug_level:int = INFO,debug_file_mode:str = "w",capture_plans: bool = False):
+		# Capture des plans d'exécution
+		self.capture_plans = capture_plans
+		# Session des transactions, ouverte seulement si les écritures sont groupées (cf set_commit_interval)
+		self.session = None
 
-	def __init__(self,using_replica_set: bool=False,using_sharded_cluster:bool = False,debug_level:int = INFO,debug_file_mode:str = "w"):
 		# Logging
 		self.logger = getLogger("MongoDB")
 		self.logger.setLevel(debug_level)
@@ -108,18 +149,19 @@ class MongoDB:
 		# Création de fichiers de logs
 		try:
 			# on crée le dossier  de logs s'il n'existe pas
-			makedirs("logs",exist_ok=True)
+			makedirs(logs_dir,exist_ok=True)
 
-			fh 			= FileHandler('logs/mongodb-tests.log',mode=debug_file_mode)
+			fh 			= FileHandler(f'{logs_dir}/mongodb-tests.log',mode=debug_file_mode)
 			formatter	= Formatter(fmt="[%(levelname)s] %(filename)s:l.%(lineno)d - %(message)s")
 			fh.setFormatter(formatter)
-			self.logger.addHandler(fh)
+			# Écriture des journaux en arrière-plan
+			self.logger.addHandler(queued_handler(fh))
 
 			mongo_logger = getLogger('pymongo')
-			fh2 		 = FileHandler('logs/mongodb.log',mode=debug_file_mode)
+			fh2 		 = FileHandler(f'{logs_dir}/mongodb.log',mode=debug_file_mode)
 			fh2.setFormatter(formatter)
 			mongo_logger.setLevel(debug_level)
-			mongo_logger.addHandler(fh2)
+			mongo_logger.addHandler(queued_handler(fh2))
 		
 		except Exception as e:
 			self.logger.error(f"MongoDB.__init__: {e}")
@@ -181,8 +223,9 @@ class MongoDB:
 
 			self.db			= self.client[database]
 			self.collection = self.db[collection]
+			# Vue de la collection qui renvoie des documents BSON bruts, sans décodage en dict
+			self.raw_collection = self.collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
 			self.client.server_info()
-			self.client.start_session()
 			self.logger.info(f"Connected to MongoDB {self.client.address[0]}:{self.client.address[1]}, Server Informations :")
 			for info in self.client.server_info():
 				self.logger.info(f"\t {info} : {self.client.server_info()[info]}")
@@ -198,12 +241,42 @@ class MongoDB:
 		except Exception as e:
 			self.logger.error(f"MongoDB.__del__: {e}")
 	
-	def __update_operation_count(self):
-		global operations_done, operation_Event, operation_lock
-		with operation_lock:
-			operations_done += 1
-			operation_Event.clear()
-			operation_Event.set()
+	def __capture_plan(self, operation: str, query: dict, new_values: dict | None = None, projection: dict | None = None):
+		"""
+		Run explain("executionStats") once per operation shape when capture_plans is set
+		The explain runs before the measured operation and is not timed
+		:param operation: find_one, find_many, update_one, update_many, delete_one or delete_many
+		"""
+		if not self.capture_plans:
+			return
+
+		shape = f"{operation}({', '.join(sorted(query))})"
+		if projection is not None:
+			shape += f" -> ({', '.join(sorted(projection))})"
+		if shape in query_plans:
+			return
+
+		name = self.collection.name
+		try:
+			match operation:
+				case "find_one":
+					command = {"find": name, "filter": query, "limit": 1, "singleBatch": True}
+				case "find_many":
+					command = {"find": name, "filter": query}
+				case "update_one" | "update_many":
+					command = {"update": name, "updates": [{"q": query, "u": new_values, "multi": operation == "update_many"}]}
+				case "delete_one" | "delete_many":
+					command = {"delete": name, "deletes": [{"q": query, "limit": 1 if operation == "delete_one" else 0}]}
+				case _:
+					return
+			if projection is not None and "find" in command:
+				command["projection"] = projection
+
+			explain = self.db.command({"explain": command, "verbosity": "executionStats"})
+			query_plans[shape] = summarize_plan(explain)
+			self.logger.debug(f"Plan for {shape} : {query_plans[shape]['stages']}")
+		except Exception as e:
+			self.logger.error(f"MongoDB.__capture_plan : {shape} -> {e}")
 
 	def create_index(self,field ,unique : bool=False):
 		"""
@@ -241,56 +314,106 @@ class MongoDB:
 		except Exception as e:
 			self.logger.error(f"Error dropping indexes : {e}")
 	
-	def read(self,print_result: bool = True)-> list:
+	def read(self,print_result: bool = True, projection: dict | None = None, batch_size: int = 0, raw_bson: bool = False)-> list:
 		"""
 		Find all documents in the collection
+		:param projection: the fields to return, all fields if None
+		:param batch_size: the number of documents per batch, server default if 0
+		:param raw_bson: return RawBSONDocument instead of decoded dicts
 		"""
-		self.__update_operation_count()
+		count_operation()
 		l = []
+		collection = self.raw_collection if raw_bson else self.collection
+		self.__capture_plan("find_many", {}, projection=projection)
 		try:
-			for x in self.collection.find():
-				if print_result:
-					self.logger.debug(x)
-				l.append(x)
+			start_time	= time_ns()
+			l			= list(collection.find({}, projection, batch_size=batch_size, session=self.session))
+			end_time	= time_ns()
+			add_client_operation_time("find", end_time-start_time)
+			# Journalisation hors mesure, et seulement si le niveau DEBUG est actif
+			if print_result and self.logger.isEnabledFor(DEBUG):
+				for x in l:
+					self.logger.debug("%s", x)
 		except Exception as e:
-			self.logger.error(f"Error reading data : {e}")
+			self.logger.error("Error reading data : %s", e)
 		finally:
 			return l
 
-	def read_one(self,query,print_result:bool = True):
+	def read_one(self,query,print_result:bool = True, projection: dict | None = None, raw_bson: bool = False):
 		"""
 		Find the first document that matches the query
 		:param query: the query to find the document
+		:param projection: the fields to return, all fields if None
+		:param raw_bson: return a RawBSONDocument instead of a decoded dict
 		"""
-		self.__update_operation_count()
+		count_operation()
+		x = None
+		collection = self.raw_collection if raw_bson else self.collection
+		self.__capture_plan("find_one", query, projection=projection)
 		try:
-			x = self.collection.find_one(query)
+			start_time	= time_ns()
+			x			= collection.find_one(query, projection, session=self.session)
+			end_time	= time_ns()
+			add_client_operation_time("find", end_time-start_time)
 		except Exception as e:
-			self.logger.error(f"Error reading one data : {e}")
+			self.logger.error("Error reading one data : %s", e)
 		if print_result:
-			self.logger.debug(x)
+			self.logger.debug("%s", x)
 		return x
 
-	def read_many(self,query,print_result:bool = True):
+	def read_many(self,query,print_result:bool = True, projection: dict | None = None, batch_size: int = 0, raw_bson: bool = False):
 		"""
 		Find all documents that match the query
 		:param query: the query to find the documents
+		:param projection: the fields to return, all fields if None
+		:param batch_size: the number of documents per batch, server default if 0
+		:param raw_bson: return RawBSONDocument instead of decoded dicts
 		"""
-		self.__update_operation_count()
+		count_operation()
 		l = []
+		collection = self.raw_collection if raw_bson else self.collection
+		self.__capture_plan("find_many", query, projection=projection)
 		try:
-			for x in self.collection.find(query):
-				if print_result:
-					self.logger.debug(x)
-				l.append(x)
+			start_time	= time_ns()
+			l			= list(collection.find(query, projection, batch_size=batch_size, session=self.session))
+			end_time	= time_ns()
+			add_client_operation_time("find", end_time-start_time)
+			# Journalisation hors mesure, et seulement si le niveau DEBUG est actif
+			if print_result and self.logger.isEnabledFor(DEBUG):
+				for x in l:
+					self.logger.debug("%s", x)
+
+			# Pas de requête supplémentaire dans une méthode mesurée
 			if len(l) == 0:
-				self.logger.warning(f"No data found with : {query}")
-				# Dans ce cas, on va afficher les champs de données de la base collection
-				# pour voir si on a des données
-				self.logger.info(f"Fields : {self.collection.find_one()}")
+				self.logger.warning("No data found with : %s", query)
+
+		except Exception as e:
+			self.logger.error("Error reading many data : %s", e)
+		finally:
+			return l
 
+	def scan(self, start_id: int, count: int, print_result: bool = False) -> list:
+		"""
+		Find count documents in id order, from start_id
+		:param start_id: the first id
+		:param count: the maximal number of documents
+		"""
+		count_operation()
+		l = []
+		try:
+			start_time	= time_ns()
+			l			= list(self.collection.find({"id": {"$gte": start_id}}, session=self.session).sort("id", 1).limit(count))
+			end_time	= time_ns()
+			add_client_operation_time("scan", end_time-start_time)
+			# Journalisation hors mesure, et seulement si le niveau DEBUG est actif
+			if print_result and self.logger.isEnabledFor(DEBUG):
+				for x in l:
+					self.logger.debug("%s", x)
+
+			# Le listener enregistre la commande sous "find" : on déplace son temps serveur vers "scan"
+			move_last_operation_time("find", "scan")
 		except Exception as e:
-			self.logger.error(f"Error reading many data : {e}")
+			self.logger.error("Error scanning data : %s", e)
 		finally:
 			return l
 
@@ -300,46 +423,69 @@ class MongoDB:
 		:param data: the document to insert
 		"""
 		if not silent:
-			self.__update_operation_count()
+			count_operation()
 		try:
-			if self.collection.insert_one(data) :
-				self.logger.debug(f"Data inserted : {data}")
+			self.before_write()
+			start_time	= time_ns()
+			result		= self.collection.insert_one(data, session=self.session)
+			end_time	= time_ns()
+			add_client_operation_time("insert", end_time-start_time)
+			self.after_write()
+
+			if result :
+				self.logger.debug("Data inserted : %s", data)
 			else:
-				self.logger.error(f"Error inserting data : {data}")
+				self.logger.error("Error inserting data : %s", data)
 		except Exception as e:
-			self.logger.error(f"Error inserting one data : {e}")
+			self.logger.error("Error inserting one data : %s", e)
 
 	def update_one(self,query,new_values):
 		"""
 		Modify the first document that matches the query
 		:param query: the query to find the document to update
-		:param new_values: the new values to update
+		:param new_values: the new values to update, an update document or the new values of the fields
 		"""
-		self.__update_operation_count()
+		count_operation()
+		new_values = update_document(new_values)
+		self.__capture_plan("update_one", query, new_values)
 		try:
-			update_result = self.collection.update_one(query, new_values)
+			self.before_write()
+			start_time		= time_ns()
+			update_result	= self.collection.update_one(query, new_values, session=self.session)
+			end_time		= time_ns()
+			add_client_operation_time("update", end_time-start_time)
+			self.after_write()
 		except Exception as e:
-			self.logger.error(f"Error updating one data : {e}")
+			self.logger.error("Error updating one data : %s", e)
+			return
 		if update_result.modified_count > 0:
-			self.logger.debug(f"Data updated : {query} -> {new_values}")
+			self.logger.debug("Data updated : %s -> %s", query, new_values)
 		elif update_result.matched_count > 0:
-			self.logger.error(f"No data updated but {update_result.matched_count} matched with \n: \t \t{query} -> {new_values}")
+			self.logger.error("No data updated but %s matched with \n: \t \t%s -> %s", update_result.matched_count, query, new_values)
 		else:
-			self.logger.error(f"No data updated with : {query} -> {new_values}")
+			self.logger.error("No data updated with : %s -> %s", query, new_values)
 
 	def delete_one(self,query):
 		"""
 		Delete the first document that matches the query
 		:param query: the query to find the document to delete
 		"""
-		self.__update_operation_count()
+		count_operation()
+		self.__capture_plan("delete_one", query)
 		try:
-			if self.collection.delete_one(query).deleted_count > 0:
-				self.logger.debug(f"Data deleted : {query}")
+			self.before_write()
+			start_time		= time_ns()
+			delete_result	= self.collection.delete_one(query, session=self.session)
+			end_time		= time_ns()
+			add_client_operation_time("delete", end_time-start_time)
+			self.after_write()
+
+			if delete_result.deleted_count > 0:
+				self.logger.debug("Data deleted : %s", query)
 			else:
-				self.logger.warning(f"No data deleted with : {query}")
+				self.logger.warning("No data deleted with : %s", query)
 		except Exception as e:
-			self.logger.error(f"Error deleting one data : {e}")
+			self.logger.error("Error deleting one data : %s", e)
 	
 	# Operations with several documents
 	def create_many(self,data,silent=False):
@@ -348,673 +494,309 @@ class MongoDB:
 		:param data: the documents to insert
 		"""
 		if not silent:
-			self.__update_operation_count()
+			count_operation()
 		try:
-			if self.collection.insert_many(data):
-				self.logger.debug(f"Data inserted : {data}")
+			self.before_write()
+			start_time	= time_ns()
+			result		= self.collection.insert_many(data, session=self.session)
+			end_time	= time_ns()
+			add_client_operation_time("insert", end_time-start_time)
+			self.after_write()
+
+			if result:
+				self.logger.debug("Data inserted : %s", data)
 			else:
-				self.logger.error(f"Error inserting many data : {data}")
+				self.logger.error("Error inserting many data : %s", data)
 		except Exception as e:
-			self.logger.error(f"Error inserting many data : {e}")
+			self.logger.error("Error inserting many data : %s", e)
+
+	def bulk_load(self, data):
+		"""
+		Insert documents without ordering them nor logging them, to fill the collection between two steps
+		:param data: the documents to insert
+		"""
+		try:
+			# Les écritures groupées en attente sont validées avant, le chargement se fait hors transaction
+			self.flush_writes()
+			self.collection.insert_many(data, ordered=False)
+		except Exception as e:
+			self.logger.error("Error bulk loading %s documents : %s", len(data), e)
 
 	def update_many(self,query,new_values):
 		"""
 		Modify all documents that match the query
 		:param query: the query to find the documents to update
-		:param new_values: the new values to update
+		:param new_values: the new values to update, an update document or the new values of the fields
 		"""
-		self.__update_operation_count()
+		count_operation()
+		new_values = update_document(new_values)
+		self.__capture_plan("update_many", query, new_values)
 		try:
-			update_result = self.collection.update_many(query, new_values)
+			self.before_write()
+			start_time		= time_ns()
+			update_result	= self.collection.update_many(query, new_values, session=self.session)
+			end_time		= time_ns()
+			add_client_operation_time("update", end_time-start_time)
+			self.after_write()
 		except Exception as e:
-			self.logger.error(f"Error updating many data : {e}")
+			self.logger.error("Error updating many data : %s", e)
+			return
 		if update_result.modified_count > 0:
-			self.logger.debug(f" { update_result.modified_count} Data updated : {query} -> {new_values}")
+			self.logger.debug(" %s Data updated : %s -> %s", update_result.modified_count, query, new_values)
 		elif update_result.matched_count > 0:
-			self.logger.error(f"No data updated but {update_result.matched_count} matched with \n: \t \t{query} -> {new_values}")
+			self.logger.error("No data updated but %s matched with \n: \t \t%s -> %s", update_result.matched_count, query, new_values)
 		else:
-			self.logger.error(f"No data updated with : {query} -> {new_values}")
+			self.logger.error("No data updated with : %s -> %s", query, new_values)
 
 	def delete_many(self,query):
 		"""
 		Delete all documents that match the query
 		:param query: the query to find the documents to delete
 		"""
-		self.__update_operation_count()
+		count_operation()
+		self.__capture_plan("delete_many", query)
   
 		try:
-			if self.collection.delete_many(query).deleted_count > 0:
-				self.logger.debug(f"Data deleted : {query}")
+			self.before_write()
+			start_time		= time_ns()
+			delete_result	= self.collection.delete_many(query, session=self.session)
+			end_time		= time_ns()
+			add_client_operation_time("delete", end_time-start_time)
+			self.after_write()
+
+			if delete_result.deleted_count > 0:
+				self.logger.debug("Data deleted : %s", query)
 			else:
-				self.logger.debug(f"No data deleted with : {query}")
+				self.logger.debug("No data deleted with : %s", query)
 		except Exception as e:
-			self.logger.error(f"Error deleting many data : {e}")
+			self.logger.error("Error deleting many data : %s", e)
 	
+	def server_metrics(self, connection=None) -> dict:
+		"""
+		Sample the serverStatus counters used to explain latency spikes
+		(WiredTiger cache and eviction, operation counters, lock queues, memory)
+		MongoClient is thread safe, no dedicated connection is needed
+		"""
+		status		= self.client.admin.command("serverStatus")
+		cache		= status.get("wiredTiger", {}).get("cache", {})
+		metrics		= {}
+		for name in (	"bytes currently in the cache",
+						"maximum bytes configured",
+						"tracked dirty bytes in the cache",
+						"pages read into cache",
+						"pages written from cache",
+						"pages evicted by application threads",
+						"modified pages evicted",
+						"unmodified pages evicted"):
+			if name in cache:
+				metrics[f"cache.{name}"] = cache[name]
+		for name, value in status.get("opcounters", {}).items():
+			metrics[f"opcounters.{name}"] = value
+		for name, value in status.get("globalLock", {}).get("currentQueue", {}).items():
+			metrics[f"queue.{name}"] = value
+		metrics["connections.current"]	= status.get("connections", {}).get("current")
+		metrics["mem.resident"]			= status.get("mem", {}).get("resident")
+		return metrics
+
+	def index_size(self) -> dict:
+		"""
+		Get the size of the indexes of the collection, summed over all shards
+		:return: {"total": total size in bytes, "indexes": {index name: size in bytes}}
+		"""
+		sizes = defaultdict(int)
+		total = 0
+		try:
+			# $collStats renvoie un document par shard
+			for stats in self.collection.aggregate([{"$collStats": {"storageStats": {}}}]):
+				storage	 = stats.get("storageStats", {})
+				total	+= storage.get("totalIndexSize", 0)
+				for index, size in storage.get("indexSizes", {}).items():
+					sizes[index] += size
+		except Exception as e:
+			self.logger.error(f"MongoDB.index_size : {e}")
+		return {"total": total, "indexes": dict(sizes)}
+
+	def apply_index_profile(self, profile: str):
+		"""
+		Drop all indexes and create the ones of the profile
+		"""
+		self.logger.debug(f"Creating indexes for profile {profile}...")
+
+		# On efface tous les index existants
+		self.drop_indexes()
+
+		if profile == "none":
+			return
+
+		# On distingue id des autres index car id est utilisé pour le sharding
+		try:
+			self.create_index("id",unique=True)
+		except Exception as e:
+			self.logger.error(f"Error creating indexes : {e}")
+
+		# On crée les index et si cela échoue, une exception est levée et le test s'arrête
+		if len(index_profiles[profile]) > 0:
+			self.create_indexes(index_profiles[profile])
+
 	def clear_operation_data(self):
 		"""
 		Clear the times of the operations
 		"""
-		global operation_times
-		operation_times.clear()
+		clear_operation_times()
+		find_round_trips.clear()
 		
+	def count(self) -> int | None:
+		"""
+		Number of documents in the collection
+		"""
+		try:
+			self.flush_writes()
+			return self.collection.count_documents({}, session=self.session)
+		except Exception as e:
+			self.logger.error(f"Error counting documents : {e}")
+		return None
+
 	def drop_all(self):
 		"""
 		Delete all documents in the collection
 		"""
+		# Le nettoyage ne fait pas partie des opérations dont on capture le plan, ni d'une transaction
+		capture_plans, self.capture_plans = self.capture_plans, False
+		commit_interval, self.commit_interval = self.commit_interval, 0
 		try:
+			self.flush_writes()
 			self.delete_many({})
 		except Exception as e:
 			self.logger.error(f"Error dropping all data : {e}")
+		finally:
+			self.capture_plans		= capture_plans
+			self.commit_interval	= commit_interval
 
-	def close(self):
-		self.client.close()
-
-
-######### Utilitaires #########
-
-def print_system_info():
-	"""
-	Display system information
-	"""
-	global system_info
-	if system_info == "":
-		system_info = f"Python : {python_version()}\nSystem : {system()} {release()}\nMachine : {machine()} {architecture()[0]}\nCPU : {get_cpu_info()['brand_raw']} - {cpu_count(logical=False)} cores - {cpu_count(logical=True)} threads\nRAM : {int(virtual_memory().total/1024**3)} Go"
-	print(system_info)
+	def set_commit_interval(self, commit_interval: int):
+		"""
+		Group the next writes in transactions of commit_interval writes, 0 or 1 to commit each write
+		The transactions need a replica set or a sharded cluster
+		"""
+		self.flush_writes()
+		if commit_interval > 1 and self.client.topology_description.topology_type_name == "Single":
+			self.logger.warning("Transactions are not available on a standalone server, each write is committed alone")
+			commit_interval = 0
+		if commit_interval > 1 and self.session is None:
+			self.session = self.client.start_session()
+		self.commit_interval = commit_interval
+
+	def begin_transaction(self):
+		"""
+		Start a transaction in the session of the benchmark
+		The reads of a transaction must go to the primary, whatever the read preference of the client ("nearest" when sharded)
+		"""
+		try:
+			self.session.start_transaction(read_preference=ReadPreference.PRIMARY)
+		except Exception as e:
+			self.logger.error(f"Error starting transaction : {e}")
 
-def violin_plot_operation_times(test_type="test",test_name=""):
-	"""
-	Plot the times of the operations
-	"""
-	global operation_times, operation_lock
- 
-	if len(operation_times) == 0:
-		print(f" {test_type} : {test_name} -> No data to plot")
-		return
- 
-	# Réveille le thread de progression
-	with operation_lock:
-		operation_Event.set()
-	
-	change_progression_text(f"Generating plots for {test_type}/{test_name} ...")
-	
-	# On crée un dossier pour les graphiques
-	makedirs(f"plots/MongoDB/{test_type}", exist_ok=True)
- 
-	# On va créer un graphique regroupant les 4 opérations : insertion, lecture, mise à jour et suppression
-	fig, axes = plt.subplots(2,2,figsize=(12, 8))
-	axes = axes.flatten()
-	idx = 0
-	for operation in operation_times:
-		ax = axes[idx]
-		data = operation_times[operation]
-
-		# Création du graphe violon
-		violin_parts = ax.violinplot(data,  showmeans=True, showmedians=True, showextrema= False, quantiles=[0.25,0.75],points=len(data))
-
-		# Couleurs des quartiles
-		quartile_colors = ['#9999FF','#99FF99','#FF9999' ]  # Bleu, Vert, Rouge
-		for body, color in zip(violin_parts['bodies'], quartile_colors):
-			body.set_facecolor(color)
-			body.set_alpha(0.6)
-
-		# Calcul des stats : médiane, moyenne et quartiles
-		q1,q3 ,median, mean = 0, 0, 0, 0
-		q1		= percentile(data, 25)
-		q3		= percentile(data, 75)
-		median	= np_median(data)
-		mean	= np_mean(data)
-		std 	= np_std(data)
-		
-		# Ajout du nuage de points 
-		x = normal(loc=1, scale=0.05, size=len(data))  # Ajout de jitter pour éviter l'empilement
-		y = data
-		ax.scatter(x, y, alpha=0.4, color="teal" , s=2, label=f"Nuage de points")
-
-		# Personnalisation des lignes
-		violin_parts['cmedians'].set_color('green')  # Ligne médiane
-		violin_parts['cmeans'].set_color('red')  # Ligne moyenne
-		violin_parts['cmeans'].set_linestyle('dashed')  # Moyenne en pointillés
-		violin_parts['bodies'][0].set_label('Densité')  # Légende pour la densité
-		violin_parts['cquantiles'].set_color('blue')  # Changer la couleur des lignes de quantiles
-		violin_parts['cquantiles'].set_linestyle('dashed')   # Style de ligne pleine
-
-		# Légende
-		legend_elements = [
-			Patch(facecolor='#9999FF', alpha=0.7, label='Densité'),
-			Line2D([0], [0], color='green'	, label=f'Médiane : {median:.2f} (µs)'),
-			Line2D([0], [0], color='red'	, label=f'Moyenne : {mean:.2f} +/- {std:.2f} écart (µs)'),
-			Line2D([0], [0], color='blue'	, label=f'Quartiles (25%) : {q1:.2f}'),
-			Line2D([0], [0], color='blue'	, label=f'Quartiles (75%) : {q3:.2f}'),
-			Line2D([0], [0], marker='o'		, color='w', markerfacecolor='teal', markersize=4, label='Nuage de points'),
-		]
-		ax.legend(handles=legend_elements, loc='best')
-
-		# Ajout des labels et du titre
-		ax.set_title(f"Distribution du temps de réalisation pour {len(data)} opération: {operation}")
-		ax.set_ylabel("Temps (µs)")
-
-		idx += 1
-  
-	# Ajuster l'espace entre les sous-graphes
-	plt.tight_layout()
+	def commit_transaction(self):
+		"""
+		Commit the transaction of the session, the listener records its server time
+		"""
+		try:
+			self.session.commit_transaction()
+		except Exception as e:
+			self.logger.error(f"Error committing transaction : {e}")
+			if self.session.in_transaction:
+				self.session.abort_transaction()
 
-	# On sauvegarde la figure, au cas où elle existe déjà, on la supprime
-	save_path = f"plots/MongoDB/{test_type}/{test_name}.png"
-	if path.exists(save_path):
-		remove(save_path)
-	plt.savefig(save_path)
+	def close(self):
+		if self.session is not None:
+			self.session.end_session()
+		self.client.close()
 
-	# on ferme la figure
-	plt.close()	
 
-def plot_operation_times( data : dict, steps, test_type="test",test_name=""):
+######### Tests spécifiques à MongoDB #########
+
+# Profils d'index : chaque profil est testé sur les mêmes scénarios.
+# En dehors de "none", un index unique sur id est toujours créé à part (cf MongoDB.apply_index_profile)
+index_profiles = {	"none"		: [],
+					# Un index simple par champ
+					"single"	: [	IndexModel("title"),
+									IndexModel("author"),
+									IndexModel("published_date"),
+									IndexModel("genre"),
+									IndexModel("copies_sold"),
+									IndexModel("ran")
+								  ],
+					# Index composé utilisé pour les lectures par "ran"
+					"compound"	: [	IndexModel([("ran", ASCENDING), ("id", ASCENDING)]) ],
+					# Index couvrant les lectures par "ran" projetées sur id, ran, price et copies_sold (cf test_read_tuning)
+					"covering"	: [	IndexModel([("ran", ASCENDING), ("id", ASCENDING), ("price", ASCENDING), ("copies_sold", ASCENDING)]) ],
+					# Index partiel : seuls les livres marqués à prix nul par test_many_various_data sont indexés
+					"partial"	: [	IndexModel([("price", ASCENDING)], partialFilterExpression={"price": {"$lt": 1.0}}) ]
+				 }
+
+read_tuning_projections	= {	"full"		: None,
+							"fields"	: {"_id": 0, "id": 1, "ran": 1, "price": 1, "copies_sold": 1},
+							"id_only"	: {"_id": 0, "id": 1}
+						  }
+read_tuning_batch_sizes	= [0, 10, 100, 1000]
+read_tuning_raw_modes	= [False, True]
+
+def test_read_tuning(mongo: MongoDB,plot_name :str, nb_data:int = num_records,
+					 projections: dict = read_tuning_projections, batch_sizes: list[int] = read_tuning_batch_sizes, raw_modes: list[bool] = read_tuning_raw_modes):
 	"""
-		Affiche le temps des opérations selon la quantité de données dans la base de données
+		On mesure read_many pour chaque combinaison de projection, de batch_size et de mode BSON brut,
+		afin de séparer le coût serveur du coût de décodage côté client
 	"""
- 
-	change_progression_text(f"Generating plots for {test_type}/{test_name} ...")
- 
-	if len(data) == 0:
-		print(f" {test_type} : {test_name} -> No data to plot")
-		return
-
-	# On crée un dossier pour les graphiques
-	makedirs(f"plots/MongoDB/{test_type}/", exist_ok=True)
-	
-	# On va créer un graphique qui contient les 4 opérations : insertion, lecture, mise à jour et suppression en même temps
-	fig, axes	= plt.subplots(2, 2, figsize=(12, 8))
-	axes		= axes.flatten() 
-	idx			= 0
-	for operation in data:
-		ax = axes[idx]
-  
-		# Calcul des stats : médiane, moyenne et quartiles		
-		moyenne	= np_mean	(data[operation])
-		mediane	= np_median	(data[operation])
-		std 	= np_std	(data[operation])
-		q1		= percentile(data[operation], 25)
-		q3		= percentile(data[operation], 75)
-
-		# On affiche le temps moyen en µs en fonction de la quantité de données
-		ax.plot(steps,data[operation], label=f"{operation} : µs" )
-	
-		# On trace les lignes de moyenne, médiane et quartiles
-		ax.axhline(y=moyenne,	color='r', linestyle='--')
-		ax.axhline(y=mediane,	color='g', linestyle='--')
-		ax.axhline(y=q1,		color='b', linestyle='--')
-		ax.axhline(y=q3,		color='b', linestyle='--')
-  
-		# on ajoute dans la légende les couleurs des lignes et les labels
-		legend_elements = [
-			Line2D([0], [0], color='r', linestyle='--', label=f'Moyenne : {moyenne:.2f} +/- {std:.2f} écart (µs)'),
-			Line2D([0], [0], color='g', linestyle='--', label=f'Médiane : {mediane:.2f} (µs)'),
-			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 1 (25%) : {q1:.2f} (µs)'),
-			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 3 (75%) : {q3:.2f} (µs)'),
-		]
-		
-		# Personnalisation du graphique
-		ax.set_title(f"{operation} : Temps d'execution par quantité de données initiales")
-		ax.set_xlabel("Données dans la base de données")
-		ax.set_ylabel('Time (µs)')
-		ax.legend(handles=legend_elements, loc='best' )
-  
-		idx += 1
-  
-	# Ajuster l'espace entre les sous-graphes
-	plt.tight_layout()
-
-	# On sauvegarde la figure, au cas où elle existe déjà, on la supprime
-	save_path = f"plots/MongoDB/{test_type}/{test_name}.png"
-	if path.exists(save_path):
-		remove(save_path)
-	plt.savefig(save_path)
+	global generated_file, num_records_per_many
 
-	# On réinitialise le graphique
-	#plt.clf()
-	# on ferme la figure
-	plt.close()
+	mongo.logger.info("Test read tuning " + plot_name)
 
+	# On supprime toutes les données de la collection s'il y en a
+	mongo.drop_all()
 
-######### Tests de performance #########
-
-def global_test_one(mongo: MongoDB,plot_name :str ,  nb_data:int = num_records):
-	global num_records_per_many, generated_file, updated_file
- 
-	mongo.logger.info("Test global one by one " + plot_name)
- 
-	if nb_data < 0:
-		raise ValueError("nb_data must be > 0 and <= " + str(num_records))
-
-	# On récupère les données
-	dataset = extract_books_from_file(generated_file,nb_data)
-
-	if len(dataset) < nb_data:
-		mongo.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
- 
-	nb_data = len(dataset)
-	
-	### Tests avec données une par une  ###
- 
-	## Test d'insertion de données
-	for book in dataset:
-		mongo.create_one(book)
-
-	# Libérer la mémoire
-	dataset.clear()
- 
-	## Test de lecture de données sur la collection "Books", en choississant l'id
-	for i in range(0,nb_data):
-		mongo.read_one({"id":i},print_result=False)
-
-	## Test de mise à jour de données
- 
-	# Chargement des données à modifier
-	updated_dataset = extract_updated_books_from_file(updated_file,nb_data)
-	# note : update_dataset contains the original and modified data
-	
-	for update in updated_dataset:
-		original = update[0]
-		modified = update[1]
-	
-		if original == modified:
-			mongo.logger.error(f"Data are the same : \n\t{original} -> \n\t{modified}")
-		else:
-			#Sinon on identifie le champ modifié
-			new_values = {}
-			key = ""
-			for key in original:
-				if original[key] != modified[key]:
-					new_values = {key: modified[key]}
-					break
-			mongo.update_one(update[0],{ "$set": new_values})
-		
-
-	## Test de suppression de données
-	mongo.logger.debug("Test delete one by one : ")
-	for _,book in updated_dataset:
-		mongo.delete_one(book)
-
-	# Dessiner les graphiques
-	try:
-		violin_plot_operation_times(plot_name,"global_test_one")
-	except Exception as e:
-		mongo.logger.error(f"global_test_one : error plotting -> {e}")
-
- 
-	# On supprime toutes les données de la collection
-	mongo.drop_all()	
- 
-	# On réinitialise les données des opérations
-	mongo.clear_operation_data()
-
-def global_test_many(mongo: MongoDB,plot_name :str, nb_data:int = num_records):
-	global updated_file, generated_file, num_records_per_many, num_records
-
-	mongo.logger.info("Test global many " + plot_name)
-
-	### Tests avec plusieurs données à la fois  ###
-	
-	if nb_data  < 0: 
-		raise ValueError("nb_data must be > 0 and <= " + str(num_records_per_many))
-
-	# On récupère les données
+	# On récupère les données et on les insère sans les mesurer
 	dataset = extract_books_from_file(generated_file,nb_data)
-
-	if len(dataset) < nb_data:
-		mongo.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
-	
-	nb_data = len(dataset)
-	
-	# On envoie à chaque fois num_records_per_many données
-	
-	## Test d'insertion de données
-	for i in range(0,nb_data,num_records_per_many):
-		#data = [book for book in dataset[i:i+num_records_per_many]]
-		mongo.create_many(dataset[i:i+num_records_per_many],silent=True)
-
-	# vide dataset pour libérer la mémoire
+	for i in range(0,len(dataset),1000):
+		mongo.create_many(dataset[i:i+1000],silent=True)
 	dataset.clear()
- 
-	## Test de mise à jour de données
-	
-	# Chargement des données à modifier
-	#updated_dataset = extract_updated_books_from_file(updated_file,nb_data)
-	# note : update_dataset contains the original and modified data
- 
-	for i in range(0,num_records_per_many):
-		# On met à jour les données
-		# Avec le champ "ran" qui est entre O  
-		mongo.update_many({"ran" : i%num_records_per_many},{ "$inc": {"price" : 5.00, "copies_sold": 100} } )
-
-	dataset.clear()
- 
-	## Test de lecture de données
-	for i in range(0,num_records_per_many):
-		mongo.read_many({"ran" : i},print_result=False)
 
-	## Test de suppression de données
-	for i in range(0,num_records_per_many):
-		# On supprime les données
-		mongo.delete_many({"ran" : i})
+	results = []
+	for projection_name, projection in projections.items():
+		for batch_size in batch_sizes:
+			for raw_bson in raw_modes:
+				mongo.clear_operation_data()
+
+				for i in range(0,num_records_per_many):
+					mongo.read_many({"ran" : i},print_result=False, projection=projection, batch_size=batch_size, raw_bson=raw_bson)
+
+				server_times = operation_times.get("find",[])
+				client_times = client_operation_times.get("find",[])
+				if len(server_times) == 0 or len(client_times) == 0:
+					mongo.logger.warning(f"test_read_tuning : no measure for {projection_name} / {batch_size} / {raw_bson}")
+					continue
+
+				result = {	"label"			: f"{projection_name}, batch={batch_size or 'default'}{', raw' if raw_bson else ''}",
+							"projection"	: projection_name,
+							"batch_size"	: batch_size,
+							"raw_bson"		: raw_bson,
+							"server_median"	: float(np_median(server_times)),
+							"client_median"	: float(np_median(client_times)),
+							"round_trips"	: float(np_mean(find_round_trips)) if find_round_trips else 0.
+						 }
+				results.append(result)
+				mongo.logger.info(f"read tuning {result['label']} : server {result['server_median']:.2f} µs, "\
+								  f"client {result['client_median']:.2f} µs, {result['round_trips']:.1f} round trips")
+
+	# On enregistre les plans d'exécution capturés et les mesures
+	save_query_plans(mongo.name, plot_name, "read_tuning")
+	save_results(mongo.name, plot_name, "read_tuning", {"kind": "read_tuning", "results": results})
 
-
-	# Dessiner les graphiques
-	try:
-		violin_plot_operation_times(plot_name,"global_test_many")
-	except Exception as e:
-		mongo.logger.error(f"global_test_many : error plotting -> {e}")
-	
- 
 	# On supprime toutes les données de la collection
 	mongo.drop_all()
- 
+
 	# On réinitialise les données des opérations
 	mongo.clear_operation_data()
 
-def test_one_various_data(mongo: MongoDB,plot_name :str, steps=arange(1000,num_records,num_records/10000)):
-	"""
-		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
- 	"""
-	global operation_times, generated_file
-
-	mongo.logger.info("Test one by one with various data "+ plot_name)
-	
-	# On supprime toutes les données de la collection s'il y en a
-	mongo.drop_all()
- 
-	# On extrait toutes les données dont on aura besoin
-	dataset = extract_books_from_file(generated_file,steps[-1])
-	if len(dataset) < steps[-1]:
-		mongo.logger.warning(f"Gathered {len(dataset)} records instead of {step}")
-	
-	tests_data = defaultdict(list)
-
-	try:
-		a=0
-		for step in steps:
-			step = int(step)
-
-			# On arrête si on dépasse le nombre de données disponibles
-			if step > len(dataset):
-				mongo.logger.warning(f"Step {step} > {len(dataset)}")
-				break
-
-			# On va insérer les données  manquantes pour avoir step données initiales dans la base
-			try:
-				if a < step:
-					mongo.create_many(dataset[a:step],silent=True)
-			except Exception as e:
-				mongo.logger.error(f"test_one_various_data : {e}")
-			finally:
-				a = step
-
-			# On nettoie les temps des opérations, 
-			# pour recommencer les mesures
-			operation_times.clear()
-
-			# On procède au test de performance
-			max_id 			 = step +1
-			generate_book.id = max_id
-			book = generate_book(max_id)
-
-			# On nettoie les temps des opérations, 
-			# pour recommencer les mesures
-			operation_times.clear()
-			
-			# On teste l'insertion
-			mongo.create_one(book)
-
-			# On teste la lecture
-			mongo.read_one({"id":book["id"]})
-
-			# On teste la mise à jour
-			new_book = modify_book(book)
-			mongo.update_one({"id":book["id"]}, {"$set": new_book})
-		
-			# On teste la suppression
-			mongo.delete_one({"id":book["id"]})
-
-			# On récupère les temps des opérations et 
-			# On ajoute les données dans le tableau
-			for operation in operation_times:
-				tests_data[operation].extend(operation_times[operation])
-
-	except Exception as e:
-		mongo.logger.error(f"test_one_various_data : operation error -> {e}")
-
-	# On dessine les graphiques
-	try:
-		plot_operation_times(tests_data,steps,plot_name,"test_one_various_data")
-	except Exception as e:
-		mongo.logger.error(f"test_one_various_data : error plotting -> {e}")
- 
-	# On supprime toutes les données de la collection
-	mongo.drop_all()
-
-def test_many_various_data(mongo: MongoDB,plot_name :str, steps=arange(1000,num_records,num_records/10000)):
-	"""
-		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
-	"""
-	global operation_times, generated_file
- 
-	mongo.logger.info("Test many with various data " + plot_name)
-
-	# On supprime toutes les données de la collection s'il y en a
-	mongo.drop_all()
- 
-	# On extrait toutes les données dont on aura besoin
-	dataset = extract_books_from_file(generated_file,steps[-1])
-	if len(dataset) < steps[-1]:
-		mongo.logger.warning(f"Gathered {len(dataset)} records instead of {step}")
-
-	tests_data = defaultdict(list)
-	try:
-		a=0
-		for step in steps:
-			step = int(step)
-
-			# On arrête si on dépasse le nombre de données disponibles
-			if step > len(dataset):
-				mongo.logger.warning(f"Step {step} > {len(dataset)}")
-				break
-
-			# On va insérer les données  manquantes pour avoir step données initiales dans la base
-			try:
-				if a < step:
-					mongo.create_many(dataset[a:step],silent=True)
-			except Exception as e:
-				mongo.logger.error(f"test_one_various_data : {e}")
-			finally:
-				a = step
-	
-			## On procède au test de performance
-
-			# Génère les données à insérer
-			max_id			 = step + 1
-			generate_book.id = max_id
-			books = [generate_book(max_id + i) for i in range(0,num_records_per_many)]
-
-			# Modifie le prix à 0 pour la suppression/lecture exacte de num_records_per_many données
-			# en effet un prix à 0 est impossible pour un livre, ce seront donc les données à supprimer
-			for book in books:
-				book["price"] = 0.0
-
-			# On nettoie les temps des opérations, 
-			# pour prendre les mesures
-			operation_times.clear()
-
-			# On teste l'insertion
-			mongo.create_many(books)
-
-			# On teste la lecture
-			mongo.read_many({"price":0.0})
-
-			# On teste la mise à jour
-			mongo.update_many({"price":0.00}, {"$set": {"genre": "updated"} })
-	
-			# On teste la suppression
-			mongo.delete_many({"price":0.0, "genre": "updated"})
-
-			# Après ces opérations, on est revenu à l'état initial
-			# On a juste les données ajoutées initialement dans la base avant les tests
-	
-			# On récupère les temps des opérations et
-			# on ajoute les données dans le tableau
-			for operation in operation_times:
-				tests_data[operation].extend(operation_times[operation])
-
-	except Exception as e:
-		mongo.logger.error(f"test_many_various_data : operation error -> {e}")
-
-	# On dessine les graphiques
-	try:
-		plot_operation_times(tests_data,steps,plot_name,"test_many_various_data")
-	except Exception as e:
-		mongo.logger.error(f"test_many_various_data: error plotting -> {e}")
-  
-	# On supprime toutes les données de la collection	
-	mongo.drop_all()
-
-def test_indexed(mongo: MongoDB,plot_name :str, test_function,**kwargs):
-	# On définit les index
-	indexes = [ IndexModel("title"),
-				IndexModel("author"),
-				IndexModel("published_date"),
-				IndexModel("genre"),
-				IndexModel("copies_sold"),
-				IndexModel("ran")
-			  ]
-	mongo.logger.debug("Creating indexes...")
- 
-	# On efface tous les index existants
-	mongo.drop_indexes()
- 
-	# On distingue id des autres index car id est utilisé pour le sharding
-	try:
-		mongo.create_index("id",unique=True)
-	except Exception as e:
-		mongo.logger.error(f"Error creating indexes : {e}")
-
-	# On crée les index et si cela échoue, une exception est levée et le test s'arrête
-	mongo.create_indexes(indexes)
-	
-	# on va faire les mêmes tests que précédemment
-	test_function(mongo,plot_name+"_indexed",**kwargs)
-
-def run_tests(mongo: MongoDB, type_test:str, steps=arange(1000,num_records,num_records/10000)):
-	
-	if mongo is None:
-		raise ValueError("MongoDB instance is None")
-
-	# Supprimer les index si existants
-	mongo.drop_indexes()
-	
-	mongo.logger.info(f"Running tests for {type_test}...")
-
-	# Without indexes tests
-	try:
-		change_progression_text("Running "+type_test + "_global_one...")
-		global_test_one(mongo, type_test)
-	except Exception as e:
-		mongo.logger.error(f"Error with global_test_one : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_global_many...")
-		global_test_many(mongo, type_test)
-	except Exception as e:
-		mongo.logger.error(f"Error with global_test_many : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_one...")
-		test_one_various_data(mongo, type_test,steps=steps)
-	except Exception as e:
-		mongo.logger.error(f"Error with test_one_various_data : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_many...")
-		test_many_various_data(mongo, type_test,steps=steps)
-	except Exception as e:
-		mongo.logger.error(f"Error with test_many_various_data : {e}")
-
-	# With indexes tests
-	try:
-		change_progression_text("Running "+type_test + "_global_one_indexed...")
-		test_indexed(mongo, type_test, global_test_one)
-	except Exception as e:
-		mongo.logger.error(f"Error with global_test_one_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_global_many_indexed...")
-		test_indexed(mongo, type_test, global_test_many)
-	except Exception as e:
-		mongo.logger.error(f"Error with global_test_many_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_one_indexed...")
-		test_indexed(mongo, type_test, test_one_various_data,steps=steps)
-	except Exception as e:
-		mongo.logger.error(f"Error with test_one_various_data_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_many_indexed...")
-		test_indexed(mongo, type_test, test_many_various_data,steps=steps)
-	except Exception as e:
-		mongo.logger.error(f"Error with test_many_various_data_indexed : {e}")
-
-	mongo.logger.info(f"Tests for {type_test} done !")
-
-
-def change_progression_text(text:str):
-	"""
-	Change the text of the progression bar
-	"""
-	global operation_lock,operation_Event
-	with operation_lock:
-		print_progress.text = text
-		operation_Event.clear()
-		operation_Event.set()
-
-def print_progress(total,text="Running tests..."):
-	global operations_done, operation_Event, operation_lock
-	print_progress.run = True
- 
-	with alive_bar(total=total,manual=True) as bar:
-		bar.text(text)
-		
-		# Attendre operation_Event
-		while operations_done < total and print_progress.run:
-			operation_Event.wait()
-			operation_Event.clear()
-			with operation_lock:
-				percent = operations_done/total
-			bar(percent)
-			bar.text(print_progress.text)
-
-		bar(1.)
-		bar.text(f"Operations done !")
-print_progress.run		= True
-print_progress.text		="Running tests..."
-
-
-def clean_exit(progress_T:Thread, mysql_clients: list[MongoDB | None] | None = None):
-	"""
-		Arrête le thread et attend sa fin
-	"""
-	if mysql_clients is not None:
-		for mysql in mysql_clients:
-			if mysql is not None:
-				mysql.close()
- 
-	if progress_T is not None:
-		# On arrête le thread
-		with operation_lock:
-			print_progress.run = False
-			operation_Event.clear()
-			operation_Event.set()
-		progress_T.join(timeout=3)
-	else:
-		print("End of tests")
-		exit(0)
+	return results
 
 if __name__ == "__main__":
 
@@ -1026,11 +808,33 @@ if __name__ == "__main__":
  
 	parser = ArgumentParser(description="MongoDB performance tests")
 	parser.add_argument("--verbose",	help="increase output verbosity",	action="store_true")
+	parser.add_argument("--quiet",		help="No progression bar during the tests",	action="store_true")
+	parser.add_argument("--profile",	help="Profile the client during each scenario, saved in profiles/ (cprofile : deterministic, sampling : collapsed stacks for flame graphs)",
+						choices=profilers, default=None)
+	parser.add_argument("--memory",		help="Track the memory of the client during each scenario (rss : resident set size, tracemalloc : also the peak and sites of the Python allocations)",
+						choices=memory_modes, default=None)
+	parser.add_argument("--resume",		help="Resume an interrupted run : the scenarios and steps recorded in checkpoints/ are skipped",	action="store_true")
 	# Ajouter des arguments pour savoir quel(s) test(s) effectuer 
 	parser.add_argument("--standalone", help="Run tests with a standalone",			action="store_true" )
 	parser.add_argument("--replica", 	help="Run tests with replica set",			action="store_true" )
 	parser.add_argument("--sharded", 	help="Run tests with shards ",				action="store_true" )
 	parser.add_argument("--all", 		help="Run tests with all configurations",	action="store_true" )
+	parser.add_argument("--explain",	help="Capture the execution plan of each operation shape",	action="store_true" )
+	parser.add_argument("--metrics-interval",	help="Interval (s) between two serverStatus samples, 0 to disable", type=float, default=0)
+	parser.add_argument("--index-profiles",	help=f"Comma-separated index profiles to test among {', '.join(index_profiles)}", default="none,single")
+	parser.add_argument("--warmup",		help="Unmeasured insert/read/delete cycles before each scenario", type=int, default=0)
+	parser.add_argument("--steady-cv",	help="Continue the warm-up until the coefficient of variation of the last cycles is below this value, 0 to disable", type=float, default=0)
+	parser.add_argument("--trials",		help="Number of passes of each scenario, summarized with a 95%% confidence interval", type=int, default=1)
+	parser.add_argument("--repetitions",	help="Operations per step of the various data tests, each on a random target", type=int, default=step_repetitions)
+	parser.add_argument("--sweep",		help="Data sizes of the various data tests : linear up to the dataset file size, or logarithmic with books generated on the fly", choices=["linear", "log"], default="linear")
+	parser.add_argument("--sweep-min",	help="First size of the logarithmic sweep",	type=int, default=1000)
+	parser.add_argument("--sweep-max",	help="Last size of the logarithmic sweep",	type=int, default=100000000)
+	parser.add_argument("--steps-per-decade",	help="Steps per power of ten of the logarithmic sweep", type=int, default=steps_per_decade)
+	parser.add_argument("--key-distribution",	help="Distribution of the keys read and updated by the scenarios, default : sequential for the global tests, uniform for the various data tests", choices=key_distributions, default=None)
+	parser.add_argument("--workloads",	help=f"Comma-separated YCSB workloads to run among {', '.join(workloads)}", default="")
+	parser.add_argument("--record-count",	help="Records loaded before each workload",	type=int, default=num_records)
+	parser.add_argument("--operation-count",	help="Operations of each workload",		type=int, default=num_records)
+	parser.add_argument("--commit-interval",	help="Writes grouped in each transaction (replica set and sharded cluster), 0 to commit each write", type=int, default=0)
 
 
 	args = parser.parse_args()
@@ -1039,20 +843,24 @@ if __name__ == "__main__":
 		#parser.error("No action requested, add --standalone, --replica, --sharded or --all")
 		args.all = True
 
+	profiles = [profile.strip() for profile in args.index_profiles.split(",") if profile.strip() != ""]
+	for profile in profiles:
+		if profile not in index_profiles:
+			parser.error(f"Unknown index profile {profile}, available : {', '.join(index_profiles)}")
+
 	# On part avec O données initiales et on veut 100 mesures intermédiaires jusqu'à num_records
 	# On aura donc un besoin d'un pas de (num_records - 0)/nb_measurements
 	steps	= arange(0,num_records,num_records/nb_measurements,dtype=int)
+	# Balayage logarithmique, avec des livres générés à la volée, pour dépasser le cache WiredTiger
+	if args.sweep == "log":
+		steps = geometric_steps(args.sweep_min, args.sweep_max, args.steps_per_decade)
 	size 	= len(steps) # Nombre de mesures intermédiaires : nb_measurements
  
 	# Calcul le nombre total d'opérations à effectuer pour l'affichage de la progression pour une instance de test
-	# 2* à chaque fois car test avec et sans index, 4 fois car 4 tests
-	total_test_various_one 	= 2 * 4 * size
-	total_test_various_many = 2 * 4 * size
-	total_test_one			= 2 * 4 * num_records
-	#	num_records/num_records_per_many insertion de num_records_per_many données
-	#	num_records_per_many CRUD operations
-	total_test_many 		= 2 * ( num_records/num_records_per_many + 3 * num_records_per_many)
-	total 					= int(total_test_various_one + total_test_various_many + total_test_one + total_test_many )
+	nb_profiles				= len(profiles)
+	# Une série de num_records_per_many lectures par configuration de lecture
+	total_test_read_tuning	= nb_profiles * len(read_tuning_projections) * len(read_tuning_batch_sizes) * len(read_tuning_raw_modes) * num_records_per_many
+	total 					= total_operations(nb_profiles, size, args.trials, args.repetitions) + total_test_read_tuning * max(1, args.trials)
 	coeff = 0
  
 	if args.standalone or args.all:
@@ -1062,14 +870,24 @@ if __name__ == "__main__":
 	if args.sharded or args.all:
 		coeff += 1
 
+	# Charges de travail YCSB, ajoutées aux scénarios communs
+	names = [name.strip().lower() for name in args.workloads.split(",") if name.strip() != ""]
+	for name in names:
+		if name not in workloads:
+			parser.error(f"Unknown workload {name}, available : {', '.join(workloads)}")
+	total += nb_profiles * total_workload_operations(names, args.operation_count) * max(1, args.trials)
+
 	# On multiplie par le nombre de tests
 	total *= coeff
 
 	# On crée les instances de MongoDB
 	mongo_standalone, mongo_replica, mongo_sharded =  None, None, None
+	# Scénarios propres à MongoDB, ajoutés aux scénarios communs
+	mongo_scenarios = [("read_tuning", test_read_tuning, {})] + workload_scenarios(names, args.record_count, args.operation_count)
 
 	# On crée un thread pour afficher la progression
-	progress_T = Thread(target=print_progress, args=((total,)) )
+	# sauf en mode silencieux
+	progress_T = None if args.quiet else Thread(target=print_progress, args=((total,)) )
 	
 	# On intercepte les signaux pour arrêter proprement le thread
 	signal(SIGINT, lambda sig, frame: clean_exit(progress_T, [mongo_standalone, mongo_replica, mongo_sharded]))
@@ -1077,7 +895,8 @@ if __name__ == "__main__":
  
 	# On démarre le thread de progression
 	print("Running tests ...")
-	progress_T.start()
+	if progress_T is not None:
+		progress_T.start()
 	
 	# On définit le niveau de log
 	debug_level = DEBUG if args.verbose else INFO
@@ -1087,45 +906,55 @@ if __name__ == "__main__":
 		sharded_dbg_mode = "a"
 		replica_dbg_mode = "a" if args.standalone else "w"
   
+	# Vrai si le test d'une topologie a échoué : le code de retour est alors non nul (cf start-test.sh)
+	failed = False
 	if args.standalone or args.all:
 		try:
-			mongo_standalone = MongoDB(debug_level=debug_level,debug_file_mode=alone_dbg_mode)
+			mongo_standalone = MongoDB(debug_level=debug_level,debug_file_mode=alone_dbg_mode,capture_plans=args.explain)
+			mongo_standalone.set_commit_interval(args.commit_interval)
 			change_progression_text("Tests en mode standalone...")
-			run_tests(mongo_standalone, "standalone" ,steps=steps)
+			run_tests(mongo_standalone, "standalone" + commit_suffix(mongo_standalone),steps=steps, profiles=profiles, metrics_interval=args.metrics_interval, extra_scenarios=mongo_scenarios,
+					  warmup_operations=args.warmup, steady_cv=args.steady_cv, trials=args.trials, repetitions=args.repetitions,
+					  generated=(args.sweep == "log"), key_distribution=args.key_distribution, profiler=args.profile, memory=args.memory, resume=args.resume)
 		except Exception as e:
 			print(f"Erreur avec le test en standalone: {e}")
+			failed = True
 		finally:
 			if mongo_standalone is not None:
 				mongo_standalone.close()
 	
 	if args.replica or args.all:
 		try:
-			mongo_replica = MongoDB(using_replica_set=True,debug_level=debug_level,debug_file_mode=alone_dbg_mode)
+			mongo_replica = MongoDB(using_replica_set=True,debug_level=debug_level,debug_file_mode=alone_dbg_mode,capture_plans=args.explain)
+			mongo_replica.set_commit_interval(args.commit_interval)
 			change_progression_text("Tests en mode Replica...")
-			run_tests(mongo_replica, "replica_set", steps=steps)
+			run_tests(mongo_replica, "replica_set" + commit_suffix(mongo_replica), steps=steps, profiles=profiles, metrics_interval=args.metrics_interval, extra_scenarios=mongo_scenarios,
+					  warmup_operations=args.warmup, steady_cv=args.steady_cv, trials=args.trials, repetitions=args.repetitions,
+					  generated=(args.sweep == "log"), key_distribution=args.key_distribution, profiler=args.profile, memory=args.memory, resume=args.resume)
 		except Exception as e:
 			print(f"Erreur avec le test avec Replica Set: {e}")
+			failed = True
 		finally:
 			if mongo_replica is not None:
 				del mongo_replica
 
 	if args.sharded or args.all:
 		try:
-			mongo_sharded = MongoDB(using_sharded_cluster=True,debug_level=debug_level,debug_file_mode=alone_dbg_mode)
+			mongo_sharded = MongoDB(using_sharded_cluster=True,debug_level=debug_level,debug_file_mode=alone_dbg_mode,capture_plans=args.explain)
+			mongo_sharded.set_commit_interval(args.commit_interval)
 			change_progression_text("Tests en mode Sharded...")
-			run_tests(mongo_sharded, "sharding", steps=steps)
+			run_tests(mongo_sharded, "sharding" + commit_suffix(mongo_sharded), steps=steps, profiles=profiles, metrics_interval=args.metrics_interval, extra_scenarios=mongo_scenarios,
+					  warmup_operations=args.warmup, steady_cv=args.steady_cv, trials=args.trials, repetitions=args.repetitions,
+					  generated=(args.sweep == "log"), key_distribution=args.key_distribution, profiler=args.profile, memory=args.memory, resume=args.resume)
 		except Exception as e:
 			print(f"Erreur avec le test avec Shards: {e}")
+			failed = True
 		finally:
 			if mongo_sharded is not None:
 				del mongo_sharded
 
 	# On finit le thread de progression
-	with operation_lock:
-		print_progress.run = False
-		operation_Event.clear()
-		operation_Event.set()
-
-	progress_T.join(timeout=3)
+	stop_progress(progress_T)
 	
-	print("End of tests !")
\ No newline at end of file
+	print("End of tests !")
+	exit(1 if failed else 0)
@@ -1,66 +1,108 @@
 
-from os import getenv, makedirs, path, remove
+from os import getenv, makedirs
 from dotenv import load_dotenv
+import json
 from argparse import ArgumentParser
 
 # For handling signals
 from signal import signal, SIGINT, SIGTERM
 
 import pymysql
-from time import perf_counter_ns as time_ns
-from collections import defaultdict
+from pymysql.cursors import SSCursor
+from time import perf_counter_ns as time_ns, sleep
+from re import search as re_search
 
 # For statistics
-from numpy import arange, median as np_median, mean as np_mean, std as np_std ,percentile
-from numpy.random import normal
+from numpy import arange, median as np_median
 
 # For generating data and handling data
-from generate_data import extract_books_from_file, extract_updated_books_from_file ,generated_file, updated_file
-from generate_data import generate_book, modify_book #, Book 
+from generate_data import extract_books_from_file, generated_file
 from generate_data import num_records, num_records_per_many, nb_measurements
-from generate_data import  get_configuration
+from generate_data import  get_configuration, genres
 
-# for graphing
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
-from matplotlib.lines import Line2D
-
-# For system information
-from platform import system, release, machine, architecture, python_version
-from psutil import cpu_count, virtual_memory
-from cpuinfo import get_cpu_info
+# Banc de test commun : enregistrement des mesures, scénarios et progression
+from benchmark import Backend, operation_times, client_operation_times, query_plans, variants_report, save_results, save_query_plans
+from benchmark import add_operation_time, add_client_operation_time
+from workload import workloads, workload_scenarios, total_workload_operations
+from key_chooser import key_distributions
+from benchmark import queued_handler, logs_dir
+from benchmark import run_tests, commit_suffix, total_operations, step_repetitions, steps_per_decade, geometric_steps, count_operation, change_progression_text, print_progress, stop_progress, clean_exit, profilers, memory_modes
 
 # For logging
 from logging import getLogger, Formatter, INFO, DEBUG, ERROR, FileHandler
 from sys import stderr
 
-# For animation
-from alive_progress import alive_bar
-from threading import Thread, Lock, Event
+from threading import Thread
 
 
-operation_times		= defaultdict(list)
-system_info			= ""
-operations_done		= 0
-operation_lock		= Lock()
-operation_Event		= Event()
+# Sonde de retard de réplication : attente maximale (s) et intervalle (s) entre deux lectures d'un réplica
+replication_lag_timeout	= 10
+replication_lag_poll	= 0.001
 
 
-def add_operation_time(operation, time):
+def summarize_explain_analyze(tree: str) -> dict:
+	"""
+	Keep the useful information of an EXPLAIN ANALYZE tree
+	The first node gives the rows returned, the largest node the rows examined
+	"""
+	stages, rows = [], []
+	for line in tree.splitlines():
+		node = re_search(r"->\s*(.+?)\s+(?:\(cost=[^)]*\)\s*)?\(actual time=[\d.e+-]+\.\.[\d.e+-]+ rows=([\d.e+-]+) loops=(\d+)\)", line)
+		if node is None:
+			continue
+		stages.append(node.group(1))
+		rows.append(float(node.group(2)) * int(node.group(3)))
+	return {	"stages"		: stages,
+				"rows_examined"	: max(rows) if rows else None,
+				"returned"		: rows[0] if rows else None,
+				"estimated"		: False,
+				"plan"			: tree
+		   }
+
+def summarize_explain_json(plan: dict) -> dict:
+	"""
+	Keep the useful information of an EXPLAIN FORMAT=JSON plan (estimations of the optimizer)
 	"""
-	Add the time of an operation
+	table = plan.get("query_block", {}).get("table", {})
+	return {	"stages"		: [f"{table.get('access_type', '?')} on {table.get('table_name', '?')} using {table.get('key', 'no key')}"],
+				"rows_examined"	: table.get("rows_examined_per_scan"),
+				"returned"		: None,
+				"estimated"		: True,
+				"plan"			: plan
+		   }
+
+class ReplicaConnections:
 	"""
-	global operation_times
-	# Convert nanoseconds time to microseconds
-	time = time/1000
-	operation_times[operation].append(time)
+	Writer and replica connections of the replication lag probe, closed together
+	"""
+
+	def __init__(self, writer, readers: list):
+		self.writer		= writer
+		self.readers	= readers
 
-class MySQL:
+	def cursor(self):
+		return self.writer.cursor()
+
+	def close(self):
+		for connection in [self.writer] + self.readers:
+			connection.close()
 
-	def __init__(self, using_replica=False, using_shard=False,debug_level=INFO,dbg_file_mode="w"):
+class MySQL(Backend):
+
+	name = "MySQL"
+
+	def __init__(self, using_replica=False, using_shard=False,debug_level=INFO,dbg_file_mode="w",capture_plans=False,schema="no_pk",engine=None):
 		
+		# Profil de schéma de la table (cf schema_profiles)
+		self.schema = schema
+		# Moteur de stockage de la table (cf storage_engines), None pour le moteur par défaut du serveur
+		self.engine = engine
+		# Capture des plans d'exécution
+		self.capture_plans = capture_plans
 		self.connection = None
+		self.readers	= []
 		self.db 		= None
+		self.table		= None
 		self.host 		= None
 		self.user 		= None
 		self.password 	= None
@@ -68,18 +110,28 @@ class MySQL:
 		self.logger		= getLogger("MySQL")
 		self.logger.setLevel(debug_level)
 		try:
+			makedirs(logs_dir, exist_ok=True)
 			f 	= Formatter(fmt='[%(levelname)s] %(filename)s:%(lineno)d - %(message)s')
-			fh 	= FileHandler("logs/mysql-tests.log",mode=dbg_file_mode)
+			fh 	= FileHandler(f"{logs_dir}/mysql-tests.log",mode=dbg_file_mode)
 			fh.setFormatter(f)
-			self.logger.addHandler(fh)
+			# Écriture des journaux en arrière-plan
+			self.logger.addHandler(queued_handler(fh))
 
 		except Exception as e:
 			self.logger.error("Error creating log file", e)
 		
 		try:
 			load_dotenv()
+			self.port 		= int(getenv("MYSQL_PORT", 3306))
+			# Réplicas interrogés par les lectures, (hôte, port)
+			self.reader_addresses = []
 			if using_replica:
 				self.host = getenv("MYSQL_REPLICA_HOST", "localhost")
+				self.port = int(getenv("MYSQL_REPLICA_PORT", self.port))
+				for reader in getenv("MYSQL_REPLICA_READERS", "").split(","):
+					if reader.strip() != "":
+						host, _, port = reader.strip().partition(":")
+						self.reader_addresses.append((host, int(port or self.port)))
 			elif using_shard:
 				self.host = getenv("MYSQL_SHARD_HOST", "localhost")
 			else:
@@ -87,36 +139,27 @@ class MySQL:
 
 			self.user 		= getenv("MYSQL_USER", "root")
 			self.db 		= getenv("MYSQL_DATABASE", "test")
+			# Une table par moteur de stockage, la table d'origine porte le nom de la base
+			self.table		= self.db if engine is None else f"{self.db}_{engine}"
 			self.password 	= getenv("MYSQL_PASSWORD", "")
-			self.port 		= int(getenv("MYSQL_PORT", 3306))
 
 		except Exception as e:
 			self.logger.error("Error loading environment variables: %s", e)
 			raise Exception("Error loading environment variables")
 		
 		try:
-			self.connection = pymysql.connect(
-				host=self.host,
-				user=self.user,
-				database=self.db,
-				password=self.password,
-				port=self.port,
-				autocommit=True,
-			)
+			self.connection = self.open_connection()
+			# Connexions de lecture, une par réplica
+			self.readers		= [self.open_connection(host, port) for host, port in self.reader_addresses]
+			self.next_reader	= 0
 
 			# Création de la table si elle n'existe pas
 			with self.connection.cursor() as cursor:
-				cursor.execute(f"""CREATE TABLE IF NOT EXISTS {self.db} (
-					id 				INT 			NOT NULL,
-					title 			VARCHAR(255) 	NOT NULL,
-					author 			VARCHAR(255) 	NOT NULL,
-					published_date 	DATE 			NOT NULL,
-					genre 			VARCHAR(255) 	NOT NULL,
-					price 			FLOAT 			NOT NULL,
-					copies_sold 	INT 			NOT NULL,
-					ran 			INT 			NOT NULL
-				)""")
-				#rows = cursor.execute(f"DESCRIBE {self.db}")
+				cursor.execute(table_definition(self.table, self.schema, self.engine))
+				# Table du battement de cœur de la sonde de retard de réplication
+				if len(self.readers) > 0:
+					cursor.execute(f"CREATE TABLE IF NOT EXISTS `{self.db}_heartbeat` (id INT NOT NULL PRIMARY KEY, beat BIGINT NOT NULL)")
+				#rows = cursor.execute(f"DESCRIBE {self.table}")
 				#self.logger.info(f"Table description : {rows} columns")
 				#for row in cursor.fetchall():
 				#	self.logger.info(f"\t {row}")
@@ -134,15 +177,162 @@ class MySQL:
 	def __del__(self):
 		self.close()
 
-	def __update_operation_count(self):
-		global operations_done, operation_Event, operation_lock
-		with operation_lock:
-			operations_done += 1
-			operation_Event.clear()
-			operation_Event.set()
+	def open_connection(self, host: str | None = None, port: int | None = None):
+		"""
+		Open a new connection to the database of this instance
+		:param host: the server, the writer of this instance if None
+		"""
+		return pymysql.connect(
+			host=self.host if host is None else host,
+			user=self.user,
+			database=self.db,
+			password=self.password,
+			port=self.port if port is None else port,
+			autocommit=True,
+		)
+
+	def read_connection(self):
+		"""
+		Connection of the next read : the replicas in turn (round-robin),
+		the writer without replica or inside a transaction, to read its own writes
+		"""
+		if len(self.readers) == 0 or self.in_transaction:
+			return self.connection
+		self.next_reader = (self.next_reader + 1) % len(self.readers)
+		return self.readers[self.next_reader]
+
+	def metrics_connection(self):
+		"""
+		Connection dedicated to ServerMetricsSampler, pymysql connections are not thread safe
+		With replicas, the sampler also gets its own reader connections for the replication lag probe
+		"""
+		if len(self.reader_addresses) > 0:
+			return ReplicaConnections(self.open_connection(), [self.open_connection(host, port) for host, port in self.reader_addresses])
+		return self.open_connection()
+
+	def replication_lag(self, connections) -> dict:
+		"""
+		Replication lag of each replica : a heartbeat is written on the writer,
+		then each replica is polled until it reads it
+		:param connections: ReplicaConnections dedicated to the probe
+		:return: {"replication_lag_us_<i>": lag in µs, missing after replication_lag_timeout, "seconds_behind_source_<i>": ...}
+		"""
+		lag = {}
+		beat = time_ns()
+		with connections.writer.cursor() as cursor:
+			cursor.execute(f"REPLACE INTO `{self.db}_heartbeat` (id, beat) VALUES (1, %s)", (beat,))
+		start_time = time_ns()
+
+		for i, reader in enumerate(connections.readers):
+			with reader.cursor() as cursor:
+				while time_ns() - start_time < replication_lag_timeout*1e9:
+					cursor.execute(f"SELECT beat FROM `{self.db}_heartbeat` WHERE id = 1")
+					row = cursor.fetchone()
+					if row is not None and row[0] >= beat:
+						lag[f"replication_lag_us_{i}"] = (time_ns() - start_time)/1000
+						break
+					sleep(replication_lag_poll)
+				else:
+					self.logger.warning(f"Replica {i} did not receive the heartbeat within {replication_lag_timeout} s")
+
+				# Estimation du serveur, à la seconde près
+				try:
+					cursor.execute("SHOW REPLICA STATUS")
+					row = cursor.fetchone()
+					if row is not None:
+						status = dict(zip([column[0] for column in cursor.description], row))
+						if status.get("Seconds_Behind_Source") is not None:
+							lag[f"seconds_behind_source_{i}"] = float(status["Seconds_Behind_Source"])
+				except pymysql.Error as e:
+					self.logger.debug(f"No replica status : {e}")
+		return lag
+
+	def server_metrics(self, connection=None) -> dict:
+		"""
+		Sample the server counters used to explain latency spikes
+		(InnoDB buffer pool and redo log, row locks, NDB waits and redo log usage)
+		:param connection: a connection dedicated to sampling (cf metrics_connection), the connection of the instance if None
+		"""
+		if connection is None:
+			connection = self.connection
+		metrics = {}
+		with connection.cursor() as cursor:
+			cursor.execute(	"SHOW GLOBAL STATUS WHERE Variable_name IN ("\
+							"'Innodb_buffer_pool_reads', 'Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_wait_free', "\
+							"'Innodb_buffer_pool_pages_dirty', 'Innodb_buffer_pool_pages_free', 'Innodb_buffer_pool_pages_flushed', "\
+							"'Innodb_os_log_written', 'Innodb_log_waits', 'Innodb_data_fsyncs', 'Innodb_row_lock_waits', "\
+							"'Innodb_row_lock_time', 'Threads_running', 'Questions') "\
+							"OR Variable_name LIKE 'Ndb_api_wait%'")
+			for name, value in cursor.fetchall():
+				try:
+					metrics[name] = float(value)
+				except ValueError:
+					metrics[name] = value
+
+			# Attente sur les fichiers InnoDB (picosecondes)
+			try:
+				cursor.execute(	"SELECT SUM(COUNT_STAR), SUM(SUM_TIMER_WAIT) FROM performance_schema.file_summary_by_event_name "\
+								"WHERE EVENT_NAME LIKE 'wait/io/file/innodb/%'")
+				count, wait = cursor.fetchone()
+				metrics["innodb_file_io_count"]		= float(count or 0)
+				metrics["innodb_file_io_wait_ps"]	= float(wait or 0)
+			except pymysql.Error:
+				pass
+
+			# Remplissage du redo log NDB, uniquement sur MySQL Cluster
+			try:
+				cursor.execute("SELECT SUM(used), SUM(total) FROM ndbinfo.logspaces WHERE log_type = 'REDO'")
+				used, total = cursor.fetchone()
+				if total:
+					metrics["ndb_redo_used_ratio"] = float(used)/float(total)
+			except pymysql.Error:
+				pass
+
+		# Retard de chaque réplica
+		if isinstance(connection, ReplicaConnections):
+			metrics.update(self.replication_lag(connection))
+		return metrics
+
+	def __capture_plan(self, operation: str, keys, sql: str, params=None, columns: list[str] | None = None) -> int:
+		"""
+		Capture the execution plan once per operation shape when capture_plans is set
+		SELECT statements go through EXPLAIN ANALYZE, UPDATE and DELETE through EXPLAIN FORMAT=JSON
+		since EXPLAIN ANALYZE would run the modification
+		SELECT statements are explained on a read connection (a replica if any), where they run
+		:param columns: the selected columns, all columns if None
+		:return: the time spent capturing the plan (ns), to leave it out of the measures
+		"""
+		if not self.capture_plans:
+			return 0
+
+		shape = f"{operation}({', '.join(sorted(keys))})"
+		if columns is not None:
+			shape += f" -> ({', '.join(sorted(columns))})"
+		if shape in query_plans:
+			return 0
+
+		# Les lectures sont expliquées là où elles s'exécutent (réplicas s'il y en a)
+		select		= sql.lstrip().upper().startswith("SELECT")
+		connection	= self.read_connection() if select else self.connection
+		start_time	= time_ns()
+		try:
+			with connection.cursor() as cursor:
+				if select:
+					cursor.execute(f"EXPLAIN ANALYZE {sql}", params)
+					query_plans[shape] = summarize_explain_analyze("\n".join(row[0] for row in cursor.fetchall()))
+				else:
+					cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", params)
+					query_plans[shape] = summarize_explain_json(json.loads(cursor.fetchone()[0]))
+			self.logger.debug(f"Plan for {shape} : {query_plans[shape]['stages']}")
+		except Exception as e:
+			self.logger.error(f"Error capturing plan of {shape} : {e}")
+		return time_ns() - start_time
 
 	def close(self):
 		try:
+			for reader in self.readers:
+				reader.close()
+			self.readers = []
 			if self.connection:
 				self.connection.close()
 			self.logger.info("MySQL connection closed")
@@ -155,26 +345,30 @@ class MySQL:
 		"""
 		try:
 			if not silent:
-				self.__update_operation_count()
+				count_operation()
 
+			self.before_write()
+			client_start = time_ns()
 			if not isinstance(data, dict):
-				self.logger.error(f"Data is not a dict: {type(data)} - {data}")
+				self.logger.error("Data is not a dict: %s - %s", type(data), data)
 
 			with self.connection.cursor() as cursor:
-				sql = 	f"INSERT INTO {self.db} (id,title, author, published_date, genre, price, copies_sold,ran) "\
+				sql = 	f"INSERT INTO {self.table} (id,title, author, published_date, genre, price, copies_sold,ran) "\
 						f"VALUES (%(id)s, %(title)s, %(author)s, %(published_date)s, %(genre)s, %(price)s, %(copies_sold)s, %(ran)s)"
 
 				start_time	= time_ns()
 				rows		= cursor.execute(sql, data)
 				end_time 	= time_ns()
 				add_operation_time("insert", end_time-start_time)
+				add_client_operation_time("insert", end_time-client_start)
+				self.after_write()
 
-				self.logger.debug(f"inserted {rows} record: ", data)
+				self.logger.debug("inserted %s record: %s", rows, data)
     
 		except Exception as e:
 			self.logger.error("Error creating one record: %s", e)
-			self.logger.error(f"\t sql : {sql}")
-			self.logger.error(f"\t data : {data}")
+			self.logger.error("\t sql : %s", sql)
+			self.logger.error("\t data : %s", data)
 
 	def create_many(self, data: list[dict],silent = False):
 		"""
@@ -182,25 +376,49 @@ class MySQL:
 		"""
 		try:
 			if not silent:
-				self.__update_operation_count()
+				count_operation()
+			self.before_write()
+			client_start = time_ns()
 			with self.connection.cursor() as cursor:
-				sql =	f"INSERT INTO {self.db} (id,title, author, published_date, genre, price, copies_sold,ran) "\
+				sql =	f"INSERT INTO {self.table} (id,title, author, published_date, genre, price, copies_sold,ran) "\
 						f"VALUES (%(id)s, %(title)s, %(author)s, %(published_date)s, %(genre)s, %(price)s, %(copies_sold)s, %(ran)s)"
 				start_time = time_ns()
 				rows = cursor.executemany(sql, data)
 				end_time = time_ns()
 				add_operation_time("insert", end_time-start_time)
-				self.logger.debug(f"inserted {rows} records: %s", data)
+				add_client_operation_time("insert", end_time-client_start)
+				self.after_write()
+				self.logger.debug("inserted %s records: %s", rows, data)
     
 		except Exception as e:
 			self.logger.error("Error creating many records: %s", e)
 
+	def bulk_load(self, data: list[dict]):
+		"""
+		Insert records in a single transaction, to fill the table between two steps
+		executemany sends them as multi-row INSERT statements
+		"""
+		try:
+			# Les écritures groupées en attente sont validées avant
+			self.flush_writes()
+			self.connection.begin()
+			with self.connection.cursor() as cursor:
+				sql =	f"INSERT INTO {self.table} (id,title, author, published_date, genre, price, copies_sold,ran) "\
+						f"VALUES (%(id)s, %(title)s, %(author)s, %(published_date)s, %(genre)s, %(price)s, %(copies_sold)s, %(ran)s)"
+				cursor.executemany(sql, data)
+			self.connection.commit()
+		except Exception as e:
+			self.connection.rollback()
+			self.logger.error("Error bulk loading %s records: %s", len(data), e)
+
 	def update_one(self, original : dict, updated : dict):
 		"""
 		Update one record in the database
 		"""
 		try:
-			self.__update_operation_count()
+			count_operation()
+			self.before_write()
+			client_start = time_ns()
 			with self.connection.cursor() as cursor:
 
 				conditions = ""
@@ -213,16 +431,20 @@ class MySQL:
 					new_values += f'{key}="{updated[key]}", '
 				new_values = new_values[:-2]
 
-				sql = 	f"UPDATE {self.db} "\
+				sql = 	f"UPDATE {self.table} "\
 						f"SET {new_values} "\
 						f"WHERE {conditions} LIMIT 1"
        
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("update_one", original, sql, None)
 				start_time = time_ns()
 				nb_rows_affected = cursor.execute(sql)
 				end_time = time_ns()
 				add_operation_time("update", end_time-start_time)
+				add_client_operation_time("update", end_time-client_start)
+				self.after_write()
 
-				self.logger.debug(f"updated {nb_rows_affected} record: %s", updated)
+				self.logger.debug("updated %s record: %s", nb_rows_affected, updated)
 
 		except Exception as e:
 			self.logger.error("Error updating one record: %s", e)
@@ -232,7 +454,9 @@ class MySQL:
 		Update many records in the database
 		"""
 		try:
-			self.__update_operation_count()
+			count_operation()
+			self.before_write()
+			client_start = time_ns()
 
 			if not isinstance(updated, list):
 				updated = [updated]
@@ -249,16 +473,20 @@ class MySQL:
 					new_values += f'{key}=%({key})s, '
 				new_values = new_values[:-2]
 
-				sql = 	f"UPDATE {self.db} "\
+				sql = 	f"UPDATE {self.table} "\
 						f"SET {new_values} "\
 						f"WHERE {conditions}"
 
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("update_many", original, sql, updated[0])
 				start_time	= time_ns()
 				nb_rows_affected = cursor.executemany(sql, updated)
 				end_time	= time_ns()
 				add_operation_time("update", end_time-start_time)
+				add_client_operation_time("update", end_time-client_start)
+				self.after_write()
 	
-				self.logger.debug(f"updated {nb_rows_affected} records: ", updated)
+				self.logger.debug("updated %s records: %s", nb_rows_affected, updated)
 
 		except Exception as e:
 			self.logger.error("Error updating many records: %s", e)
@@ -268,33 +496,41 @@ class MySQL:
 		Delete one record in the database
 		"""
 		try:
-			self.__update_operation_count()
+			count_operation()
+			self.before_write()
+			client_start = time_ns()
 			with self.connection.cursor() as cursor:
 				conditions=""
 				for key in data:
 					conditions += f'{key}="{data[key]}" AND '
 				conditions = conditions[:-4]
     
-				sql = 	f"DELETE FROM {self.db} "\
+				sql = 	f"DELETE FROM {self.table} "\
 						f"WHERE {conditions} "\
 						f"LIMIT 1"
 				
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("delete_one", data, sql, None)
 				start_time = time_ns()
 				rows = cursor.execute(sql)
 				end_time = time_ns()
 				add_operation_time("delete", end_time-start_time)
+				add_client_operation_time("delete", end_time-client_start)
+				self.after_write()
 
-				self.logger.debug(f"deleted {rows} record: ", data)
+				self.logger.debug("deleted %s record: %s", rows, data)
 		except Exception as e:
 			self.logger.error("Error deleting one record: %s", e)
-			self.logger.error(f"\t sql : {sql}")
+			self.logger.error("\t sql : %s", sql)
 
 	def delete_many(self, data: list[dict] | dict):
 		"""
 		Delete many records in the database
 		"""
 		try:
-			self.__update_operation_count()
+			count_operation()
+			self.before_write()
+			client_start = time_ns()
 			if not isinstance(data, list):
 				data = [data]
 			with self.connection.cursor() as cursor:
@@ -303,58 +539,70 @@ class MySQL:
 					conditions += f'{key}=%({key})s AND '
 				conditions = conditions[:-4]
 
-				sql = f"DELETE FROM {self.db} WHERE {conditions}"
+				sql = f"DELETE FROM {self.table} WHERE {conditions}"
 
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("delete_many", data[0], sql, data[0])
 				start_time = time_ns()
 				rows = cursor.executemany(sql, data)
 				end_time = time_ns()
 				add_operation_time("delete", end_time-start_time)
+				add_client_operation_time("delete", end_time-client_start)
+				self.after_write()
 	
-				self.logger.debug(f"deleted {rows} records: %s", data)
+				self.logger.debug("deleted %s records: %s", rows, data)
 		except Exception as e:
 			self.logger.error("Error deleting many records: %s", e)
-			self.logger.error(f"\t sql : {sql}")
+			self.logger.error("\t sql : %s", sql)
 
 	def read_one(self, data: dict, print_result: bool =False):
 		"""
 		Select one record in the database
 		"""
 		try:
-			self.__update_operation_count()
-			with self.connection.cursor() as cursor:
+			count_operation()
+			client_start = time_ns()
+			# Curseur non bufferisé : execute rend la main à l'arrivée de l'en-tête du résultat,
+			# la lecture des lignes n'est comptée que dans le temps client
+			with self.read_connection().cursor(SSCursor) as cursor:
 				conditions = ""
 				for key in data:
-					conditions += f'{key}="{key}" AND '
+					conditions += f'{key}=%({key})s AND '
 				conditions = conditions[:-4]
 
-				sql = 	f"SELECT * FROM {self.db} "\
+				sql = 	f"SELECT * FROM {self.table} "\
 						f"WHERE {conditions}"
 		
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("find_one", data, sql, data)
 				start_time = time_ns()
-				rows = cursor.execute(sql)
+				cursor.execute(sql, data)
 				end_time = time_ns()
 				add_operation_time("find", end_time-start_time)
 				result = cursor.fetchone()
+				add_client_operation_time("find", time_ns()-client_start)
 				if print_result:
-					self.logger.debug(f"selected {rows} record: ", data)
-					self.logger.info(f"result: {result}")
+					self.logger.debug("selected record: %s", data)
+					self.logger.info("result: %s", result)
 					
 				return result
 
 		except Exception as e:
 			self.logger.error("Error selecting one record: %s", e)
-			self.logger.error(f"\t sql : {sql}")
-			self.logger.error(f"\t data : {data}")
+			self.logger.error("\t sql : %s", sql)
+			self.logger.error("\t data : %s", data)
 	
-	def read_many(self, data: list[dict] | dict, print_result : bool =False):
+	def read_many(self, data: list[dict] | dict, print_result : bool =False, columns: list[str] | None = None):
 		"""
 		Select many records in the database
+		:param columns: the columns to return, all columns if None
 		"""
 		try:
-			self.__update_operation_count()
+			count_operation()
+			client_start = time_ns()
 			if not isinstance(data, list):
 				data = [data]
-			with self.connection.cursor() as cursor:
+			with self.read_connection().cursor(SSCursor) as cursor:
 				# On récupère les clés des données
 				keys = ""
 				values = ""
@@ -365,56 +613,102 @@ class MySQL:
 				keys = keys[:-1]
 				values = values[:-1]
 
-				sql =	f"SELECT * FROM {self.db} "\
+				sql =	f"SELECT {'*' if columns is None else ', '.join(columns)} FROM {self.table} "\
 						f"WHERE ({keys}) = ({values})"
 
 				#values = [(d.ran) for d in data]
 
-				start_time = time_ns()
-				rows = cursor.executemany(sql,data)
-				end_time = time_ns()
-				add_operation_time("find", end_time-start_time)
-			
-				result = cursor.fetchall()
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("find_many", data[0], sql, data[0], columns)
+				# Un résultat non bufferisé doit être lu avant la requête suivante :
+				# seul le temps des execute est compté dans le temps serveur
+				server_time	= 0
+				result		= []
+				for params in data:
+					start_time = time_ns()
+					cursor.execute(sql, params)
+					server_time += time_ns() - start_time
+					result.extend(cursor.fetchall())
+				add_operation_time("find", server_time)
+				add_client_operation_time("find", time_ns()-client_start)
 				if print_result:
-					self.logger.debug(f"selected {rows} records: %s", data)
-					self.logger.info(f"result: {result}")
+					self.logger.debug("selected %s records: %s", len(result), data)
+					self.logger.info("result: %s", result)
 					
-				return cursor.fetchall()
+				return result
 		except Exception as e:
 			self.logger.error("Error selecting many records: %s", e)
-			self.logger.error(f"\t sql : {sql}")
+			self.logger.error("\t sql : %s", sql)
 	
+	def scan(self, start_id: int, count: int, print_result: bool = False):
+		"""
+		Select count records in id order, from start_id
+		"""
+		try:
+			count_operation()
+			client_start = time_ns()
+			with self.read_connection().cursor(SSCursor) as cursor:
+				sql =	f"SELECT * FROM {self.table} "\
+						f"WHERE id >= %(start_id)s ORDER BY id LIMIT %(count)s"
+				params = {"start_id": start_id, "count": count}
+
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("scan", ["id"], sql, params)
+				start_time = time_ns()
+				cursor.execute(sql, params)
+				end_time = time_ns()
+				add_operation_time("scan", end_time-start_time)
+
+				result = cursor.fetchall()
+				add_client_operation_time("scan", time_ns()-client_start)
+				if print_result:
+					self.logger.info("result: %s", result)
+				return result
+		except Exception as e:
+			self.logger.error("Error scanning records: %s", e)
+
 	def read(self, print_result=True):
 		"""
 		Select all records in the database
 		"""
 		try:
-			self.__update_operation_count()
-			with self.connection.cursor() as cursor:
-				sql = f"SELECT * FROM {self.db}"
+			count_operation()
+			client_start = time_ns()
+			with self.read_connection().cursor(SSCursor) as cursor:
+				sql = f"SELECT * FROM {self.table}"
+				# On ne compte pas le temps de capture du plan dans le temps client
+				client_start += self.__capture_plan("find_all", [], sql, None)
 				start_time = time_ns()
-				rows = cursor.execute(sql)
+				cursor.execute(sql)
 				end_time = time_ns()
 				add_operation_time("find", end_time-start_time)
+				result = cursor.fetchall()
+				add_client_operation_time("find", time_ns()-client_start)
 	
 				if print_result:
-					self.logger.debug(f"selected {rows} records: %s", cursor.fetchall())
+					self.logger.debug("selected %s records: %s", len(result), result)
+
+				return result
 
 		except Exception as e:
 			self.logger.error("Error selecting records: %s", e)
 	
-	def create_index(self, index):
+	def create_index(self, index, columns: list[str] | None = None):
 		"""
 		Create an index in the database
+		:param index: the name of the index (suffixed by _index), and the indexed column if columns is None
+		:param columns: the indexed columns, a prefix length can be given as "title(16)"
 		"""
+		if columns is None:
+			columns = [index]
 		try:
 			with self.connection.cursor() as cursor:
-				sql = f"CREATE INDEX `{index}_index` ON `{self.db}` (`{index}`)"
+				key_parts = ", ".join(column if "(" in column else f"`{column}`" for column in columns)
+				sql = f"CREATE INDEX `{index}_index` ON `{self.table}` ({key_parts})"
 				cursor.execute(sql)
 				self.__indexes.append(f"{index}")
 
-				self.logger.debug(f"created index {index}_index  on column {index}")
+				self.logger.debug(f"created index {index}_index  on columns {columns}")
 		except pymysql.Error as e:
 			# On check si c'est une erreur de duplication
 			if e.args[0] == 1061:
@@ -425,14 +719,18 @@ class MySQL:
 		except Exception as e:
 			self.logger.error(f"Error creating index '{index}_index' -> {e}")
 	
-	def create_indexes(self, indexes : list[str]):
+	def create_indexes(self, indexes : list[str | tuple[str, list[str]]]):
 		"""
 		Create many indexes in the database
+		:param indexes: column names, or (index name, columns) tuples for multi-column indexes
 		"""
 		try:
 
 			for index in indexes:
-				self.create_index(index)
+				if isinstance(index, tuple):
+					self.create_index(*index)
+				else:
+					self.create_index(index)
 
 			#self.logger.debug(f"created indexes {indexes}")
 
@@ -440,7 +738,7 @@ class MySQL:
 			# On check si c'est une erreur de duplication
 			if e.args[0] == 1061:
 				# si c'est le cas, on ignore l'erreur
-				self.warning(f"Index '{index}_index' already exists")
+				self.logger.warning(f"Index '{index}_index' already exists")
 			else:
 				self.logger.error(f"Pymysql Error creating index '{index}_index' -> {e}")
 
@@ -456,7 +754,7 @@ class MySQL:
 				# On vérifie si l'index est bien nommé
 				if not index_name.endswith("_index"):
 							index_name += "_index"
-				sql = f"DROP INDEX `{index_name}` ON `{self.db}`"
+				sql = f"DROP INDEX `{index_name}` ON `{self.table}`"
 				cursor.execute(sql)
 
 				try:
@@ -488,8 +786,10 @@ class MySQL:
 
 				# Si aucun index n'est fourni, on récupère tous les index et on les supprime
 				if index_names is None or index_names == []:
-					cursor.execute(f"SHOW INDEXES FROM {self.db}")
-					index_names = [index[2] for index in cursor.fetchall()]
+					cursor.execute(f"SHOW INDEXES FROM {self.table}")
+					# Une ligne par colonne indexée : on dédoublonne les index composés
+					# et on garde la clé primaire et les clés uniques du profil de schéma
+					index_names = list(dict.fromkeys(index[2] for index in cursor.fetchall() if index[2] != "PRIMARY" and index[1] != 0))
 
 				for index in index_names:
 					self.drop_index(index)
@@ -503,600 +803,284 @@ class MySQL:
 		except Exception as e:
 			self.logger.error("Error dropping indexes: %s", e)
 
-	def drop_all(self):
+	def index_size(self) -> dict:
 		"""
-		Drop all records in the database
+		Get the size of the secondary indexes of the table
+		:return: {"total": total size in bytes, "indexes": {index name: size in bytes}}
 		"""
+		sizes = {}
+		total = 0
 		try:
 			with self.connection.cursor() as cursor:
-				sql = f"DELETE FROM {self.db}"
-				cursor.execute(sql)
-				self.logger.debug(f"deleted all records")
-		except Exception as e:
-			self.logger.error("Error deleting all records: %s", e)
-
-######### Utilitaires #########
-
-def print_system_info():
-	"""
-	Display system information
-	"""
-	global system_info
-	if system_info == "":
-		system_info = f"Python : {python_version()}\nSystem : {system()} {release()}\nMachine : {machine()} {architecture()[0]}\nCPU : {get_cpu_info()['brand_raw']} - {cpu_count(logical=False)} cores - {cpu_count(logical=True)} threads\nRAM : {int(virtual_memory().total/1024**3)} Go"
-	print(system_info)
-
-def violin_plot_operation_times(test_type="test",test_name=""):
-	"""
-	Plot the times of the operations
-	"""
-	global operation_times
-	
-	if len(operation_times) == 0:
-		print(f" {test_type} : {test_name} -> No data to plot")
-		return
- 
-	# Réveille le thread de progression
-	with operation_lock:
-		operation_Event.set()
-	
-	change_progression_text(f"Generating plots for {test_type}/{test_name} ...")
-	
-	# On crée un dossier pour les graphiques
-	makedirs(f"plots/MySQL/{test_type}", exist_ok=True)
- 
-	# On va créer un graphique regroupant les 4 opérations : insertion, lecture, mise à jour et suppression
-	fig, axes = plt.subplots(2,2,figsize=(12, 8))
-	axes = axes.flatten()
-	idx = 0
-	for operation in operation_times:
-		ax = axes[idx]
-		data = operation_times[operation]
-
-		# Création du graphe violon
-		violin_parts = ax.violinplot(data,  showmeans=True, showmedians=True, showextrema= False, quantiles=[0.25,0.75],points=len(data))
-
-		# Couleurs des quartiles
-		quartile_colors = ['#9999FF','#99FF99','#FF9999' ]  # Bleu, Vert, Rouge
-		for body, color in zip(violin_parts['bodies'], quartile_colors):
-			body.set_facecolor(color)
-			body.set_alpha(0.6)
-
-		# Calcul des stats : médiane, moyenne et quartiles
-		q1,q3 ,median, mean = 0, 0, 0, 0
-		q1		= percentile(data, 25)
-		q3		= percentile(data, 75)
-		median	= np_median(data)
-		mean	= np_mean(data)
-		std 	= np_std(data)
-		
-		# Ajout du nuage de points 
-		x = normal(loc=1, scale=0.05, size=len(data))  # Ajout de jitter pour éviter l'empilement
-		y = data
-		ax.scatter(x, y, alpha=0.4, color="teal" , s=2, label=f"Nuage de points")
-
-		# Personnalisation des lignes
-		violin_parts['cmedians'].set_color('green')  # Ligne médiane
-		violin_parts['cmeans'].set_color('red')  # Ligne moyenne
-		violin_parts['cmeans'].set_linestyle('dashed')  # Moyenne en pointillés
-		violin_parts['bodies'][0].set_label('Densité')  # Légende pour la densité
-		violin_parts['cquantiles'].set_color('blue')  # Changer la couleur des lignes de quantiles
-		violin_parts['cquantiles'].set_linestyle('dashed')   # Style de ligne pleine
-
-		# Légende
-		legend_elements = [
-			Patch(facecolor='#9999FF', alpha=0.7, label='Densité'),
-			Line2D([0], [0], color='green'	, label=f'Médiane : {median:.2f} (µs)'),
-			Line2D([0], [0], color='red'	, label=f'Moyenne : {mean:.2f} +/- {std:.2f} écart (µs)'),
-			Line2D([0], [0], color='blue'	, label=f'Quartiles (25%) : {q1:.2f}'),
-			Line2D([0], [0], color='blue'	, label=f'Quartiles (75%) : {q3:.2f}'),
-			Line2D([0], [0], marker='o'		, color='w', markerfacecolor='teal', markersize=4, label='Nuage de points'),
-		]
-		ax.legend(handles=legend_elements, loc='best')
-
-		# Ajout des labels et du titre
-		ax.set_title(f"Distribution du temps de réalisation pour {len(data)} opération: {operation}")
-		ax.set_ylabel("Temps (µs)")
-
-		idx += 1
-  
-	# Ajuster l'espace entre les sous-graphes
-	plt.tight_layout()
-
-	# On sauvegarde la figure, au cas où elle existe déjà, on la supprime
-	save_path = f"plots/MySQL/{test_type}/{test_name}.png"
-	if path.exists(save_path):
-		remove(save_path)
-	plt.savefig(save_path)
-
-	# on ferme la figure
-	plt.close()	
-
-def plot_operation_times( data:dict,step,test_type="test",test_name=""):
-	"""
-		Affiche le temps des opérations selon la quantité de données dans la base de données
-	"""
-
-	if len(data) == 0:
-		print(f" {test_type} : {test_name} -> No data to plot")
-		return
-
-	# On crée un dossier pour les graphiques
-	makedirs(f"plots/MySQL/{test_type}/", exist_ok=True)
-	
-	# On va créer un graphique qui contient les 4 opérations : insertion, lecture, mise à jour et suppression en même temps
-	fig, axes	= plt.subplots(2, 2, figsize=(12, 8))
-	axes		= axes.flatten() 
-	idx			= 0
-	for operation in data:
-		ax = axes[idx]
-  
-		# Calcul des stats : médiane, moyenne et quartiles		
-		moyenne	= np_mean	(data[operation])
-		mediane	= np_median	(data[operation])
-		std 	= np_std	(data[operation])
-		q1		= percentile(data[operation], 25)
-		q3		= percentile(data[operation], 75)
-
-		# On affiche le temps moyen en µs en fonction de la quantité de données
-		ax.plot(steps,data[operation], label=f"{operation} : µs" )
-	
-		# On trace les lignes de moyenne, médiane et quartiles
-		ax.axhline(y=moyenne,	color='r', linestyle='--')
-		ax.axhline(y=mediane,	color='g', linestyle='--')
-		ax.axhline(y=q1,		color='b', linestyle='--')
-		ax.axhline(y=q3,		color='b', linestyle='--')
-  
-		# on ajoute dans la légende les couleurs des lignes et les labels
-		legend_elements = [
-			Line2D([0], [0], color='r', linestyle='--', label=f'Moyenne : {moyenne:.2f} +/- {std:.2f} écart (µs)'),
-			Line2D([0], [0], color='g', linestyle='--', label=f'Médiane : {mediane:.2f} (µs)'),
-			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 1 (25%) : {q1:.2f} (µs)'),
-			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 3 (75%) : {q3:.2f} (µs)'),
-		]
-		
-		# Personnalisation du graphique
-		ax.set_title(f"{operation} : Temps d'execution par quantité de données initiales")
-		ax.set_xlabel("Données dans la base de données")
-		ax.set_ylabel('Time (µs)')
-		ax.legend(handles=legend_elements, loc='best' )
-  
-		idx += 1
-  
-	# Ajuster l'espace entre les sous-graphes
-	plt.tight_layout()
-
-	# On sauvegarde la figure, au cas où elle existe déjà, on la supprime
-	save_path = f"plots/MySQL/{test_type}/{test_name}.png"
-	if path.exists(save_path):
-		remove(save_path)
-	plt.savefig(save_path)
-
-	# On réinitialise le graphique
-	#plt.clf()
-	# on ferme la figure
-	plt.close()
-
-
-######### Tests de performance #########
-
-def global_test_one(mysql: MySQL,plot_name :str ,  nb_data:int = num_records):
-	global num_records,num_records_per_many, generated_file, updated_file, operation_times
- 
-	mysql.logger.info("Test global one by one " + plot_name)
- 
-	if nb_data < 0:
-		raise ValueError("nb_data must be > 0 and <= " + str(num_records))
-
-	# On récupère les données
-	dataset = extract_books_from_file(generated_file,nb_data)
-
-	if len(dataset) < nb_data:
-		mysql.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
-
-	nb_data = len(dataset)
-	### Tests avec données une par une  ###
- 
-	## Test d'insertion de données
-	mysql.logger.debug("Test insert one by one : ")
-	for book in dataset:
-		mysql.create_one(book)
-
-	# Libérer la mémoire
-	dataset.clear()
- 
-	## Test de lecture de données sur la collection "Books", en choississant l'id
-	mysql.logger.debug("Test read one by one : ")
-	for i in range(0,nb_data):
-		mysql.read_one({"id":i},print_result=False)
-
-	## Test de mise à jour de données
- 
-	# Chargement des données à modifier
-	updated_dataset = extract_updated_books_from_file(updated_file,nb_data)
-	# note : update_dataset contains the original and modified data
-	
-	for update in updated_dataset:
-		original = update[0]
-		modified = update[1]
-	
-		if original == modified:
-			mysql.logger.error(f"Data are the same : \n\t{original} -> \n\t{modified}")
-		else:
-			mysql.update_one(update[0], modified)
-			
-
-	## Test de suppression de données
-	mysql.logger.debug("Test delete one by one : ")
-	for _,book in updated_dataset:
-		mysql.delete_one(book)
-
-	# Dessiner les graphiques
-	try:
-		violin_plot_operation_times(plot_name, "global_test_one")
-	except Exception as e:
-		mysql.logger.error(f"global_test_one : error plotting -> {e}")
-
-	
-	# On supprime toutes les données de la collection
-	mysql.drop_all()	
- 
-	# On réinitialise les données des opérations
-	operation_times.clear()
-
-def global_test_many(mysql: MySQL,plot_name :str, nb_data:int = num_records):
-	global updated_file, generated_file, num_records_per_many, num_records, operation_times
-
-	mysql.logger.info("Test global many " + plot_name)
-
-	### Tests avec plusieurs données à la fois  ###
-	
-	if nb_data  < 0: 
-		raise ValueError("nb_data must be > 0 and <= " + str(num_records_per_many))
-
-	# On récupère les données
-	dataset = extract_books_from_file(generated_file,nb_data)
-
-	if len(dataset) < nb_data:
-		mysql.logger.warning(f"Gathered {len(dataset)} records instead of {nb_data}")
-	
-	nb_data = len(dataset)
-	
-	# On envoie à chaque fois num_records_per_many données
-	
-	## Test d'insertion de données
-	mysql.logger.debug("Test insert many : ")
-	for i in range(0,nb_data,num_records_per_many):
-		data = [book for book in dataset[i:i+num_records_per_many]]
-		mysql.create_many(data)
-
-	# vide dataset pour libérer la mémoire
-	dataset.clear()
- 
-	## Test de mise à jour de données
-	
-	# Chargement des données à modifier
-	#updated_dataset = extract_updated_books_from_file(updated_file,nb_data)
-	# note : update_dataset contains the original and modified data
- 
-	mysql.logger.debug("Test update many : ")
-	for i in range(0,num_records_per_many):
-		# On met à jour les données
-		# Avec le champ "ran" qui est entre O  
-		mysql.update_many({"ran" : i %num_records_per_many}, {"price" : 5.00, "copies_sold": 100} )
-
-	dataset.clear()
- 
-	## Test de lecture de données
-	mysql.logger.debug("Test read all : ")
-	# On lit les données où le champ "ran" est entre 0 et num_records_per_many
-	for i in range(0,num_records_per_many):
-		mysql.read_many({"ran" : i},print_result=False)
-
-	## Test de suppression de données
-	mysql.logger.debug("Test delete many : ")
-	for i in range(0,num_records_per_many):
-		# On supprime les données
-		mysql.delete_many({"ran" : i})
-
-
-	# Dessiner les graphiques
-	try:
-		violin_plot_operation_times(plot_name,"global_test_many")
-	except Exception as e:
-		mysql.logger.error(f"global_test_many : error plotting -> {e}")
-	
-
-	# On supprime toutes les données de la collection
-	mysql.drop_all()
- 
-	# On réinitialise les données des opérations
-	operation_times.clear()
+				# On force la mise à jour des statistiques plutôt que d'utiliser le cache d'information_schema
+				cursor.execute(f"ANALYZE TABLE `{self.table}`")
+				cursor.fetchall()
+				cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+				cursor.execute("SELECT INDEX_LENGTH FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s", (self.db, self.table))
+				row = cursor.fetchone()
+				if row is not None and row[0] is not None:
+					total = int(row[0])
+
+				# Détail par index, uniquement disponible pour InnoDB
+				try:
+					cursor.execute(	"SELECT index_name, stat_value * @@innodb_page_size FROM mysql.innodb_index_stats "\
+									"WHERE database_name = %s AND table_name = %s AND stat_name = 'size'", (self.db, self.table))
+					sizes = {index: int(size) for index, size in cursor.fetchall()}
+				except pymysql.Error as e:
+					self.logger.debug(f"No per index size : {e}")
 
-def test_one_various_data(mysql: MySQL,plot_name :str, steps=arange(1000,num_records,num_records/100)):
-	"""
-		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
- 	"""
-	global operation_times, generated_file
+		except Exception as e:
+			self.logger.error("Error getting index size: %s", e)
+		return {"total": total, "indexes": sizes}
 
-	mysql.logger.info("Test one by one with various data "+ plot_name)
- 
-	# On supprime les données de la collection s'il y en a
-	mysql.drop_all()
- 
-	# On extrait toutes les données dont on aura besoin
-	dataset = extract_books_from_file(generated_file,steps[-1])
-	if len(dataset) < steps[-1]:
-		mysql.logger.warning(f"Gathered {len(dataset)} records instead of {step}")
-	
-	tests_data = defaultdict(list)
-	try:
-		a=0
-		for step in steps:
-			step = int(step)
-
-			# On arrête si on dépasse le nombre de données disponibles
-			if step > len(dataset):
-				mysql.logger.warning(f"Step {step} > {len(dataset)}")
-				break
-
-			# On va insérer les données  manquantes pour avoir step données initiales dans la base
-			try:
-				if a < step:
-					mysql.create_many(dataset[a:step],silent=True)
-			except Exception as e:
-				mysql.logger.error(f"test_one_various_data : init error {e}")
-			finally:
-				a = step
-		
-			# On nettoie les temps des opérations, 
-			# pour recommencer les mesures
-			operation_times.clear()
+	def storage_size(self) -> dict:
+		"""
+		Get the size of the table on disk, data and indexes
+		:return: {"data": size of the data in bytes, "indexes": size of the secondary indexes in bytes, "total": ...}
+		"""
+		try:
+			with self.connection.cursor() as cursor:
+				cursor.execute(f"ANALYZE TABLE `{self.table}`")
+				cursor.fetchall()
+				cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+				cursor.execute(	"SELECT DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+								(self.db, self.table))
+				row = cursor.fetchone()
+				if row is None:
+					return {}
+				data, indexes = int(row[0] or 0), int(row[1] or 0)
+				return {"data": data, "indexes": indexes, "total": data + indexes}
 
-			# On procède au test de performance
+		except Exception as e:
+			self.logger.error("Error getting storage size: %s", e)
+		return {}
 
-			max_id = step + 1
-			generate_book.id = max_id
-			book = generate_book(max_id)
+	def apply_schema_profile(self, schema: str):
+		"""
+		Recreate the table with the schema profile, the records and the indexes are lost
+		"""
+		try:
+			with self.connection.cursor() as cursor:
+				cursor.execute(f"DROP TABLE IF EXISTS `{self.table}`")
+				cursor.execute(table_definition(self.table, schema, self.engine))
+			self.schema		= schema
+			self.__indexes	= []
+			self.logger.info(f"Table recreated with schema profile {schema}")
+		except Exception as e:
+			self.logger.error(f"Error applying schema profile {schema} -> {e}")
+			raise
 
-			# On teste l'insertion
-			mysql.create_one(book)
+	def begin_transaction(self):
+		"""
+		Open a transaction, the connection being in autocommit mode
+		"""
+		try:
+			self.connection.begin()
+		except Exception as e:
+			self.logger.error("Error beginning transaction: %s", e)
 
-			# On teste la lecture
-			mysql.read_one({"id":book["id"]})
+	def commit_transaction(self):
+		"""
+		Commit the open transaction
+		"""
+		try:
+			start_time = time_ns()
+			self.connection.commit()
+			add_operation_time("commit", time_ns()-start_time)
+		except Exception as e:
+			self.logger.error("Error committing transaction: %s", e)
+			self.connection.rollback()
 
-			# On teste la mise à jour
-			new_book = modify_book(book)
-			mysql.update_one({"id":book["id"]}, new_book)
-		
-			# On teste la suppression
-			mysql.delete_one({"id":book["id"]})
+	def engine_supported(self, engine: str | None) -> bool:
+		"""
+		Check if the server provides the storage engine (cf storage_engines), None being the default engine
+		"""
+		if engine is None:
+			return True
+		try:
+			with self.connection.cursor() as cursor:
+				cursor.execute(	"SELECT SUPPORT FROM information_schema.ENGINES WHERE UPPER(ENGINE) = UPPER(%s)", (storage_engines[engine],))
+				row = cursor.fetchone()
+				return row is not None and row[0] in ("YES", "DEFAULT")
+		except Exception as e:
+			self.logger.error(f"Error checking storage engine {engine} -> {e}")
+		return False
 
-			# On ajoute les données dans le tableau
+	def use_engine(self, engine: str | None, schema: str | None = None):
+		"""
+		Switch to the table of the storage engine, recreated with the schema profile (the current one if None)
+		"""
+		self.engine	= engine
+		self.table	= self.db if engine is None else f"{self.db}_{engine}"
+		self.apply_schema_profile(self.schema if schema is None else schema)
 
-			for operation in operation_times:
-				tests_data[operation].extend(operation_times[operation])
+	def apply_index_profile(self, profile: str):
+		"""
+		Drop all indexes and create the ones of the profile
+		"""
+		self.logger.debug(f"Creating indexes for profile {profile}...")
+		# On efface les index si existants
+		self.drop_indexes()
+		# On crée les index
+		self.create_indexes(index_profiles[profile])
 
-	except Exception as e: 
-		mysql.logger.error(f"test_one_various_data: error -> {e}")
+	def count(self) -> int | None:
+		"""
+		Number of records in the table
+		"""
+		try:
+			self.flush_writes()
+			with self.connection.cursor() as cursor:
+				cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+				return int(cursor.fetchone()[0])
+		except Exception as e:
+			self.logger.error("Error counting records: %s", e)
+		return None
 
-	# On dessine les graphiques
-	try:
-		plot_operation_times(tests_data,steps,plot_name,"test_one_various_data")
-	except Exception as e:
-		mysql.logger.error(f"test_one_various_data : error plotting -> {e}")
- 
-	# On supprime toutes les données de la collection
-	mysql.drop_all()
+	def drop_all(self):
+		"""
+		Drop all records in the database
+		"""
+		try:
+			self.flush_writes()
+			with self.connection.cursor() as cursor:
+				sql = f"DELETE FROM {self.table}"
+				cursor.execute(sql)
+				self.logger.debug(f"deleted all records")
+		except Exception as e:
+			self.logger.error("Error deleting all records: %s", e)
 
-def test_many_various_data(mysql: MySQL,plot_name :str, steps=arange(1000,num_records,num_records/100)):
+######### Profils d'index #########
+
+index_profiles = {	"none"		: [],
+					# Un index simple par champ
+					"single"	: [	"id",
+									"title",
+									"author",
+									"published_date",
+									"genre",
+									"copies_sold",
+									"ran"
+								  ],
+					# Index composé utilisé pour les lectures par "ran"
+					"compound"	: [	"id", ("ran_id", ["ran", "id"]) ],
+					# Index couvrant les lectures par "ran" restreintes à id, ran, price et copies_sold
+					"covering"	: [	"id", ("ran_covering", ["ran", "id", "price", "copies_sold"]) ],
+					# MySQL n'a pas d'index partiel filtré : on indexe price, sur lequel test_many_various_data
+					# lit et supprime les livres marqués à prix nul (toutes les lignes sont indexées)
+					"partial"	: [	"id", "price" ]
+				 }
+
+######### Tests spécifiques à MySQL #########
+
+# Colonnes lues par test_read_tuning, "fields" est couvert par le profil d'index "covering"
+read_tuning_projections	= {	"full"		: None,
+							"fields"	: ["id", "ran", "price", "copies_sold"],
+							"id_only"	: ["id"]
+						  }
+
+def test_read_tuning(mysql: MySQL, plot_name: str, nb_data: int = num_records, projections: dict = read_tuning_projections):
 	"""
-		On teste le temps des opérations avec différentes quantités de données initiales dans la base de données
+		On mesure read_many pour chaque projection, afin de séparer le coût serveur
+		du coût de lecture des lignes côté client (pendant MySQL du test_read_tuning de MongoDB)
 	"""
-	global operation_times, generated_file
- 
-	mysql.logger.info("Test many with various data " + plot_name)
+	mysql.logger.info("Test read tuning " + plot_name)
 
-	# On supprime les données de la collection s'il y en a
+	# On supprime toutes les données de la table s'il y en a
 	mysql.drop_all()
- 
-	# On extrait toutes les données dont on aura besoin
-	dataset = extract_books_from_file(generated_file,steps[-1])
-	if len(dataset) < steps[-1]:
-		mysql.logger.warning(f"Gathered {len(dataset)} records instead of {step}")
-	
-	tests_data = defaultdict(list)
-	try:
-		a=0
-		for step in steps:
-			step = int(step)
-
-			# On arrête si on dépasse le nombre de données disponibles
-			if step > len(dataset):
-				mysql.logger.warning(f"Step {step} > {len(dataset)}")
-				break
-
-			# On va insérer les données  manquantes pour avoir step données initiales dans la base
-			try:
-				if a < step:
-					mysql.create_many(dataset[a:step],silent=True)
-			except Exception as e:
-				mysql.logger.error(f"test_one_various_data : init error {e}")
-			finally:
-				a = step
-		
-			# On nettoie les temps des opérations,  pour recommencer les mesures
-			operation_times.clear()
-
-			## On procède au test de performance
 
-			# Génère les données à insérer
-			max_id = step + 1
-			books = [generate_book(max_id + i) for i in range(0,num_records_per_many)]
-
-			# Modifie le prix à 0 pour la suppression/lecture exacte de num_records_per_many données
-			# en effet un prix à 0 est impossible pour un livre, ce seront donc les données à supprimer
-			for book in books:
-				book["price"]= 0.0
+	# On récupère les données et on les insère sans les mesurer
+	dataset = extract_books_from_file(generated_file,nb_data)
+	for i in range(0,len(dataset),1000):
+		mysql.create_many(dataset[i:i+1000],silent=True)
+	dataset.clear()
 
-			# On teste l'insertion
-			mysql.create_many(books)
+	results = []
+	for projection_name, columns in projections.items():
+		mysql.clear_operation_data()
 
-			# On teste la lecture
-			mysql.read_many({"price":0.0})
+		for i in range(0,num_records_per_many):
+			mysql.read_many({"ran" : i},print_result=False, columns=columns)
 
-			# On teste la mise à jour
-			mysql.update_many({"price":0.00}, {"genre": "updated"})
-			
+		server_times = operation_times.get("find",[])
+		client_times = client_operation_times.get("find",[])
+		if len(server_times) == 0 or len(client_times) == 0:
+			mysql.logger.warning(f"test_read_tuning : no measure for {projection_name}")
+			continue
 
-			# On teste la suppression
-			mysql.delete_many({"price":0.0})
+		result = {	"label"			: projection_name,
+					"projection"	: projection_name,
+					"server_median"	: float(np_median(server_times)),
+					"client_median"	: float(np_median(client_times))
+				 }
+		results.append(result)
+		mysql.logger.info(f"read tuning {result['label']} : server {result['server_median']:.2f} µs, client {result['client_median']:.2f} µs")
 
-			# On récupère les temps des opérations
-			# et on ajoute les données dans le tableau
-			for operation in operation_times:
-				tests_data[operation].extend(operation_times[operation])
-			
+	# On enregistre les plans d'exécution capturés et les mesures
+	save_query_plans(mysql.name, plot_name, "read_tuning")
+	save_results(mysql.name, plot_name, "read_tuning", {"kind": "read_tuning", "results": results})
 
-	except Exception as e:
-		mysql.logger.error(f"test_many_various_data: error -> {e}")
-	
-	# On dessine les graphiques
-	try:
-		plot_operation_times(tests_data,steps,plot_name,"test_many_various_data")
-	except Exception as e:
-		mysql.logger.error(f"test_many_various_data: error plotting -> {e}")
-  
-	# On supprime toutes les données de la collection	
+	# On supprime toutes les données de la table
 	mysql.drop_all()
 
-def test_indexed(mysql: MySQL,plot_name :str, test_function,**kwargs):
-	# On définit les index
-	indexes = [	"id", 
-				"title",
-				"author", 
-				"published_date",
-				"genre",
-				"copies_sold",
-				"ran"]
-	mysql.logger.debug("Creating indexes...")
-	# On efface les index si existants
-	mysql.drop_indexes()
-	# On crée les index
-	mysql.create_indexes(indexes)
-	
-	# on va faire les mêmes tests que précédemment
-	test_function(mysql,plot_name+"_indexed",**kwargs)
-
-def run_tests(mysql: MySQL, type_test:str, steps=arange(1000,num_records,num_records/10000)):
-	
-	if mysql is None:
-		raise ValueError("MySQL instance is None")
-
-	# Supprimer les index si existants
-	mysql.drop_indexes()
-
-	# Without indexes tests
-	try:
-		change_progression_text("Running "+type_test + "_global_one...")
-		global_test_one(mysql, type_test)
-	except Exception as e:
-		mysql.logger.error(f"Error with global_test_one : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_global_many...")
-		global_test_many(mysql, type_test)
-	except Exception as e:
-		mysql.logger.error(f"Error with global_test_many : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_one...")
-		test_one_various_data(mysql, type_test,steps=steps)
-	except Exception as e:
-		mysql.logger.error(f"Error with test_one_various_data : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_many...")
-		test_many_various_data(mysql, type_test,steps=steps)
-	except Exception as e:
-		mysql.logger.error(f"Error with test_many_various_data : {e}")
-
-	# With indexes tests
-	try:
-		change_progression_text("Running "+type_test + "_global_one_indexed...")
-		test_indexed(mysql, type_test, global_test_one)
-	except Exception as e:
-		mysql.logger.error(f"Error with global_test_one_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_global_many_indexed...")
-		test_indexed(mysql, type_test, global_test_many)
-	except Exception as e:
-		mysql.logger.error(f"Error with global_test_many_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_one_indexed...")
-		test_indexed(mysql, type_test, test_one_various_data,steps=steps)
-	except Exception as e:
-		mysql.logger.error(f"Error with test_one_various_data_indexed : {e}")
-
-	try:
-		change_progression_text("Running "+type_test + "_various_many_indexed...")
-		test_indexed(mysql, type_test, test_many_various_data,steps=steps)
-	except Exception as e:
-		mysql.logger.error(f"Error with test_many_various_data_indexed : {e}")
-
-def change_progression_text(text:str):
-	"""
-	Change the text of the progression bar
-	"""
-	global operation_lock,operation_Event
-	with operation_lock:
-		print_progress.text = text
-		operation_Event.clear()
-		operation_Event.set()
-
-def print_progress(total,text="Running tests..."):
-	global operations_done, operation_Event, operation_lock
- 
-	print_progress.run = True
-	percent = 0	
-	with alive_bar(total=total,manual=True) as bar:
-		bar.text(text)
-		
-		# Attendre operation_Event
-		while operations_done < total and print_progress.run:
-			operation_Event.wait()
-			operation_Event.clear()
-			with operation_lock:
-				percent = operations_done/total
-			bar(percent)
-			bar.text(print_progress.text)
-		
-		bar(1.)
-print_progress.run		= True
-print_progress.text		="Running tests..."
-
-
-def clean_exit(progress_T:Thread, mysql_clients: list[MySQL | None] | None = None):
+	# On réinitialise les données des opérations
+	mysql.clear_operation_data()
+
+	return results
+
+######### Profils de schéma #########
+
+# Colonnes de la table, hors clés
+table_columns = {	"id"				: "INT 			NOT NULL",
+					"title"				: "VARCHAR(255) 	NOT NULL",
+					"author"			: "VARCHAR(255) 	NOT NULL",
+					"published_date"	: "DATE 			NOT NULL",
+					"genre"				: "VARCHAR(255) 	NOT NULL",
+					"price"				: "FLOAT 			NOT NULL",
+					"copies_sold"		: "INT 			NOT NULL",
+					"ran"				: "INT 			NOT NULL"
+				}
+
+# Variantes de la table : colonnes remplacées ou ajoutées, clés et options de table
+schema_profiles = {	# Table sans clé primaire : InnoDB ajoute une clé cachée de 6 octets
+					"no_pk"			: {},
+					# Clé primaire sur id : les livres sont rangés par id dans l'index cluster
+					"pk"			: {"keys": ["PRIMARY KEY (id)"]},
+					# Clé de substitution auto-incrémentée, id devient une clé unique secondaire
+					"surrogate"		: {	"columns"	: {"row_id": "BIGINT 		NOT NULL AUTO_INCREMENT"},
+										"keys"		: ["PRIMARY KEY (row_id)", "UNIQUE KEY id_unique (id)"]},
+					# Genre stocké sur 1 octet, "updated" est la valeur écrite par les mises à jour groupées
+					"enum_genre"	: {	"columns"	: {"genre": "ENUM(" + ", ".join(f"'{genre}'" for genre in genres + ["updated"]) + ") NOT NULL"},
+										"keys"		: ["PRIMARY KEY (id)"]},
+					# Pages compressées par InnoDB (innodb_file_per_table nécessaire)
+					"compressed"	: {	"keys"		: ["PRIMARY KEY (id)"],
+										"options"	: "ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8"}
+				  }
+
+######### Moteurs de stockage #########
+
+# Nom court utilisé dans les options et les noms de tables : moteur MySQL
+storage_engines = {	# Moteur par défaut, index cluster B+tree
+					"innodb"	: "InnoDB",
+					# NDB Cluster : les données sont réparties entre les nœuds de données (mode sharding)
+					"ndb"		: "NDBCLUSTER",
+					# MyRocks : LSM-tree, disponible avec Percona Server ou MariaDB
+					"rocksdb"	: "ROCKSDB",
+					# Table en mémoire, perdue au redémarrage
+					"memory"	: "MEMORY"
+				  }
+
+def table_definition(table: str, schema: str = "no_pk", engine: str | None = None) -> str:
 	"""
-		Arrête le thread et attend sa fin
+	CREATE TABLE statement of the books table for a schema profile
+	:param engine: storage engine among storage_engines, None for the default engine of the server
 	"""
-	if mysql_clients is not None:
-		for mysql in mysql_clients:
-			if mysql is not None:
-				mysql.close()
- 
-	if progress_T is not None:
-		# On arrête le thread
-		with operation_lock:
-			print_progress.run = False
-			operation_Event.clear()
-			operation_Event.set()
-		progress_T.join(timeout=3)
-	else:
-		print("End of tests")
-		exit(0)
+	profile	= schema_profiles[schema]
+	columns	= dict(profile.get("columns", {}))
+	columns	= {**{column: columns.pop(column, definition) for column, definition in table_columns.items()}, **columns}
+	lines	= [f"{column} 	{definition}" for column, definition in columns.items()] + profile.get("keys", [])
+	options	= ([f"ENGINE={storage_engines[engine]}"] if engine is not None else []) + ([profile["options"]] if "options" in profile else [])
+	return (f"CREATE TABLE IF NOT EXISTS `{table}` (\n\t" + ",\n\t".join(lines) + "\n) " + " ".join(options)).rstrip()
 
 if __name__ == "__main__":
 
@@ -1108,45 +1092,92 @@ if __name__ == "__main__":
  
 	parser = ArgumentParser(description="MySQL performance tests")
 	parser.add_argument("--verbose",	help="increase output verbosity",	action="store_true")
+	parser.add_argument("--quiet",		help="No progression bar during the tests",	action="store_true")
+	parser.add_argument("--profile",	help="Profile the client during each scenario, saved in profiles/ (cprofile : deterministic, sampling : collapsed stacks for flame graphs)",
+						choices=profilers, default=None)
+	parser.add_argument("--memory",		help="Track the memory of the client during each scenario (rss : resident set size, tracemalloc : also the peak and sites of the Python allocations)",
+						choices=memory_modes, default=None)
+	parser.add_argument("--resume",		help="Resume an interrupted run : the scenarios and steps recorded in checkpoints/ are skipped",	action="store_true")
 	# Ajouter des arguments pour savoir quel(s) test(s) effectuer 
 	parser.add_argument("--standalone", help="Run tests with a standalone",	action="store_true" )
-	#parser.add_argument("--replica", 	help="Run tests with replica set",	action="store_true" )
+	parser.add_argument("--replica", 	help="Run tests with replication : writes on the source, reads on the replicas",	action="store_true" )
 	parser.add_argument("--sharded", 	help="Run tests with shards ",		action="store_true" )
 	parser.add_argument("--all", 		help="Run all tests", 				action="store_true" )
+	parser.add_argument("--explain",	help="Capture the execution plan of each operation shape",	action="store_true" )
+	parser.add_argument("--metrics-interval",	help="Interval (s) between two SHOW GLOBAL STATUS samples, 0 to disable", type=float, default=0)
+	parser.add_argument("--index-profiles",	help=f"Comma-separated index profiles to test among {', '.join(index_profiles)}", default="none,single")
+	parser.add_argument("--warmup",		help="Unmeasured insert/read/delete cycles before each scenario", type=int, default=0)
+	parser.add_argument("--steady-cv",	help="Continue the warm-up until the coefficient of variation of the last cycles is below this value, 0 to disable", type=float, default=0)
+	parser.add_argument("--trials",		help="Number of passes of each scenario, summarized with a 95%% confidence interval", type=int, default=1)
+	parser.add_argument("--repetitions",	help="Operations per step of the various data tests, each on a random target", type=int, default=step_repetitions)
+	parser.add_argument("--sweep",		help="Data sizes of the various data tests : linear up to the dataset file size, or logarithmic with books generated on the fly", choices=["linear", "log"], default="linear")
+	parser.add_argument("--sweep-min",	help="First size of the logarithmic sweep",	type=int, default=1000)
+	parser.add_argument("--sweep-max",	help="Last size of the logarithmic sweep",	type=int, default=100000000)
+	parser.add_argument("--steps-per-decade",	help="Steps per power of ten of the logarithmic sweep", type=int, default=steps_per_decade)
+	parser.add_argument("--key-distribution",	help="Distribution of the keys read and updated by the scenarios, default : sequential for the global tests, uniform for the various data tests", choices=key_distributions, default=None)
+	parser.add_argument("--workloads",	help=f"Comma-separated YCSB workloads to run among {', '.join(workloads)}", default="")
+	parser.add_argument("--record-count",	help="Records loaded before each workload",	type=int, default=num_records)
+	parser.add_argument("--operation-count",	help="Operations of each workload",		type=int, default=num_records)
+	parser.add_argument("--commit-interval",	help="Writes grouped in each transaction, 0 to commit each write", type=int, default=0)
+	parser.add_argument("--engines",	help=f"Comma-separated storage engines to test among {', '.join(storage_engines)}, default : the engine of the server", default="")
+	parser.add_argument("--schemas",	help=f"Comma-separated schema profiles of the table to test among {', '.join(schema_profiles)}", default="no_pk")
  
 	args = parser.parse_args()
 
-	if (not args.standalone) and (not args.sharded) and (not args.all):
+	if (not args.standalone) and (not args.replica) and (not args.sharded) and (not args.all):
 		#parser.error("No action requested, add --standalone, --replica, --sharded or --all")
 		args.all = True
 
+	profiles = [profile.strip() for profile in args.index_profiles.split(",") if profile.strip() != ""]
+	for profile in profiles:
+		if profile not in index_profiles:
+			parser.error(f"Unknown index profile {profile}, available : {', '.join(index_profiles)}")
+
+	schemas = [schema.strip() for schema in args.schemas.split(",") if schema.strip() != ""]
+	for schema in schemas:
+		if schema not in schema_profiles:
+			parser.error(f"Unknown schema profile {schema}, available : {', '.join(schema_profiles)}")
+
+	# None : moteur par défaut du serveur, dans la table d'origine
+	engines = [engine.strip().lower() for engine in args.engines.split(",") if engine.strip() != ""] or [None]
+	for engine in engines:
+		if engine is not None and engine not in storage_engines:
+			parser.error(f"Unknown storage engine {engine}, available : {', '.join(storage_engines)}")
+
 	# On veut nb_measurements mesures allant jusqu'à num_records.
 	# Donc on prend num_records/nb_measurements comme pas et on prend comme départ :0
 	steps	= arange(0,num_records,num_records/nb_measurements)
+	# Balayage logarithmique, avec des livres générés à la volée, pour dépasser le buffer pool InnoDB
+	if args.sweep == "log":
+		steps = geometric_steps(args.sweep_min, args.sweep_max, args.steps_per_decade)
 	size 	= len(steps)
  
 	# Calcul le nombre total d'opérations à effectuer pour l'affichage de la progression pour une instance de test
-	# 2* à chaque fois car test avec et sans index, 4 fois car 4 tests
-	total_test_various_one 	= 2 * 4 * size
-	total_test_various_many = 2 * 4 * size
-	total_test_one			= 2 * 4 * num_records
-	#	num_records/num_records_per_many insertion de num_records_per_many données
-	#	num_records_per_many CRUD operations
-	total_test_many 		= 2 * ( num_records/num_records_per_many + 3 * num_records_per_many)
-	total 					= int(total_test_various_one + total_test_various_many + total_test_one + total_test_many )
+	nb_profiles				= len(profiles)
+	# Une série de num_records_per_many lectures par projection
+	total_test_read_tuning	= nb_profiles * len(read_tuning_projections) * num_records_per_many
+	total 					= total_operations(nb_profiles, size, args.trials, args.repetitions) + total_test_read_tuning * max(1, args.trials)
 	coeff = 0
  
 	if args.standalone or args.all:
 		coeff += 1
-	#if args.replica or args.all:
-	#	coeff += 1
+	if args.replica or args.all:
+		coeff += 1
 	if args.sharded or args.all:
 		coeff += 1
-	# On multiplie par le nombre de tests
-	total *= coeff
+	# Charges de travail YCSB, ajoutées aux scénarios communs
+	names = [name.strip().lower() for name in args.workloads.split(",") if name.strip() != ""]
+	for name in names:
+		if name not in workloads:
+			parser.error(f"Unknown workload {name}, available : {', '.join(workloads)}")
+	total += nb_profiles * total_workload_operations(names, args.operation_count) * max(1, args.trials)
+
+	# On multiplie par le nombre de tests, chaque moteur et chaque profil de schéma rejouent tous les scénarios
+	total *= coeff * len(schemas) * len(engines)
 	
 	# On crée un thread pour afficher la progression
-	progress_T = Thread(target=print_progress, args=((total,)) )
+	# sauf en mode silencieux
+	progress_T = None if args.quiet else Thread(target=print_progress, args=((total,)) )
 	
 	# On intercepte les signaux pour arrêter proprement le programme
 	signal(SIGINT, lambda signum, frame: clean_exit(progress_T, [mysql_standalone, mysql_replica, mysql_sharded]))
@@ -1154,73 +1185,102 @@ if __name__ == "__main__":
 	
 	# On démarre le thread de progression
 	print("Running tests ...")
-	progress_T.start()
+	if progress_T is not None:
+		progress_T.start()
 
 	
 	# On crée les instances de MySQL
 	mysql_standalone ,mysql_replica ,mysql_sharded = None, None, None
+	# Scénarios propres à MySQL et charges de travail YCSB demandées
+	mysql_scenarios = [("read_tuning", test_read_tuning, {})] + workload_scenarios(names, args.record_count, args.operation_count)
 	# On définit le niveau de log
 	debug_level = DEBUG if args.verbose else INFO
 	# On définit les modes d'ouverture des fichiers de logs
 	alone_dbg_mode, replica_dbg_mode, sharded_dbg_mode = "w", "w", "w"
 	if coeff >= 2:
 		sharded_dbg_mode = "a"
-		replica_dbg_mode = "a" if args.standalone else "w"
+		replica_dbg_mode = "a" if args.standalone or args.all else "w"
+
+	def run_variants(mysql: MySQL, topology: str):
+		"""
+		Run the tests for each storage engine and each schema profile, then save the sizes and median times of every variant
+		The results of the default engine and of the no_pk profile stay in the topology directory,
+		the others are suffixed by the engine and the profile names
+		"""
+		engine_runs = {}
+		for engine in engines:
+			if not mysql.engine_supported(engine):
+				mysql.logger.warning(f"Storage engine {engine} not available in {topology}, skipped")
+				print(f"Moteur {engine} indisponible en mode {topology}")
+				continue
+			engine_suffix	= "" if engine is None else f"_{engine}"
+			runs			= {}
+			for schema in schemas:
+				change_progression_text(f"Tests en mode {topology}, moteur {engine or 'par défaut'}, schéma {schema}...")
+				try:
+					mysql.use_engine(engine, schema)
+				except Exception as e:
+					print(f"Schéma {schema} impossible avec le moteur {engine or 'par défaut'} : {e}")
+					continue
+				runs[schema] = run_tests(mysql, topology + engine_suffix + ("" if schema == "no_pk" else f"_{schema}") + commit_suffix(mysql), steps=steps, profiles=profiles,
+										 metrics_interval=args.metrics_interval, extra_scenarios=mysql_scenarios,
+										 warmup_operations=args.warmup, steady_cv=args.steady_cv, trials=args.trials, repetitions=args.repetitions,
+										 generated=(args.sweep == "log"), key_distribution=args.key_distribution, profiler=args.profile, memory=args.memory, resume=args.resume)
+			if len(schemas) > 1:
+				save_results(mysql.name, topology + engine_suffix, "schema_profiles", variants_report(runs))
+			engine_runs[engine or "default"] = runs
+		if len(engines) > 1:
+			save_results(mysql.name, topology, "storage_engines", {engine: variants_report(runs) for engine, runs in engine_runs.items()})
 
  
+	# Vrai si le test d'une topologie a échoué : le code de retour est alors non nul (cf start-test.sh)
+	failed = False
 	if args.standalone or args.all:
 		try:
-			mysql_standalone = MySQL(debug_level=INFO,dbg_file_mode=alone_dbg_mode)
-			change_progression_text("Tests en mode standalone...")
-			run_tests(mysql_standalone, "standalone",steps=steps)
+			mysql_standalone = MySQL(debug_level=INFO,dbg_file_mode=alone_dbg_mode,capture_plans=args.explain)
+			mysql_standalone.set_commit_interval(args.commit_interval)
+			run_variants(mysql_standalone, "standalone")
 	
 		except Exception as e:
 			print(f"Erreur avec le test en standalone: {e}")
+			failed = True
 	
 		finally:
 			if mysql_standalone is not None:
 				mysql_standalone.close()
 	
-	#if args.replica or args.all:
-	#	print("No replica set tests")
-		#try:
-		#
-		#	mysql_replica = MySQL(using_replica_set=True,debug_level=INFO,dbg_file_mode=replica_dbg_mode)
-		#	change_progression_text("Tests en mode Replica...")
-		#	run_tests(mysql_replica, "replica_set",steps=steps)
-		#	del mysql_replica
-		#
-		#except Exception as e:
-		#	operation_Event.clear()
-		#	print(f"Erreur avec le test avec Replica Set: {e}")
-		#
-		#finally:
-		#
-		#	if mysql_replica is not None:
-		#		del mysql_replica
+	if args.replica or args.all:
+		try:
+			mysql_replica = MySQL(using_replica=True,debug_level=INFO,dbg_file_mode=replica_dbg_mode,capture_plans=args.explain)
+			mysql_replica.set_commit_interval(args.commit_interval)
+			run_variants(mysql_replica, "replica_set")
+
+		except Exception as e:
+			print(f"Erreur avec le test avec Replica Set: {e}")
+			failed = True
+
+		finally:
+			if mysql_replica is not None:
+				mysql_replica.close()
 
 	if args.sharded or args.all:
 		try:
 
-			mysql_sharded = MySQL(using_shard=True,debug_level=INFO,dbg_file_mode=sharded_dbg_mode)
-			change_progression_text("Tests en mode Sharded...")
-			run_tests(mysql_sharded, "sharding",steps=steps)
+			mysql_sharded = MySQL(using_shard=True,debug_level=INFO,dbg_file_mode=sharded_dbg_mode,capture_plans=args.explain)
+			mysql_sharded.set_commit_interval(args.commit_interval)
+			run_variants(mysql_sharded, "sharding")
 
 		except Exception as e:
 			print(f"Erreur avec le test avec Shards: {e}")
+			failed = True
 	
 		finally:
 			if mysql_sharded is not None:
 				mysql_sharded.close()
 
 	# On finit le thread de progression
-	with operation_lock:
-		print_progress.run = False
-		operation_Event.clear()
-		operation_Event.set()
-
-	progress_T.join(timeout=3)
+	stop_progress(progress_T)
 	progress_T = None
 	
 	print("End of tests")
-	exit(0)
\ No newline at end of file
+	exit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,171 @@
+# Détection des régressions de performance entre deux exécutions des tests
+# On compare, pour chaque SGBD, topologie, scénario et opération, la distribution des temps
+# de l'exécution courante à celle d'une exécution de référence enregistrée :
+#  - test de Mann-Whitney unilatéral (les temps courants sont-ils plus grands ?)
+#  - intervalles de confiance bootstrap sur le rapport des p50 et des p99
+# Le script se termine avec le code 1 si une régression est détectée.
+
+from os import path, listdir
+from shutil import copytree, rmtree
+from math import erfc, sqrt
+import json
+
+# for arg parsing
+from argparse import ArgumentParser
+
+#  For statistics
+from numpy import asarray, unique, cumsum, percentile
+from numpy.random import default_rng
+
+from report import load_results
+
+
+# Seuil de significativité du test de Mann-Whitney
+alpha				= 0.01
+# Ralentissement minimal (rapport - 1) pour signaler une régression
+min_slowdown		= 0.05
+# Niveau de confiance des intervalles bootstrap
+confidence			= 0.95
+bootstrap_resamples	= 1000
+# Au-delà, les mesures sont sous-échantillonnées avant le bootstrap
+max_bootstrap_samples	= 5000
+# Percentiles comparés
+compared_percentiles	= [50, 99]
+
+
+def mann_whitney_greater(current, baseline) -> float:
+	"""
+	One-sided Mann-Whitney U test, normal approximation with tie and continuity corrections
+	:return: the p-value of "current times are stochastically greater than baseline times"
+	"""
+	current, baseline	= asarray(current, dtype=float), asarray(baseline, dtype=float)
+	n1, n2				= len(current), len(baseline)
+	n					= n1 + n2
+	if n1 == 0 or n2 == 0:
+		return 1.
+
+	# Rangs moyens pour les ex-aequo
+	values					= asarray(list(current) + list(baseline))
+	_, inverse, counts		= unique(values, return_inverse=True, return_counts=True)
+	first					= cumsum(counts) - counts
+	ranks					= (first + (counts + 1)/2)[inverse]
+
+	u		= ranks[:n1].sum() - n1*(n1 + 1)/2
+	mean	= n1*n2/2
+	ties	= (counts**3 - counts).sum()
+	var		= n1*n2/12 * ((n + 1) - ties/(n*(n - 1))) if n > 1 else 0.
+	if var <= 0:
+		return 1.
+	z = (u - mean - 0.5)/sqrt(var)
+	return 0.5*erfc(z/sqrt(2))
+
+def bootstrap_ratio(current, baseline, q: float, rng) -> tuple[float, float, float]:
+	"""
+	Ratio of the q-th percentile of current to baseline, with its bootstrap confidence interval
+	:return: (ratio, low, high)
+	"""
+	current, baseline = asarray(current, dtype=float), asarray(baseline, dtype=float)
+	ratio = percentile(current, q)/percentile(baseline, q)
+
+	# Sous-échantillonnage pour garder un coût borné
+	if len(current) > max_bootstrap_samples:
+		current = rng.choice(current, max_bootstrap_samples, replace=False)
+	if len(baseline) > max_bootstrap_samples:
+		baseline = rng.choice(baseline, max_bootstrap_samples, replace=False)
+
+	current_q	= percentile(rng.choice(current, (bootstrap_resamples, len(current))), q, axis=1)
+	baseline_q	= percentile(rng.choice(baseline, (bootstrap_resamples, len(baseline))), q, axis=1)
+	ratios		= current_q/baseline_q
+	tail		= (1 - confidence)/2*100
+	low, high	= percentile(ratios, [tail, 100 - tail])
+	return float(ratio), float(low), float(high)
+
+def compare_times(current, baseline, rng) -> dict:
+	"""
+	Compare two distributions of times of one operation
+	"""
+	comparison = {	"samples"	: [len(current), len(baseline)],
+					"p_value"	: mann_whitney_greater(current, baseline),
+					"percentiles": {}
+				 }
+	regression = False
+	for q in compared_percentiles:
+		ratio, low, high = bootstrap_ratio(current, baseline, q, rng)
+		comparison["percentiles"][f"p{q}"] = {"ratio": ratio, "ci": [low, high]}
+		# Ralentissement significatif : tout l'intervalle est au-dessus du seuil
+		if low > 1 + min_slowdown:
+			regression = True
+	comparison["regression"] = regression and comparison["p_value"] < alpha
+	return comparison
+
+def compare_runs(current_dir: str, baseline_dir: str, timing: str = "client", seed: int = 0) -> dict:
+	"""
+	Compare every scenario present in both runs
+	:return: {"<backend>/<mode>/<test>": {operation: comparison}}
+	"""
+	rng		= default_rng(seed)
+	report	= {}
+	for backend in sorted(listdir(current_dir)):
+		if not path.isdir(path.join(current_dir, backend)):
+			continue
+		for mode in sorted(listdir(path.join(current_dir, backend))):
+			mode_dir = path.join(current_dir, backend, mode)
+			if not path.isdir(mode_dir):
+				continue
+			for file in sorted(listdir(mode_dir)):
+				baseline_file = path.join(baseline_dir, backend, mode, file)
+				if not file.endswith(".json") or not path.exists(baseline_file):
+					continue
+				current		= load_results(path.join(mode_dir, file))
+				baseline	= load_results(baseline_file)
+				if current.get("kind") not in ("distribution", "steps"):
+					continue
+
+				scenario = {}
+				for operation, times in current.get(timing, {}).items():
+					baseline_times = baseline.get(timing, {}).get(operation, [])
+					if len(times) < 2 or len(baseline_times) < 2:
+						continue
+					scenario[operation] = compare_times(times, baseline_times, rng)
+				if scenario:
+					report[f"{backend}/{mode}/{file[:-len('.json')]}"] = scenario
+	return report
+
+
+if __name__ == "__main__":
+
+	parser = ArgumentParser(description="Detect performance regressions against a baseline run")
+	parser.add_argument("--baseline",		help="Directory of the baseline results",	default="baseline")
+	parser.add_argument("--results",		help="Directory of the current results",	default="results")
+	parser.add_argument("--timing",			help="Times to compare",					choices=["client", "server"], default="client")
+	parser.add_argument("--alpha",			help="Significance level of the Mann-Whitney test",		type=float, default=alpha)
+	parser.add_argument("--min-slowdown",	help="Minimal slowdown flagged, 0.05 for 5%%",			type=float, default=min_slowdown)
+	parser.add_argument("--save-baseline",	help="Use the current results as the new baseline",	action="store_true")
+	args = parser.parse_args()
+
+	alpha			= args.alpha
+	min_slowdown	= args.min_slowdown
+
+	if args.save_baseline:
+		if path.exists(args.baseline):
+			rmtree(args.baseline)
+		copytree(args.results, args.baseline)
+		print(f"Baseline saved in {args.baseline}")
+		exit(0)
+
+	if not path.isdir(args.baseline):
+		print(f"No baseline in {args.baseline}, save one with --save-baseline")
+		exit(0)
+
+	report = compare_runs(args.results, args.baseline, args.timing)
+	with open(path.join(args.results, "regression.json"), "w") as f:
+		json.dump(report, f, indent=4)
+
+	regressions = [(scenario, operation, comparison) for scenario, operations in report.items()
+					for operation, comparison in operations.items() if comparison["regression"]]
+	for scenario, operation, comparison in regressions:
+		ratios = ", ".join(f"{name} x{value['ratio']:.2f} [{value['ci'][0]:.2f}, {value['ci'][1]:.2f}]" for name, value in comparison["percentiles"].items())
+		print(f"Regression : {scenario} {operation} : {ratios}, p = {comparison['p_value']:.2g}")
+
+	print(f"{len(report)} scenarios compared, {len(regressions)} regressions")
+	exit(1 if regressions else 0)
@@ -0,0 +1,429 @@
+# Génération des graphiques à partir des résultats enregistrés par mongodb.py et mysql.py
+# Les tests écrivent leurs mesures dans results/<SGBD>/<mode>/<test>.json,
+# ce script les lit et dessine les graphiques dans plots/<SGBD>/<mode>/ une fois les tests terminés
+
+from os import makedirs, path, remove, listdir, cpu_count
+from math import ceil
+import json
+
+# for arg parsing
+from argparse import ArgumentParser
+
+# Pour répartir les graphiques entre plusieurs processus
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+#  For statistics
+from numpy import array, asarray, median as np_median, mean as np_mean, std as np_std, percentile, diff
+from numpy import histogram, linspace, exp, ones, sqrt, pi, nan
+from numpy.random import normal, default_rng
+
+# for graphing
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
+from matplotlib.lines import Line2D
+
+
+# Métriques serveur superposées aux latences, dans l'ordre de préférence
+overlay_metrics = [	"cache.pages evicted by application threads",
+					"cache.bytes currently in the cache",
+					"Innodb_buffer_pool_reads",
+					"Innodb_os_log_written",
+					"ndb_redo_used_ratio",
+					"replication_lag_us_0"
+				  ]
+
+# Rendu des violons : "exact" évalue le KDE en autant de points que de mesures,
+# "fast" sur une grille fixe à partir d'un histogramme, "auto" choisit selon le nombre de mesures
+violin_modes			= ["auto", "exact", "fast"]
+fast_violin_threshold	= 5000
+violin_grid_points		= 256
+violin_histogram_bins	= 2048
+# Nombre maximal de points dessinés dans un nuage de points
+max_scatter_points		= 2000
+
+# Compteurs cumulés : on trace leur variation entre deux échantillons plutôt que leur valeur
+cumulative_metrics = [	"cache.pages evicted by application threads",
+						"Innodb_buffer_pool_reads",
+						"Innodb_os_log_written"
+					 ]
+
+
+def load_results(file: str) -> dict:
+	"""
+	Load the results of a test
+	"""
+	with open(file, "r") as f:
+		return json.load(f)
+
+def save_figure(save_path: str):
+	"""
+	Save the current figure, replacing the file if it already exists
+	"""
+	makedirs(path.dirname(save_path), exist_ok=True)
+	if path.exists(save_path):
+		remove(save_path)
+	plt.savefig(save_path)
+
+	# on ferme la figure
+	plt.close()
+
+def scatter_sample(x, y, max_points: int = max_scatter_points):
+	"""
+	Bounded random subset of the points of a scatter plot, always the same for the same data
+	"""
+	x, y = asarray(x), asarray(y)
+	if len(y) <= max_points:
+		return x, y
+	kept = default_rng(0).choice(len(y), size=max_points, replace=False)
+	return x[kept], y[kept]
+
+def binned_violin_stats(data, quantiles: list[float] = [0.25, 0.75]) -> dict:
+	"""
+	Statistics expected by Axes.violin, with the KDE evaluated on a fixed grid
+	from a histogram of the data instead of every sample
+	"""
+	data		= asarray(data, dtype=float)
+	low, high	= data.min(), data.max()
+	coords		= linspace(low, high, violin_grid_points)
+
+	# Largeur de bande de Scott, comme gaussian_kde utilisé par violinplot
+	bandwidth = data.std(ddof=1) * len(data)**(-1/5) if len(data) > 1 else 0.
+	if bandwidth > 0:
+		counts, edges	= histogram(data, bins=violin_histogram_bins, range=(low, high))
+		centers			= (edges[:-1] + edges[1:]) / 2
+		# Chaque classe de l'histogramme contribue comme un noyau gaussien pondéré par son effectif
+		kernel			= exp(-0.5 * ((coords[:, None] - centers[None, :]) / bandwidth)**2)
+		vals			= kernel @ counts / (len(data) * bandwidth * sqrt(2*pi))
+	else:
+		vals = ones(violin_grid_points)
+
+	return {"coords"	: coords,
+			"vals"		: vals,
+			"mean"		: data.mean(),
+			"median"	: np_median(data),
+			"min"		: low,
+			"max"		: high,
+			"quantiles"	: percentile(data, [q*100 for q in quantiles])}
+
+def violin_plot_operation_times(times: dict, save_path: str, mode: str = "auto"):
+	"""
+	Plot the distribution of the times of the operations
+	:param times: {operation: times (µs)}
+	:param mode: "exact", "fast" or "auto" (fast above fast_violin_threshold samples)
+	"""
+	times = {operation: data for operation, data in times.items() if len(data) > 0}
+	if len(times) == 0:
+		print(f" {save_path} -> No data to plot")
+		return
+
+	# On va créer un graphique regroupant les opérations : insertion, lecture, mise à jour, suppression (et validation)
+	axes = operation_axes(len(times))
+	idx = 0
+	for operation in times:
+		ax = axes[idx]
+		data = times[operation]
+
+		# Création du graphe violon
+		fast = mode == "fast" or (mode == "auto" and len(data) > fast_violin_threshold)
+		if fast:
+			violin_parts = ax.violin([binned_violin_stats(data)], showmeans=True, showmedians=True, showextrema= False)
+		else:
+			violin_parts = ax.violinplot(data,  showmeans=True, showmedians=True, showextrema= False, quantiles=[0.25,0.75],points=len(data))
+
+		# Couleurs des quartiles
+		quartile_colors = ['#9999FF','#99FF99','#FF9999' ]  # Bleu, Vert, Rouge
+		for body, color in zip(violin_parts['bodies'], quartile_colors):
+			body.set_facecolor(color)
+			body.set_alpha(0.6)
+
+		# Calcul des stats : médiane, moyenne et quartiles
+		q1,q3 ,median, mean = 0, 0, 0, 0
+		q1		= percentile(data, 25)
+		q3		= percentile(data, 75)
+		median	= np_median(data)
+		mean	= np_mean(data)
+		std 	= np_std(data)
+
+		# Ajout du nuage de points, limité à un échantillon en mode rapide
+		y = scatter_sample(data, data)[1] if fast else data
+		x = normal(loc=1, scale=0.05, size=len(y))  # Ajout de jitter pour éviter l'empilement
+		ax.scatter(x, y, alpha=0.4, color="teal" , s=2, label="Nuage de points")
+
+		# Personnalisation des lignes
+		violin_parts['cmedians'].set_color('green')  # Ligne médiane
+		violin_parts['cmeans'].set_color('red')  # Ligne moyenne
+		violin_parts['cmeans'].set_linestyle('dashed')  # Moyenne en pointillés
+		violin_parts['bodies'][0].set_label('Densité')  # Légende pour la densité
+		violin_parts['cquantiles'].set_color('blue')  # Changer la couleur des lignes de quantiles
+		violin_parts['cquantiles'].set_linestyle('dashed')   # Style de ligne pleine
+
+		# Légende
+		legend_elements = [
+			Patch(facecolor='#9999FF', alpha=0.7, label='Densité'),
+			Line2D([0], [0], color='green'	, label=f'Médiane : {median:.2f} (µs)'),
+			Line2D([0], [0], color='red'	, label=f'Moyenne : {mean:.2f} +/- {std:.2f} écart (µs)'),
+			Line2D([0], [0], color='blue'	, label=f'Quartiles (25%) : {q1:.2f}'),
+			Line2D([0], [0], color='blue'	, label=f'Quartiles (75%) : {q3:.2f}'),
+			Line2D([0], [0], marker='o'		, color='w', markerfacecolor='teal', markersize=4, label='Nuage de points' + (f' ({len(y)} sur {len(data)})' if len(y) < len(data) else '')),
+		]
+		ax.legend(handles=legend_elements, loc='best')
+
+		# Ajout des labels et du titre
+		ax.set_title(f"Distribution du temps de réalisation pour {len(data)} opération: {operation}")
+		ax.set_ylabel("Temps (µs)")
+
+		idx += 1
+
+	# Ajuster l'espace entre les sous-graphes
+	plt.tight_layout()
+
+	save_figure(save_path)
+
+def operation_axes(nb_operations: int) -> list:
+	"""
+		Grille de deux colonnes avec un graphique par opération, les cases en trop sont masquées
+	"""
+	rows		= max(1, ceil(nb_operations/2))
+	fig, axes	= plt.subplots(rows, 2, figsize=(12, 4*rows))
+	axes		= axes.flatten()
+	for ax in axes[nb_operations:]:
+		ax.set_visible(False)
+	return axes
+
+def plot_operation_times(data: dict, steps: list, save_path: str, bands: dict | None = None):
+	"""
+		Affiche le temps des opérations selon la quantité de données dans la base de données
+		:param bands: percentiles de chaque palier {opération: {"p<q>": valeurs}}, tracés en bandes autour de la médiane
+	"""
+	data = {operation: times for operation, times in data.items() if len(times) > 0}
+	if len(data) == 0:
+		print(f" {save_path} -> No data to plot")
+		return
+
+	# On va créer un graphique qui contient les opérations : insertion, lecture, mise à jour, suppression (et validation) en même temps
+	axes		= operation_axes(len(data))
+	idx			= 0
+	for operation in data:
+		ax = axes[idx]
+
+		# Calcul des stats : médiane, moyenne et quartiles
+		moyenne	= np_mean	(data[operation])
+		mediane	= np_median	(data[operation])
+		std 	= np_std	(data[operation])
+		q1		= percentile(data[operation], 25)
+		q3		= percentile(data[operation], 75)
+
+		# On affiche le temps en µs en fonction de la quantité de données :
+		# médiane de chaque palier et bandes de percentiles s'il y a plusieurs mesures par palier
+		operation_bands = (bands or {}).get(operation)
+		if operation_bands:
+			plot_step_bands(ax, steps, operation_bands, operation)
+		else:
+			ax.plot(steps[:len(data[operation])],data[operation], label=f"{operation} : µs" )
+
+		# On trace les lignes de moyenne, médiane et quartiles
+		ax.axhline(y=moyenne,	color='r', linestyle='--')
+		ax.axhline(y=mediane,	color='g', linestyle='--')
+		ax.axhline(y=q1,		color='b', linestyle='--')
+		ax.axhline(y=q3,		color='b', linestyle='--')
+
+		# on ajoute dans la légende les couleurs des lignes et les labels
+		legend_elements = [
+			Line2D([0], [0], color='r', linestyle='--', label=f'Moyenne : {moyenne:.2f} +/- {std:.2f} écart (µs)'),
+			Line2D([0], [0], color='g', linestyle='--', label=f'Médiane : {mediane:.2f} (µs)'),
+			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 1 (25%) : {q1:.2f} (µs)'),
+			Line2D([0], [0], color='b', linestyle='--', label=f'Quartiles 3 (75%) : {q3:.2f} (µs)'),
+		]
+		if operation_bands:
+			legend_elements.append(Patch(facecolor='gray', alpha=0.3, label='Médiane et percentiles de chaque palier (25-75 %, 5-95 %)'))
+
+		# Personnalisation du graphique
+		set_steps_scale(ax, steps)
+		ax.set_title(f"{operation} : Temps d'execution par quantité de données initiales")
+		ax.set_xlabel("Données dans la base de données")
+		ax.set_ylabel('Time (µs)')
+		ax.legend(handles=legend_elements, loc='best' )
+
+		idx += 1
+
+	# Ajuster l'espace entre les sous-graphes
+	plt.tight_layout()
+
+	save_figure(save_path)
+
+def set_steps_scale(ax, steps: list):
+	"""
+		Échelle logarithmique pour les balayages géométriques (premier palier non nul, plusieurs décades)
+	"""
+	if len(steps) > 1 and steps[0] > 0 and steps[-1] >= 100*steps[0]:
+		ax.set_xscale("log")
+
+def plot_step_bands(ax, steps: list, bands: dict, label: str, color=None):
+	"""
+		Trace la médiane de chaque palier et les bandes entre percentiles symétriques (p25-p75, p5-p95)
+	"""
+	def values(q):
+		return array([nan if value is None else value for value in bands[q][:len(steps)]], dtype=float)
+
+	x			= array(steps[:len(bands["p50"])])
+	line,		= ax.plot(x, values("p50"), label=f"{label} : médiane (µs)", color=color)
+	quantiles	= sorted(int(q[1:]) for q in bands if q != "p50")
+	for low, high in zip(quantiles, reversed(quantiles)):
+		if low >= high:
+			break
+		ax.fill_between(x, values(f"p{low}"), values(f"p{high}"), color=line.get_color(), alpha=0.15, linewidth=0)
+
+def plot_read_tuning(results: list[dict], save_path: str):
+	"""
+		Affiche, pour chaque configuration de lecture, la part du temps serveur
+		et la part du temps client (décodage BSON et itération du curseur)
+	"""
+
+	if len(results) == 0:
+		print(f" {save_path} -> No data to plot")
+		return
+
+	labels	= [result["label"] for result in results]
+	server	= [result["server_median"] for result in results]
+	decode	= [max(result["client_median"] - result["server_median"], 0) for result in results]
+
+	fig, ax = plt.subplots(figsize=(max(12, len(results)*0.6), 8))
+	ax.bar(labels, server,					color='#9999FF', label='Temps serveur médian (µs)')
+	ax.bar(labels, decode, bottom=server,	color='#FF9999', label='Surcoût client médian : décodage et itération (µs)')
+
+	# Personnalisation du graphique
+	ax.set_title("read_many : temps serveur et temps client par configuration de lecture")
+	ax.set_ylabel('Time (µs)')
+	ax.legend(loc='best')
+	plt.setp(ax.get_xticklabels(), rotation=60, ha='right')
+
+	# Ajuster l'espace entre les sous-graphes
+	plt.tight_layout()
+
+	save_figure(save_path)
+
+def plot_server_metrics(metrics: dict, timestamps: dict, times: dict, save_path: str):
+	"""
+		Superpose les latences client d'un test et les métriques serveur échantillonnées pendant ce test
+	"""
+	samples = metrics.get("samples", [])
+	starts	= [start for operation in timestamps for start in timestamps[operation]]
+	if len(samples) == 0 or len(starts) == 0:
+		print(f" {save_path} -> No data to plot")
+		return
+
+	begin, end	= min(starts), max(starts)
+	samples		= [sample for sample in samples if begin <= sample["timestamp_ns"] <= end]
+	names		= [name for name in overlay_metrics if any(name in sample for sample in samples)]
+	if len(samples) < 2 or len(names) == 0:
+		print(f" {save_path} -> No server metrics during the test")
+		return
+
+	fig, axes = plt.subplots(len(names), 1, figsize=(12, 4*len(names)), sharex=True, squeeze=False)
+	for ax, name in zip(axes[:,0], names):
+		# Latences des opérations, en secondes depuis le début du test
+		for operation in timestamps:
+			n		= min(len(timestamps[operation]), len(times.get(operation, [])))
+			x, y	= scatter_sample((array(timestamps[operation][:n]) - begin)/1e9, times.get(operation, [])[:n])
+			ax.scatter(x, y, s=2, alpha=0.4, label=operation)
+		ax.set_ylabel("Temps (µs)")
+		ax.legend(loc='upper left', markerscale=4)
+
+		# Métrique serveur sur un second axe
+		points	= [sample for sample in samples if name in sample]
+		x		= (array([sample["timestamp_ns"] for sample in points]) - begin)/1e9
+		y		= array([sample[name] for sample in points], dtype=float)
+		if name in cumulative_metrics:
+			x, y = x[1:], diff(y)
+		metric_ax = ax.twinx()
+		metric_ax.plot(x, y, color='black', linewidth=1)
+		metric_ax.set_ylabel(name + (" (variation)" if name in cumulative_metrics else ""))
+		ax.set_title(f"Latences et {name}")
+
+	axes[-1,0].set_xlabel("Temps depuis le début du test (s)")
+	plt.tight_layout()
+
+	save_figure(save_path)
+
+
+def figure_jobs(results_dir: str = "results", plots_dir: str = "plots", violin_mode: str = "auto") -> list[tuple]:
+	"""
+	List the figures to draw from the saved results, one (function, args) job per figure
+	"""
+	jobs = []
+	if not path.isdir(results_dir):
+		return jobs
+
+	for backend in sorted(listdir(results_dir)):
+		if not path.isdir(path.join(results_dir, backend)):
+			continue
+		for test_type in sorted(listdir(path.join(results_dir, backend))):
+			type_dir = path.join(results_dir, backend, test_type)
+			if not path.isdir(type_dir):
+				continue
+
+			metrics_file = path.join(type_dir, "server_metrics.json")
+			metrics = load_results(metrics_file) if path.exists(metrics_file) else None
+
+			for file in sorted(listdir(type_dir)):
+				if not file.endswith(".json") or file == "server_metrics.json":
+					continue
+				test_name	= file[:-len(".json")]
+				results		= load_results(path.join(type_dir, file))
+				plot_path	= path.join(plots_dir, backend, test_type, test_name)
+
+				match results.get("kind"):
+					case "distribution":
+						jobs.append((violin_plot_operation_times, (results["server"], plot_path + ".png", violin_mode)))
+						jobs.append((violin_plot_operation_times, (results["client"], plot_path + "_client.png", violin_mode)))
+					case "steps":
+						bands = results.get("bands", {})
+						jobs.append((plot_operation_times, (results["server"], results["steps"], plot_path + ".png", bands.get("server"))))
+						jobs.append((plot_operation_times, (results["client"], results["steps"], plot_path + "_client.png", bands.get("client"))))
+					case "read_tuning":
+						jobs.append((plot_read_tuning, (results["results"], plot_path + ".png")))
+					case _:
+						continue
+
+				if metrics is not None and "timestamps" in results:
+					jobs.append((plot_server_metrics, (metrics, results["timestamps"], results["client"], plot_path + "_server_metrics.png")))
+
+	return jobs
+
+def render(job: tuple):
+	"""
+	Draw one figure
+	"""
+	function, args = job
+	function(*args)
+
+
+if __name__ == "__main__":
+
+	parser = ArgumentParser(description="Draw the plots of the saved benchmark results")
+	parser.add_argument("--results",	help="Directory of the results",			default="results")
+	parser.add_argument("--plots",		help="Directory of the plots",				default="plots")
+	parser.add_argument("--workers",	help="Number of processes drawing figures",	type=int, default=cpu_count())
+	parser.add_argument("--violin",		help="Violin rendering : exact KDE, fixed grid KDE (fast) or fast only for large samples (auto)",
+										choices=violin_modes, default="auto")
+	args = parser.parse_args()
+
+	jobs = figure_jobs(args.results, args.plots, args.violin)
+	print(f"Drawing {len(jobs)} figures ...")
+
+	if args.workers <= 1:
+		for job in jobs:
+			render(job)
+	else:
+		# Une figure par tâche, réparties entre les processus
+		with ProcessPoolExecutor(max_workers=args.workers) as executor:
+			futures = [executor.submit(render, job) for job in jobs]
+			for future in as_completed(futures):
+				try:
+					future.result()
+				except Exception as e:
+					print(f"Error drawing a figure : {e}")
+
+	print("Plots generated !")
@@ -1,16 +1,101 @@
 #!/bin/bash
 
+# Lance les tests de chaque topologie, chacune dans son propre projet docker compose,
+# éventuellement plusieurs en même temps, chaque test (conteneurs et client) étant épinglé sur ses propres cœurs
+#
+# Usage : ./start-test.sh [-j <tests en parallèle>] [-c <cœurs par test>] [topologie ...] [-- <options de mongodb.py / mysql.py>]
+#  - topologies : mongo-standalone, mongo-replica, mongo-sharded, mysql-standalone, mysql-replica, mysql-sharded,
+#    mongo ou mysql pour toutes celles d'un SGBD ; toutes par défaut
+#  - -j : nombre de topologies testées en même temps, 1 par défaut (l'une après l'autre)
+#  - -c : nombre de cœurs réservés à chaque test, nombre de cœurs / -j par défaut quand -j > 1 ;
+#    sans -c ni -j, rien n'est épinglé
+#
+# Exemples :
+#  ./start-test.sh -j 3 mongo
+#  ./start-test.sh -j 6 -c 4 -- --trials 3
+
+topologies=(mongo-standalone mongo-replica mongo-sharded mysql-standalone mysql-replica mysql-sharded)
+
+# Démarrage, script de test et services de chaque topologie
+declare -A up_args=(
+	[mongo-standalone]="up mongo-standalone -d --wait"
+	[mongo-replica]="up mongo-replica-initiate"
+	[mongo-sharded]="up mongo-sharded-cluster"
+	[mysql-standalone]="up --wait -d mysql-standalone"
+	[mysql-replica]="up mysql-replica-initiate"
+	[mysql-sharded]="up mysql-sharded-initiate"
+)
+declare -A test_args=(
+	[mongo-standalone]="mongodb.py --standalone"
+	[mongo-replica]="mongodb.py --replica"
+	[mongo-sharded]="mongodb.py --sharded"
+	[mysql-standalone]="mysql.py --standalone"
+	[mysql-replica]="mysql.py --replica"
+	[mysql-sharded]="mysql.py --sharded"
+)
+declare -A services=(
+	[mongo-standalone]="mongo-standalone"
+	[mongo-replica]="mongo-replica1 mongo-replica2 mongo-replica3 mongo-replica-initiate"
+	[mongo-sharded]="configserver1 configserver2 configserver3 mongo-config-server-init shardsvr1_1 shardsvr1_2 shardsvr1_3 mongo-shard1-initiate shardsvr2_1 shardsvr2_2 shardsvr2_3 mongo-shard2-initiate mongo-router mongo-sharded-cluster"
+	[mysql-standalone]="mysql-standalone"
+	[mysql-replica]="mysql-replica1 mysql-replica2 mysql-replica3 mysql-replica-initiate"
+	[mysql-sharded]="mysql-manager mysql-ndbd1 mysql-ndbd2 mysql-node1 mysql-sharded-initiate"
+)
+
+###################### Arguments ######################
+jobs=1
+per_run=""
+selected=()
+python_args=()
+while [ $# -gt 0 ]; do
+	case "$1" in
+		-j) jobs=$2; shift 2 ;;
+		-c) per_run=$2; shift 2 ;;
+		--) shift; python_args=("$@"); break ;;
+		mongo|mysql)
+			for topology in "${topologies[@]}"; do
+				[[ $topology == $1-* ]] && selected+=("$topology")
+			done
+			shift ;;
+		*)
+			if [ -z "${test_args[$1]}" ]; then
+				echo "Topologie inconnue : $1 (disponibles : ${topologies[*]}, mongo, mysql)"
+				exit 1
+			fi
+			selected+=("$1")
+			shift ;;
+	esac
+done
+[ ${#selected[@]} -eq 0 ] && selected=("${topologies[@]}")
+
+# Cœurs de chaque test
+if [ -z "$per_run" ] && [ "$jobs" -gt 1 ]; then
+	per_run=$(( $(nproc) / jobs ))
+	[ "$per_run" -lt 1 ] && per_run=1
+fi
+if [ -n "$per_run" ] && [ $(( per_run * jobs )) -gt "$(nproc)" ]; then
+	echo "Attention : $jobs tests de $per_run cœurs pour $(nproc) cœurs, les tests se partagent des cœurs"
+	[ "$per_run" -gt "$(nproc)" ] && per_run=$(nproc)
+fi
 
 # Crée les dossiers logs et plots pour les logs et les graphiques
 mkdir -p logs
 mkdir -p plots
+mkdir -p results
+
+# Avec --resume, les résultats des scénarios déjà faits (cf checkpoints/) sont gardés
+resume=false
+for arg in "${python_args[@]}"; do
+	[ "$arg" = "--resume" ] && resume=true
+done
 
 # Supprime les fichiers de logs et les graphiques s'ils existent
 rm -r -f plots/*
-echo "" > logs/mongodb.log
-echo "" > logs/mongodb-tests.log
-echo "" > logs/mysql.log
-echo "" > logs/mysql-tests.log
+$resume || rm -r -f results/*
+# Journaux des topologies (logs/<topologie>/), les journaux suivis de logs/ sont gardés
+for topology in "${topologies[@]}"; do
+	rm -r -f "logs/${topology}"
+done
 
 ############# Installation des dépendances python ############
 pip3 install -r requirements/generate_data-requirements.txt
@@ -18,35 +103,92 @@ pip3 install -r requirements/mongo-requirements.txt
 pip3 install -r requirements/mysql-requirements.txt
 
 ################### Génération des données ###################
-python3 generate_data.py 						&&
-docker compose down -v --remove-orphans 		&&
-#
-#################### MongoDB ###################
-####### Test en standalone ######
-## Démarrage et attente de la disponibilité du serveur
-docker compose up mongo-standalone -d --wait 	&&
-python3 mongodb.py --standalone 				&&
-docker compose down -v --remove-orphans 		&&
-
-####### Test avec replica ######
-docker compose up mongo-replica-initiate 		&&
-python3 mongodb.py --replica 					&&
-docker compose down -v --remove-orphans 		&&
-
-####### Test avec sharding ######
-docker compose up mongo-sharded-cluster 		&&
-python3 mongodb.py --sharded 					&&
-docker compose down -v --remove-orphans 		&&
-
-################### MySQL ###################
-
-###### Test en standalone ######
-# Démarrage et attente de la disponibilité du serveur
-docker compose up --wait -d mysql-standalone 	&&
-python3 mysql.py --standalone 					&&
-docker compose down -v --remove-orphans 		&&
-
-###### Test avec sharding ######
-docker compose up mysql-sharded-initiate 		&&
-python3 mysql.py --sharded						&&
+python3 generate_data.py 						|| exit 1
 docker compose down -v --remove-orphans
+
+################### Tests des topologies ###################
+# Fichiers d'épinglage et codes de retour des tests
+tmp_dir=$(mktemp -d)
+trap 'rm -r -f "$tmp_dir"' EXIT
+
+# Les tests en parallèle n'affichent pas de barre de progression
+quiet_args=()
+[ "$jobs" -gt 1 ] && quiet_args=(--quiet)
+
+run_topology() {
+	# Démarre la topologie dans son projet, lance son test puis l'arrête
+	# $1 : topologie, $2 : cœurs des conteneurs et du client (ex : 0-3), vide pour ne pas épingler
+	local topology=$1 cpus=$2
+	local compose=(docker compose -p "tdle-${topology}" -f docker-compose.yml)
+	local client=(python3)
+
+	if [ -n "$cpus" ]; then
+		local override="${tmp_dir}/${topology}.yml"
+		echo "services:" > "$override"
+		for service in ${services[$topology]}; do
+			printf '  %s:\n    cpuset: "%s"\n' "$service" "$cpus" >> "$override"
+		done
+		compose+=(-f "$override")
+		if command -v taskset > /dev/null; then
+			client=(taskset -c "$cpus" python3)
+		fi
+	fi
+
+	"${compose[@]}" down -v --remove-orphans 						&&
+	"${compose[@]}" ${up_args[$topology]} 							&&
+	LOGS_DIR="logs/${topology}" "${client[@]}" ${test_args[$topology]} "${python_args[@]}" "${quiet_args[@]}"
+	local status=$?
+	"${compose[@]}" down -v --remove-orphans
+	echo $status > "${tmp_dir}/${topology}.status"
+	return $status
+}
+
+slots=()
+for topology in "${selected[@]}"; do
+	# On attend qu'un emplacement se libère
+	while true; do
+		for (( slot=0; slot<jobs; slot++ )); do
+			if [ -z "${slots[$slot]}" ] || [ -f "${tmp_dir}/${slots[$slot]}.status" ]; then
+				break 2
+			fi
+		done
+		wait -n
+	done
+
+	slots[$slot]=$topology
+	cpus=""
+	if [ -n "$per_run" ]; then
+		first=$(( (slot * per_run) % $(nproc) ))
+		last=$(( first + per_run - 1 ))
+		[ "$last" -ge "$(nproc)" ] && last=$(( $(nproc) - 1 ))
+		cpus="${first}-${last}"
+	fi
+
+	echo "Test de ${topology}${cpus:+ sur les cœurs ${cpus}}"
+	mkdir -p "logs/${topology}"
+	if [ "$jobs" -gt 1 ]; then
+		# Sorties dans logs/<topologie>/run.log
+		run_topology "$topology" "$cpus" > "logs/${topology}/run.log" 2>&1 &
+	else
+		run_topology "$topology" "$cpus"
+	fi
+done
+wait
+
+failed=()
+for topology in "${selected[@]}"; do
+	if [ "$(cat "${tmp_dir}/${topology}.status" 2>/dev/null)" != "0" ]; then
+		failed+=("$topology")
+	fi
+done
+if [ ${#failed[@]} -gt 0 ]; then
+	echo "Échec des tests de : ${failed[*]} (cf logs/<topologie>/)"
+fi
+
+################### Graphiques ###################
+# Dessine les graphiques à partir des résultats enregistrés dans results/
+python3 report.py
+# Rapport de comparaison entre SGBD et topologies
+python3 compare.py
+
+[ ${#failed[@]} -eq 0 ]
@@ -0,0 +1,158 @@
+# Charges de travail mixtes inspirées de YCSB (Yahoo! Cloud Serving Benchmark)
+# Une charge de travail mélange lectures, mises à jour, insertions, parcours courts et lectures-modifications-écritures
+# selon des proportions fixées, sur des clés tirées selon une des distributions de key_chooser.py.
+# La suite des opérations et les clés sont tirées avant la boucle chronométrée, qui ne fait qu'appeler le SGBD.
+
+from math import ceil
+from time import perf_counter_ns as time_ns
+
+#  For statistics
+from numpy import asarray, percentile, mean as np_mean
+from numpy.random import default_rng
+
+from generate_data import GeneratedBooks, num_records
+from key_chooser import choose_keys
+from benchmark import Backend, operation_times, client_operation_times, operation_timestamps
+from benchmark import add_client_operation_time, save_results, save_query_plans, summarize_operation_times, load_books
+
+
+# Charges de travail A à F de YCSB : proportion de chaque opération et distribution des clés (cf key_chooser.py)
+workloads = {
+	"a": {"description": "Update heavy",		"read": 0.5,	"update": 0.5,				"distribution": "zipfian"},
+	"b": {"description": "Read mostly",			"read": 0.95,	"update": 0.05,				"distribution": "zipfian"},
+	"c": {"description": "Read only",			"read": 1.0,								"distribution": "zipfian"},
+	"d": {"description": "Read latest",			"read": 0.95,	"insert": 0.05,				"distribution": "latest"},
+	"e": {"description": "Short ranges",		"scan": 0.95,	"insert": 0.05,				"distribution": "zipfian"},
+	"f": {"description": "Read-modify-write",	"read": 0.5,	"read_modify_write": 0.5,	"distribution": "zipfian"},
+}
+workload_operations		= ["read", "update", "insert", "scan", "read_modify_write"]
+
+# Longueur maximale des parcours courts (YCSB)
+max_scan_length			= 100
+# Graine des tirages, la même suite d'opérations est rejouée à chaque exécution
+workload_seed			= 0
+
+
+######### Tirage des opérations #########
+
+def operation_sequence(definition: dict, count: int, rng) -> list[str]:
+	"""
+	Draw the operations of a workload according to its proportions
+	"""
+	operations		= [operation for operation in workload_operations if definition.get(operation, 0) > 0]
+	proportions		= asarray([definition[operation] for operation in operations], dtype=float)
+	drawn			= rng.choice(len(operations), size=count, p=proportions/proportions.sum())
+	return [operations[i] for i in drawn.tolist()]
+
+def total_workload_operations(names: list[str], operation_count: int) -> int:
+	"""
+	Number of counted operations of the workloads, for the progression bar
+	A read-modify-write counts a read and an update
+	"""
+	total = 0
+	for name in names:
+		operations	= operation_sequence(workloads[name], operation_count, default_rng(workload_seed))
+		total		+= len(operations) + operations.count("read_modify_write")
+	return total
+
+
+######### Exécution #########
+
+def latency_report(times: list) -> dict:
+	"""
+	Number of operations, mean, percentiles, min and max of the times (µs), as reported by YCSB
+	"""
+	if len(times) == 0:
+		return {"operations": 0}
+	p95, p99 = percentile(times, [95, 99])
+	return {"operations": len(times), "average": float(np_mean(times)), "p95": float(p95), "p99": float(p99),
+			"min": float(min(times)), "max": float(max(times))}
+
+def run_workload(backend: Backend, plot_name: str, workload: str = "a", record_count: int = num_records, operation_count: int = num_records):
+	"""
+	Load record_count books, then run operation_count operations of the workload and measure
+	the throughput and the latency of each operation
+	:param workload: name of the workload in workloads
+	"""
+	definition		= workloads[workload]
+	distribution	= definition["distribution"]
+	backend.logger.info(f"Workload {workload} ({definition['description']}) : {record_count} records, {operation_count} operations " + plot_name)
+
+	# Chargement initial, hors mesures
+	backend.drop_all()
+	dataset = GeneratedBooks(record_count + operation_count)
+	load_books(backend, dataset, 0, record_count)
+
+	# Tout est tiré avant la boucle chronométrée
+	rng				= default_rng(workload_seed)
+	operations		= operation_sequence(definition, operation_count, rng)
+	keys			= choose_keys(distribution, operation_count, record_count, rng)
+	scan_lengths	= rng.integers(1, max_scan_length + 1, operation_count).tolist()
+	new_values		= rng.integers(0, 1000001, operation_count).tolist()
+	new_books		= dataset[record_count:record_count + operations.count("insert")]
+
+	backend.clear_operation_data()
+
+	next_id		= record_count
+	start_time	= time_ns()
+	try:
+		for i, operation in enumerate(operations):
+			if operation == "insert":
+				backend.create_one(new_books[next_id - record_count])
+				next_id += 1
+				continue
+
+			# Les clés "latest" suivent les insertions
+			key = keys[i] + next_id - record_count if distribution == "latest" else keys[i]
+
+			match operation:
+				case "read":
+					backend.read_one({"id": key}, print_result=False)
+				case "update":
+					backend.update_one({"id": key}, {"copies_sold": new_values[i]})
+				case "scan":
+					backend.scan(key, scan_lengths[i])
+				case "read_modify_write":
+					operation_start = time_ns()
+					backend.read_one({"id": key}, print_result=False)
+					backend.update_one({"id": key}, {"copies_sold": new_values[i]})
+					add_client_operation_time("read_modify_write", time_ns() - operation_start)
+	except Exception as e:
+		backend.logger.error(f"run_workload {workload} : operation error -> {e}")
+	run_time = time_ns() - start_time
+
+	server		= {operation: list(times) for operation, times in operation_times.items()}
+	client		= {operation: list(times) for operation, times in client_operation_times.items()}
+	timestamps	= {operation: list(times) for operation, times in operation_timestamps.items()}
+	throughput	= operation_count / (run_time / 1e9) if run_time > 0 else 0.
+	latency		= {operation: latency_report(times) for operation, times in client.items()}
+
+	# Résumé au format de YCSB
+	backend.logger.info(f"[OVERALL], RunTime(ms), {run_time/1e6:.0f}")
+	backend.logger.info(f"[OVERALL], Throughput(ops/sec), {throughput:.1f}")
+	for operation, report in latency.items():
+		if report["operations"] > 0:
+			backend.logger.info(f"[{operation.upper()}], Operations, {report['operations']}, AverageLatency(us), {report['average']:.1f}, "\
+								f"95thPercentileLatency(us), {ceil(report['p95'])}, 99thPercentileLatency(us), {ceil(report['p99'])}")
+
+	save_query_plans(backend.name, plot_name, f"ycsb_{workload}")
+	save_results(backend.name, plot_name, f"ycsb_{workload}", {	"kind"			: "distribution",
+																"workload"		: dict(definition, name=workload, record_count=record_count, operation_count=operation_count),
+																"run_time_ms"	: run_time / 1e6,
+																"throughput"	: throughput,
+																"latency"		: latency,
+																"server"		: server,
+																"client"		: client,
+																"timestamps"	: timestamps})
+
+	backend.drop_all()
+	backend.clear_operation_data()
+
+	return {"server": summarize_operation_times(server), "client": summarize_operation_times(client)}
+
+def workload_scenarios(names: list[str], record_count: int = num_records, operation_count: int = num_records) -> list[tuple]:
+	"""
+	Scenarios of the workloads, to add to the scenarios of run_tests
+	"""
+	return [(f"ycsb_{name}", run_workload, {"workload": name, "record_count": record_count, "operation_count": operation_count})
+			for name in names]